@@ -0,0 +1,123 @@
+"""
+CSV解析引擎基准测试
+
+生成指定大小的测试CSV（或使用已有文件），分别用 'c' 和 'pyarrow' 解析引擎读取整个文件、
+按键列比较两个文件，输出耗时、加速比和DataFrame内存占用，并检查两种引擎的差异单元格一致：
+
+    python benchmarks/bench_csv_engine.py --size-mb 2048
+    python benchmarks/bench_csv_engine.py --file data/a.csv --file2 data/b.csv --key id
+
+pyarrow 引擎使用多线程解析，加速比随CPU核数增加。
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from simpletoolkit.base.logging_core import set_log_level  # noqa: E402
+from simpletoolkit.filesystems.csv_tools import CSVTool  # noqa: E402
+from simpletoolkit.filesystems.read_utils import PARSER_ENGINES, read_csv_frame  # noqa: E402
+
+# 生成测试数据时每批写出的行数
+GENERATE_BATCH_ROWS = 500000
+
+
+def generate_csv(path, size_mb, seed=0, change_rate=0.0):
+    """生成约 size_mb 大小的测试CSV：整数键、日期、文本、可空整数和浮点列；change_rate 为修改的行比例"""
+    rng = np.random.default_rng(seed)
+    target = size_mb * 1024 * 1024
+    start = 0
+    with open(path, 'w', newline='', encoding='utf-8') as handle:
+        while handle.tell() < target:
+            rows = GENERATE_BATCH_ROWS
+            ids = np.arange(start, start + rows)
+            value = rng.integers(0, 1000000, rows).astype(float)
+            value[rng.random(rows) < 0.05] = np.nan
+            frame = pd.DataFrame({
+                'id': ids,
+                'day': pd.to_datetime(ids % 3650, unit='D', origin='2015-01-01').strftime('%Y-%m-%d'),
+                'city': rng.choice(['北京', '上海', '广州', '深圳', '杭州'], rows),
+                'amount': pd.array(value).astype('Int64'),
+                'score': rng.random(rows)
+            })
+            if change_rate:
+                changed = np.flatnonzero(np.random.default_rng(seed + start).random(rows) < change_rate)
+                frame.loc[changed, 'score'] = -1.0
+            frame.to_csv(handle, index=False, header=start == 0)
+            start += rows
+    return path
+
+
+def timed(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='simpletoolkit CSV解析引擎基准测试')
+    parser.add_argument('--size-mb', type=int, default=256, help='生成的测试文件大小（MB）')
+    parser.add_argument('--file', help='使用已有的CSV文件，不生成测试数据')
+    parser.add_argument('--file2', help='比较用的第二个CSV文件，默认生成与 --file 有少量差异的文件')
+    parser.add_argument('--key', action='append', help='比较的键列，可重复指定，默认为 id')
+    parser.add_argument('--repeat', type=int, default=3, help='每项测试的重复次数')
+    parser.add_argument('--skip-compare', action='store_true', help='只测试读取')
+    args = parser.parse_args()
+
+    set_log_level('WARNING')
+    key_columns = args.key or ['id']
+
+    with tempfile.TemporaryDirectory(prefix='bench_csv_engine_') as work_dir:
+        file1 = args.file
+        file2 = args.file2
+        if file1 is None:
+            print(f"生成约 {args.size_mb} MB 的测试文件...")
+            file1 = generate_csv(os.path.join(work_dir, 'a.csv'), args.size_mb)
+            if file2 is None:
+                file2 = generate_csv(os.path.join(work_dir, 'b.csv'), args.size_mb, change_rate=0.001)
+        print(f"文件大小: {os.path.getsize(file1) / 1024 / 1024:.1f} MB，CPU核数: {os.cpu_count()}")
+
+        read_seconds = {}
+        for engine in PARSER_ENGINES:
+            seconds, df = timed(lambda: read_csv_frame(file1, engine), args.repeat)
+            read_seconds[engine] = seconds
+            memory = df.memory_usage(index=True, deep=True).sum() / 1024 / 1024
+            print(f"读取 {engine:<8} {seconds:8.2f} s  内存 {memory:10.1f} MB  行数 {len(df)}")
+            del df
+        print(f"读取加速比: {read_seconds['c'] / read_seconds['pyarrow']:.2f}x")
+
+        if args.skip_compare or file2 is None:
+            return 0
+
+        tool = CSVTool()
+        compare_seconds = {}
+        cells = {}
+        for engine in PARSER_ENGINES:
+            seconds, result = timed(lambda: tool.compare_csv(file1, file2, key_columns=key_columns,
+                                                             parser_engine=engine, result_format='columnar'),
+                                    args.repeat)
+            compare_seconds[engine] = seconds
+            frame = result['differences'].frame
+            cells[engine] = set(zip(frame['key'].tolist(), frame['column'].tolist()))
+            print(f"比较 {engine:<8} {seconds:8.2f} s  差异单元格 {len(cells[engine])}")
+        print(f"比较加速比: {compare_seconds['c'] / compare_seconds['pyarrow']:.2f}x")
+
+        if cells['c'] != cells['pyarrow']:
+            print("两种引擎的差异单元格不一致")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+导入耗时基准测试
+
+在独立的子进程中测量 import simpletoolkit 及常见入口的耗时，并检查包导入时
+没有加载 pandas、obs 等重量级依赖。可用于发现导入耗时的回归：
+
+    python benchmarks/bench_import.py --repeat 5 --max-ms 50
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# 场景名称 -> 在子进程中执行的代码
+SCENARIOS = {
+    'import simpletoolkit': "import simpletoolkit",
+    'create_toolkit()': "import simpletoolkit; simpletoolkit.create_toolkit()",
+    'date_generator.get_today()': (
+        "import simpletoolkit; simpletoolkit.create_toolkit().data_processing.date_generator.get_today()"
+    ),
+    'filesystem.csv': "import simpletoolkit; simpletoolkit.create_toolkit().filesystem.csv",
+}
+
+# 包导入时不应加载的模块
+HEAVY_MODULES = ('pandas', 'obs', 'loguru')
+
+CHECK_CODE = (
+    "import sys, simpletoolkit\n"
+    "toolkit = simpletoolkit.create_toolkit()\n"
+    f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+)
+
+
+def measure(code, repeat):
+    """返回每次在新解释器中执行 code 的耗时（毫秒），已扣除空解释器的启动耗时"""
+    def run(source):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', source], check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return (time.perf_counter() - start) * 1000
+
+    baseline = min(run('pass') for _ in range(repeat))
+    return [max(0.0, run(code) - baseline) for _ in range(repeat)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='simpletoolkit 导入耗时基准测试')
+    parser.add_argument('--repeat', type=int, default=5, help='每个场景的重复次数')
+    parser.add_argument('--max-ms', type=float, default=None,
+                        help='import simpletoolkit 的耗时上限（毫秒），超过时以非零状态退出')
+    args = parser.parse_args()
+
+    failed = False
+    loaded = subprocess.run([sys.executable, '-c', CHECK_CODE], check=True,
+                            capture_output=True, text=True).stdout.strip()
+    if loaded:
+        print(f"导入 simpletoolkit 并创建工具包时加载了重量级模块: {loaded}")
+        failed = True
+
+    results = {}
+    for name, code in SCENARIOS.items():
+        timings = measure(code, args.repeat)
+        results[name] = statistics.median(timings)
+        print(f"{name:<32} 中位数 {results[name]:8.1f} ms  最小 {min(timings):8.1f} ms")
+
+    if args.max_ms is not None and results['import simpletoolkit'] > args.max_ms:
+        print(f"import simpletoolkit 耗时超过上限 {args.max_ms} ms")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,79 +1,146 @@
-from .base.base_tool import BaseTool
-from .filesystems.csv_tools import CSVTool
-from .filesystems.excel_tools import ExcelTool
-from .apis.tencent.image_search import TencentImageSearchTool
-from .apis.huawei.obs_tools import HuaweiOBSTool
-from .dataprocessing.text_processing import TextProcessingTool
-from .dataprocessing.date_generator import DateGeneratorTool
+import importlib
+import inspect
 
 __version__ = "0.1.0"
 
+# 工具类与所在模块的对应关系，首次访问时才导入（避免 import simpletoolkit 时加载 pandas、obs 等重量级依赖）
+_LAZY_IMPORTS = {
+    'BaseTool': '.base.base_tool',
+    'CSVTool': '.filesystems.csv_tools',
+    'ExcelTool': '.filesystems.excel_tools',
+    'TencentImageSearchTool': '.apis.tencent.image_search',
+    'HuaweiOBSTool': '.apis.huawei.obs_tools',
+    'TextProcessingTool': '.dataprocessing.text_processing',
+    'DateGeneratorTool': '.dataprocessing.date_generator',
+    'add_sink': '.base.logging_core',
+    'set_log_level': '.base.logging_core',
+}
+
+__all__ = [*_LAZY_IMPORTS, 'SimpleToolkit', 'ToolContainer', 'create_toolkit']
+
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
+
+
+def _apply_config(tool, config):
+    """将全局配置应用到工具上，只传入工具 configure 方法能接受的参数"""
+    if not config:
+        return
+    parameters = inspect.signature(tool.configure).parameters
+    if not any(param.kind == param.VAR_KEYWORD for param in parameters.values()):
+        config = {key: value for key, value in config.items() if key in parameters}
+    if config:
+        tool.configure(**config)
+
+
+class LazyTool:
+    """工具描述符：首次访问时才导入工具模块并创建实例"""
+
+    def __init__(self, module_name, class_name):
+        self.module_name = module_name
+        self.class_name = class_name
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, container, owner=None):
+        if container is None:
+            return self
+        tool_class = getattr(importlib.import_module(self.module_name, __name__), self.class_name)
+        tool = tool_class()
+        _apply_config(tool, container._global_config)
+        # 写入实例字典后，后续访问直接命中实例属性，不再经过描述符
+        container.__dict__[self.name] = tool
+        container._tools[self.name] = tool
+        return tool
 
-class SimpleToolkit:
+
+# 工具容器基类 - 用于组织不同层级的工具
+class ToolContainer:
+
+    def __init__(self, global_config=None):
+        # 与所属工具包共享的全局配置，新创建的工具会自动应用
+        self._global_config = {} if global_config is None else global_config
+        # 已创建的工具实例
+        self._tools = {}
+
+    def _containers(self):
+        return [value for value in vars(self).values() if isinstance(value, ToolContainer)]
+
+    def _configure(self, **kwargs):
+        """配置已创建的工具及子容器（尚未创建的工具会在创建时应用全局配置）"""
+        for tool in self._tools.values():
+            _apply_config(tool, kwargs)
+        for container in self._containers():
+            container._configure(**kwargs)
+
+
+class SimpleToolkit(ToolContainer):
     """SimpleToolkit主类，作为所有工具的统一入口"""
 
     def __init__(self):
+        super().__init__()
+
         # 文件系统工具
-        self.filesystem = FileSystemTools()
+        self.filesystem = FileSystemTools(self._global_config)
 
         # API集成工具
-        self.apis = APITools()
+        self.apis = APITools(self._global_config)
 
         # 数据处理工具
-        self.data_processing = DataProcessingTools()
+        self.data_processing = DataProcessingTools(self._global_config)
 
     def configure_global(self, **kwargs):
         """配置所有工具的全局参数"""
-
-        def _configure(obj):
-            if isinstance(obj, BaseTool):
-                obj.configure(**kwargs)
-            else:
-                for attr_name in dir(obj):
-                    attr = getattr(obj, attr_name)
-                    if isinstance(attr, (BaseTool, ToolContainer)):
-                        _configure(attr)
-
-        _configure(self)
-
-
-# 工具容器基类 - 用于组织不同层级的工具
-class ToolContainer:
-    pass
+        if 'log_level' in kwargs:
+            # 日志级别同时作为所有工具的默认级别
+            from .base.logging_core import set_log_level
+            set_log_level(kwargs['log_level'])
+        self._global_config.update(kwargs)
+        self._configure(**kwargs)
 
 
 # 文件系统工具容器
 class FileSystemTools(ToolContainer):
-    def __init__(self):
-        self.csv = CSVTool()
-        self.excel = ExcelTool()
+    csv = LazyTool('.filesystems.csv_tools', 'CSVTool')
+    excel = LazyTool('.filesystems.excel_tools', 'ExcelTool')
 
 
 # API工具容器
 class APITools(ToolContainer):
-    def __init__(self):
-        self.tencent = TencentAPITools()
-        self.huawei = HuaweiAPITools()
+    def __init__(self, global_config=None):
+        super().__init__(global_config)
+        self.tencent = TencentAPITools(self._global_config)
+        self.huawei = HuaweiAPITools(self._global_config)
 
 
 # 腾讯API工具容器
 class TencentAPITools(ToolContainer):
-    def __init__(self):
-        self.image_search = TencentImageSearchTool()
+    image_search = LazyTool('.apis.tencent.image_search', 'TencentImageSearchTool')
+
 
 # 华为API工具容器
 class HuaweiAPITools(ToolContainer):
-    def __init__(self):
-        self.obs = HuaweiOBSTool()
+    obs = LazyTool('.apis.huawei.obs_tools', 'HuaweiOBSTool')
 
 
 # 数据处理工具容器
 class DataProcessingTools(ToolContainer):
-    def __init__(self):
-        self.text = TextProcessingTool()
-        self.date_generator = DateGeneratorTool()
+    text = LazyTool('.dataprocessing.text_processing', 'TextProcessingTool')
+    date_generator = LazyTool('.dataprocessing.date_generator', 'DateGeneratorTool')
 
 
 # 创建工具包实例的工厂函数
 def create_toolkit():
-    return SimpleToolkit()
\ No newline at end of file
+    return SimpleToolkit()
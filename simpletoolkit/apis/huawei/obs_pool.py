@@ -0,0 +1,127 @@
+import threading
+from contextlib import contextmanager
+
+# 客户端池的默认大小，即同时进行的OBS请求数上限
+DEFAULT_CLIENT_POOL_SIZE = 16
+
+
+def _close_client(client):
+    """关闭客户端，释放其持有的HTTP连接"""
+    close = getattr(client, 'close', None)
+    if close is not None:
+        try:
+            close()
+        except Exception:
+            pass
+
+
+class ObsClientPool:
+    """
+    OBS客户端池（线程安全）
+
+    客户端按需创建，总数不超过 size，用完归还后由其他线程复用，连同其保持的HTTP连接一起复用。
+    池满时请求客户端的线程等待其他线程归还。reset 原子地替换客户端工厂：空闲的旧客户端立即关闭，
+    使用中的旧客户端在归还时关闭，之后取得的都是新工厂创建的客户端。
+    """
+
+    def __init__(self, factory=None, size=DEFAULT_CLIENT_POOL_SIZE):
+        self._condition = threading.Condition()
+        self._factory = factory
+        self._size = self._check_size(size)
+        self._idle = []
+        self._created = 0
+        self._generation = 0
+
+    @property
+    def size(self):
+        """池的大小"""
+        return self._size
+
+    @property
+    def created(self):
+        """当前存在的客户端数（包括使用中和空闲的）"""
+        return self._created
+
+    @contextmanager
+    def client(self):
+        """取得一个客户端，退出上下文时归还"""
+        client, generation = self._acquire()
+        try:
+            yield client
+        finally:
+            self._release(client, generation)
+
+    def reset(self, factory=None, size=None):
+        """替换客户端工厂（和池大小），旧客户端全部作废"""
+        with self._condition:
+            self._generation += 1
+            self._factory = factory
+            if size is not None:
+                self._size = self._check_size(size)
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._condition.notify_all()
+        for client in idle:
+            _close_client(client)
+
+    def close(self):
+        """关闭所有空闲客户端，之后需要 reset 设置新的工厂才能继续使用"""
+        self.reset(None)
+
+    def _acquire(self):
+        with self._condition:
+            while True:
+                if self._factory is None:
+                    raise ValueError("OBS客户端池未配置客户端工厂")
+                if self._idle:
+                    return self._idle.pop(), self._generation
+                if self._created < self._size:
+                    self._created += 1
+                    factory, generation = self._factory, self._generation
+                    break
+                self._condition.wait()
+
+        # 在锁外创建客户端，创建较慢时不阻塞其他线程归还和复用客户端
+        try:
+            return factory(), generation
+        except BaseException:
+            with self._condition:
+                self._created -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, client, generation):
+        with self._condition:
+            self._condition.notify()
+            if generation == self._generation:
+                self._idle.append(client)
+                return
+            self._created -= 1
+        _close_client(client)
+
+    @staticmethod
+    def _check_size(size):
+        size = int(size)
+        if size < 1:
+            raise ValueError(f"客户端池大小必须大于0: {size}")
+        return size
+
+
+class PooledObsClient:
+    """
+    按调用使用客户端池的 ObsClient 代理
+
+    每次方法调用从池中取得一个客户端，调用返回后立即归还，多个线程通过同一代理并发调用时
+    分别使用不同的客户端，并发数不超过池的大小。
+    """
+
+    def __init__(self, pool):
+        self._pool = pool
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            with self._pool.client() as client:
+                return getattr(client, name)(*args, **kwargs)
+
+        call.__name__ = name
+        return call
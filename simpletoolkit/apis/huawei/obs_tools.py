@@ -1,15 +1,26 @@
+import fnmatch
 import os
-from typing import Optional
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Iterator, Optional
 
 from simpletoolkit.base.base_tool import BaseTool
-from obs import ObsClient
+from .obs_pool import ObsClientPool, PooledObsClient
+from .obs_transfer import (DEFAULT_LIST_PAGE_SIZE, DEFAULT_MULTIPART_THRESHOLD, DEFAULT_PART_RETRIES,
+                           DEFAULT_PART_SIZE, DEFAULT_SYNC_WORKERS, DEFAULT_TRANSFER_WORKERS, DOWNLOAD_CHECKPOINT_SUFFIX,
+                           DOWNLOAD_TEMP_SUFFIX, UPLOAD_CHECKPOINT_SUFFIX, TransferCheckpoint, etag_md5, file_md5,
+                           list_local_files, needs_transfer, parse_last_modified, plan_parts, preallocate, write_at)
 
 # 环境变量提示信息
 ENV_VARIABLE_HINT = "请确保已正确配置环境变量 'HUAWEI_CLOUD_AK', 'HUAWEI_CLOUD_SK' 和 'HUAWEI_REGION'。"
 
 
 class HuaweiOBSTool(BaseTool):
-    """华为云OBS存储服务工具（单例模式实现）"""
+    """
+    华为云OBS存储服务工具（单例模式实现）
+
+    OBS请求通过线程安全的客户端池发出，多个线程可以同时使用同一实例传输文件。
+    """
 
     _instance = None
     _initialized = False
@@ -30,7 +41,9 @@ class HuaweiOBSTool(BaseTool):
         self._secret_key = None
         self._region = None
         self._server = None
-        self._obs_client = None
+        self._client_pool = ObsClientPool()
+        self._client_settings = None
+        self._obs_client = PooledObsClient(self._client_pool)
 
         # 初始配置加载
         self.configure(access_key, secret_key, region)
@@ -45,8 +58,19 @@ class HuaweiOBSTool(BaseTool):
 
     def configure(self, access_key: Optional[str] = None,
                   secret_key: Optional[str] = None,
-                  region: Optional[str] = None) -> 'HuaweiOBSTool':
-        """配置华为云认证信息（支持链式调用）"""
+                  region: Optional[str] = None,
+                  pool_size: Optional[int] = None) -> 'HuaweiOBSTool':
+        """
+        配置华为云认证信息（支持链式调用）
+
+        认证信息、区域或客户端池大小变化时原子地重建客户端池，正在进行的请求不受影响。
+
+        Args:
+            access_key: Access Key
+            secret_key: Secret Key
+            region: 区域
+            pool_size: 客户端池大小，即同时进行的OBS请求数上限，默认为16
+        """
         # 按优先级设置配置：参数 > 已有配置 > 环境变量 > 默认值
         self._access_key = access_key or self._access_key or os.getenv('HUAWEI_CLOUD_AK')
         self._secret_key = secret_key or self._secret_key or os.getenv('HUAWEI_CLOUD_SK')
@@ -63,45 +87,82 @@ class HuaweiOBSTool(BaseTool):
         if not all([self._access_key, self._secret_key, self._region]):
             self._logger.warning(ENV_VARIABLE_HINT)
 
-        # 重置客户端（下次使用时重新初始化）
-        self._obs_client = None
+        # 配置变化时重建客户端池（客户端在下次使用时创建）
+        pool_size = pool_size or self._client_pool.size
+        settings = (self._access_key, self._secret_key, self._server, pool_size)
+        if settings != self._client_settings:
+            self._client_settings = settings
+            self._client_pool.reset(self._client_factory(self._access_key, self._secret_key, self._server),
+                                    pool_size)
 
         # 调用基类配置
         super().configure(
             access_key=self._access_key,
             secret_key=self._secret_key,
-            region=self._region
+            region=self._region,
+            pool_size=pool_size
         )
 
         return self  # 支持链式调用
 
-    def _init_obs_client(self):
-        """初始化OBS客户端（懒加载）"""
-        if not all([self._access_key, self._secret_key, self._server]):
-            raise ValueError("缺少必要的认证信息，无法初始化OBS客户端")
+    def _client_factory(self, access_key, secret_key, server):
+        """创建客户端池使用的工厂函数，认证信息在创建时固定，不受之后的 configure 影响"""
 
-        try:
-            self._obs_client = ObsClient(
-                access_key_id=self._access_key,
-                secret_access_key=self._secret_key,
-                server=self._server
-            )
-            self._logger.info(f"OBS客户端初始化成功 - 区域: {self._region}")
-        except Exception as e:
-            self._logger.error(f"OBS客户端初始化失败: {str(e)}")
-            self._obs_client = None
-            raise
+        def create():
+            if not all([access_key, secret_key, server]):
+                raise ValueError("缺少必要的认证信息，无法初始化OBS客户端")
+
+            # 延迟导入OBS SDK，只在真正使用客户端时加载
+            from obs import ObsClient
+
+            try:
+                # 长连接模式下客户端保持HTTP连接，归还到池中后由后续请求复用
+                client = ObsClient(
+                    access_key_id=access_key,
+                    secret_access_key=secret_key,
+                    server=server,
+                    long_conn_mode=True
+                )
+                self._logger.debug("OBS客户端初始化成功 - 服务器: {}", server)
+                return client
+            except Exception as e:
+                self._logger.error(f"OBS客户端初始化失败: {str(e)}")
+                raise
+
+        return create
 
     @property
     def obs_client(self):
-        """获取OBS客户端（懒加载）"""
-        if self._obs_client is None:
-            self._init_obs_client()
+        """获取OBS客户端（每次方法调用从客户端池中取得客户端，可在多个线程中同时使用）"""
         return self._obs_client
 
     def upload_file(self, local_path: str, bucket_name: str, object_key: str, **options) -> bool:
-        """上传文件到OBS"""
+        """
+        上传文件到OBS
+
+        大文件使用分段上传：各段由线程池并发上传，每完成一段写入本地断点记录，
+        中断后再次调用时从已完成的段之后继续上传。
+
+        Args:
+            local_path: 本地文件路径
+            bucket_name: 桶名称
+            object_key: 对象名称
+            **options: 可选参数
+                multipart: 是否分段上传，默认在文件大小达到 multipart_threshold 时自动使用
+                multipart_threshold: 自动使用分段上传的文件大小（字节），默认64MB
+                part_size: 段大小（字节），默认16MB，段数超过10000时自动增大
+                workers: 并发上传的段数，默认为4
+                part_retries: 每段上传失败后的重试次数，默认为3
+                checkpoint_file: 断点记录文件路径，默认为 <local_path>.obs_upload，上传成功后删除
+        """
+        multipart = options.get('multipart')
+        if multipart is None:
+            multipart = os.path.getsize(local_path) >= options.get('multipart_threshold', DEFAULT_MULTIPART_THRESHOLD)
+
         try:
+            if multipart:
+                return self._upload_multipart(local_path, bucket_name, object_key, **options)
+
             response = self.obs_client.putFile(bucket_name, object_key, local_path)
             if response.status < 300:
                 self._logger.info(f"文件上传成功 - 桶: {bucket_name}, 对象: {object_key}")
@@ -113,9 +174,138 @@ class HuaweiOBSTool(BaseTool):
             self._logger.error(f"文件上传异常: {str(e)}")
             raise
 
+    def _upload_multipart(self, local_path, bucket_name, object_key, **options):
+        """分段上传，断点记录与本次上传一致时续传"""
+        client = self.obs_client
+        stat = os.stat(local_path)
+        part_size, parts = plan_parts(stat.st_size, options.get('part_size', DEFAULT_PART_SIZE))
+        checkpoint = TransferCheckpoint(
+            options.get('checkpoint_file') or local_path + UPLOAD_CHECKPOINT_SUFFIX,
+            {'operation': 'upload', 'bucket': bucket_name, 'key': object_key, 'file': os.path.abspath(local_path),
+             'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'part_size': part_size}
+        )
+
+        state = checkpoint.load()
+        upload_id = state.get('upload_id') if state else None
+        if upload_id:
+            uploaded = self._list_uploaded_parts(bucket_name, object_key, upload_id)
+            if uploaded is None:
+                self._logger.warning(f"断点记录中的分段上传已失效，重新上传 - 对象: {object_key}")
+                upload_id = None
+            else:
+                # 只保留服务端确实存在且ETag一致的段
+                checkpoint.done = {number: etag for number, etag in checkpoint.done.items()
+                                   if uploaded.get(number) == etag}
+
+        if upload_id:
+            self._logger.info(f"继续分段上传 - 对象: {object_key}，已完成 {len(checkpoint.done)}/{len(parts)} 段")
+        else:
+            response = client.initiateMultipartUpload(bucket_name, object_key)
+            if response.status >= 300:
+                self._logger.error(f"初始化分段上传失败 - 状态码: {response.status}")
+                return False
+            upload_id = response.body.uploadId
+            checkpoint.start(upload_id=upload_id)
+            self._logger.info(f"开始分段上传 - 对象: {object_key}，段数: {len(parts)}，段大小: {part_size}")
+
+        pending = [part for part in parts if part[0] not in checkpoint.done]
+        retries = options.get('part_retries', DEFAULT_PART_RETRIES)
+        with ThreadPoolExecutor(max_workers=options.get('workers', DEFAULT_TRANSFER_WORKERS)) as executor:
+            futures = [executor.submit(self._upload_part, bucket_name, object_key, upload_id, local_path, part,
+                                       retries) for part in pending]
+            try:
+                for future in as_completed(futures):
+                    number, etag = future.result()
+                    checkpoint.mark_done(number, etag)
+                    self._logger.debug("已上传分段 {}/{} - 对象: {}", len(checkpoint.done), len(parts), object_key)
+            except BaseException:
+                # 已完成的段保留在断点记录中，下次调用时续传
+                for future in futures:
+                    future.cancel()
+                raise
+
+        from obs import CompleteMultipartUploadRequest, CompletePart
+
+        request = CompleteMultipartUploadRequest(parts=[
+            CompletePart(partNum=number, etag=checkpoint.done[number]) for number in sorted(checkpoint.done)
+        ])
+        response = client.completeMultipartUpload(bucket_name, object_key, upload_id, request)
+        if response.status >= 300:
+            self._logger.error(f"完成分段上传失败 - 状态码: {response.status}")
+            return False
+
+        checkpoint.remove()
+        self._logger.info(f"文件上传成功 - 桶: {bucket_name}, 对象: {object_key}, 段数: {len(parts)}")
+        return True
+
+    def _upload_part(self, bucket_name, object_key, upload_id, local_path, part, retries):
+        """上传一个段，失败时重试，返回 (段号, ETag)"""
+        number, offset, length = part
+        for attempt in range(retries + 1):
+            try:
+                response = self.obs_client.uploadPart(bucket_name, object_key, number, upload_id, object=local_path,
+                                                      isFile=True, partSize=length, offset=offset)
+                if response.status < 300:
+                    return number, response.body.etag
+                error = f"状态码: {response.status}"
+            except Exception as e:
+                error = str(e)
+            if attempt < retries:
+                self._logger.warning(f"分段 {number} 上传失败，重试 {attempt + 1}/{retries} - {error}")
+        raise RuntimeError(f"分段 {number} 上传失败 - {error}")
+
+    def _list_uploaded_parts(self, bucket_name, object_key, upload_id):
+        """列出分段上传中服务端已有的段，返回 {段号: ETag}；分段上传不存在时返回 None"""
+        parts = {}
+        marker = None
+        while True:
+            response = self.obs_client.listParts(bucket_name, object_key, upload_id, partNumberMarker=marker)
+            if response.status >= 300:
+                return None
+            for part in response.body.parts or []:
+                parts[part.partNumber] = part.etag
+            if not response.body.isTruncated:
+                return parts
+            marker = response.body.nextPartNumberMarker
+
     def download_file(self, bucket_name: str, object_key: str, local_path: str, **options) -> bool:
-        """从OBS下载文件"""
+        """
+        从OBS下载文件
+
+        大对象使用分段下载：按字节范围划分，由线程池并发下载，定位写入预先分配大小的临时文件，
+        每完成一段写入本地断点记录，中断后再次调用时只下载未完成的段。下载完成后校验文件大小，
+        对象ETag为内容MD5时同时校验MD5，校验通过后替换为目标文件。
+
+        Args:
+            bucket_name: 桶名称
+            object_key: 对象名称
+            local_path: 本地文件路径
+            **options: 可选参数
+                ranged: 是否分段下载，默认在对象大小达到 multipart_threshold 时自动使用
+                multipart_threshold: 自动使用分段下载的对象大小（字节），默认64MB
+                part_size: 段大小（字节），默认16MB
+                workers: 并发下载的段数，默认为4
+                part_retries: 每段下载失败后的重试次数，默认为3
+                checkpoint_file: 断点记录文件路径，默认为 <local_path>.obs_download，下载成功后删除
+                verify: 是否校验下载结果，默认为True
+                size: 已知的对象大小（字节），与 etag 同时指定时不再请求对象元数据
+                etag: 已知的对象ETag（如列举结果中的ETag）；对象已变化时分段请求的 If-Match 校验失败，不会混入新内容
+        """
         try:
+            options = dict(options)
+            size, etag = options.pop('size', None), options.pop('etag', None)
+            ranged = options.get('ranged')
+            if ranged is not False:
+                if size is None or etag is None:
+                    metadata = self.obs_client.getObjectMetadata(bucket_name, object_key)
+                    if metadata.status >= 300:
+                        self._logger.error(f"获取对象元数据失败 - 状态码: {metadata.status}")
+                        return False
+                    size, etag = metadata.body.contentLength, metadata.body.etag
+                size = int(size or 0)
+                if ranged or size >= options.get('multipart_threshold', DEFAULT_MULTIPART_THRESHOLD):
+                    return self._download_ranged(bucket_name, object_key, local_path, size, etag, **options)
+
             response = self.obs_client.getObject(bucket_name, object_key, downloadPath=local_path)
             if response.status < 300:
                 self._logger.info(f"文件下载成功 - 桶: {bucket_name}, 对象: {object_key}")
@@ -127,15 +317,285 @@ class HuaweiOBSTool(BaseTool):
             self._logger.error(f"文件下载异常: {str(e)}")
             raise
 
+    def _download_ranged(self, bucket_name, object_key, local_path, size, etag, **options):
+        """分段下载到临时文件，断点记录与对象当前的ETag和大小一致时续传"""
+        part_size, parts = plan_parts(size, options.get('part_size', DEFAULT_PART_SIZE))
+        temp_path = local_path + DOWNLOAD_TEMP_SUFFIX
+        checkpoint = TransferCheckpoint(
+            options.get('checkpoint_file') or local_path + DOWNLOAD_CHECKPOINT_SUFFIX,
+            {'operation': 'download', 'bucket': bucket_name, 'key': object_key, 'etag': etag, 'size': size,
+             'file': os.path.abspath(local_path), 'part_size': part_size}
+        )
+
+        directory = os.path.dirname(local_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if checkpoint.load() is not None and os.path.exists(temp_path) and os.path.getsize(temp_path) == size:
+            self._logger.info(f"继续分段下载 - 对象: {object_key}，已完成 {len(checkpoint.done)}/{len(parts)} 段")
+        else:
+            # 对象已变化或临时文件不完整时重新下载
+            checkpoint.start()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            self._logger.info(f"开始分段下载 - 对象: {object_key}，段数: {len(parts)}，段大小: {part_size}")
+        preallocate(temp_path, size)
+
+        pending = [part for part in parts if part[0] not in checkpoint.done and part[2] > 0]
+        retries = options.get('part_retries', DEFAULT_PART_RETRIES)
+        fd = os.open(temp_path, os.O_WRONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            with ThreadPoolExecutor(max_workers=options.get('workers', DEFAULT_TRANSFER_WORKERS)) as executor:
+                futures = [executor.submit(self._download_range, bucket_name, object_key, etag, fd, part, retries)
+                           for part in pending]
+                try:
+                    for future in as_completed(futures):
+                        number, length = future.result()
+                        checkpoint.mark_done(number, length)
+                        self._logger.debug("已下载分段 {}/{} - 对象: {}", len(checkpoint.done), len(parts),
+                                           object_key)
+                except BaseException:
+                    # 已完成的段保留在断点记录中，下次调用时续传
+                    for future in futures:
+                        future.cancel()
+                    raise
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        if options.get('verify', True) and not self._verify_download(temp_path, object_key, size, etag):
+            checkpoint.remove()
+            os.remove(temp_path)
+            return False
+
+        os.replace(temp_path, local_path)
+        checkpoint.remove()
+        self._logger.info(f"文件下载成功 - 桶: {bucket_name}, 对象: {object_key}, 段数: {len(parts)}")
+        return True
+
+    def _download_range(self, bucket_name, object_key, etag, fd, part, retries):
+        """下载一个字节范围并写入文件对应位置，失败时重试，返回 (段号, 长度)"""
+        from obs import GetObjectHeader
+
+        number, offset, length = part
+        # If-Match 保证各段来自同一版本的对象，下载过程中对象被覆盖时失败
+        headers = GetObjectHeader(range=f'{offset}-{offset + length - 1}', if_match=etag)
+        for attempt in range(retries + 1):
+            try:
+                response = self.obs_client.getObject(bucket_name, object_key, headers=headers,
+                                                     loadStreamInMemory=True)
+                if response.status < 300:
+                    data = response.body.buffer
+                    if len(data) == length:
+                        write_at(fd, data, offset)
+                        return number, length
+                    error = f"长度不一致: {len(data)} != {length}"
+                else:
+                    error = f"状态码: {response.status}"
+            except Exception as e:
+                error = str(e)
+            if attempt < retries:
+                self._logger.warning(f"分段 {number} 下载失败，重试 {attempt + 1}/{retries} - {error}")
+        raise RuntimeError(f"分段 {number} 下载失败 - {error}")
+
+    def _verify_download(self, path, object_key, size, etag):
+        """校验下载文件的大小，ETag为内容MD5时同时校验MD5"""
+        actual_size = os.path.getsize(path)
+        if actual_size != size:
+            self._logger.error(f"下载校验失败 - 对象: {object_key}，大小不一致: {actual_size} != {size}")
+            return False
+        expected_md5 = etag_md5(etag)
+        if expected_md5 is not None and file_md5(path) != expected_md5:
+            self._logger.error(f"下载校验失败 - 对象: {object_key}，MD5与ETag不一致")
+            return False
+        return True
+
     def list_objects(self, bucket_name: str, prefix: Optional[str] = None, **options) -> list:
-        """列出OBS存储桶中的对象"""
+        """
+        列出OBS存储桶中的对象名称，自动翻页直到列出全部对象
+
+        Args:
+            bucket_name: 桶名称
+            prefix: 对象名前缀
+            **options: 可选参数，同 iter_objects
+        """
         try:
-            response = self.obs_client.listObjects(bucket_name, prefix=prefix)
-            if response.status < 300 and hasattr(response.body, 'contents'):
-                return [obj.key for obj in response.body.contents]
-            else:
-                self._logger.warning(f"列出对象失败或无内容 - 状态码: {response.status}")
-                return []
+            return [obj['key'] for obj in self.iter_objects(bucket_name, prefix, **options)]
         except Exception as e:
             self._logger.error(f"列出对象异常: {str(e)}")
-            raise    
\ No newline at end of file
+            raise
+
+    def iter_objects(self, bucket_name: str, prefix: Optional[str] = None, **options) -> Iterator[dict]:
+        """
+        逐个生成OBS存储桶中的对象，自动翻页
+
+        调用方处理当前页时，后台线程预先请求下一页。某一页请求失败时抛出 RuntimeError，
+        不会静默返回不完整的结果。
+
+        Args:
+            bucket_name: 桶名称
+            prefix: 对象名前缀
+            **options: 可选参数
+                marker: 从该对象名之后开始列举
+                page_size: 每页的最大对象数，默认为1000
+                prefetch: 是否在后台预取下一页，默认为True
+
+        Yields:
+            {'key': 对象名, 'size': 字节数, 'etag': ETag, 'last_modified': 最后修改时间}
+        """
+        page_size = options.get('page_size', DEFAULT_LIST_PAGE_SIZE)
+
+        def fetch(marker):
+            response = self.obs_client.listObjects(bucket_name, prefix=prefix, marker=marker, max_keys=page_size)
+            if response.status >= 300:
+                raise RuntimeError(f"列出对象失败 - 桶: {bucket_name}, 状态码: {response.status}")
+            return response.body
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            body = fetch(options.get('marker'))
+            pages = 1
+            while True:
+                contents = body.contents or []
+                next_page = None
+                if body.is_truncated and contents:
+                    # 未指定分隔符时服务端可能不返回 next_marker，此时以本页最后一个对象名作为标记
+                    marker = body.next_marker or contents[-1].key
+                    if options.get('prefetch', True):
+                        next_page = executor.submit(fetch, marker)
+                    else:
+                        next_page = marker
+
+                for obj in contents:
+                    yield {'key': obj.key, 'size': obj.size, 'etag': obj.etag, 'last_modified': obj.lastModified}
+
+                if next_page is None:
+                    self._logger.debug("列出对象完成 - 桶: {}, 前缀: {}, 页数: {}", bucket_name, prefix, pages)
+                    return
+                body = next_page.result() if isinstance(next_page, Future) else fetch(next_page)
+                pages += 1
+
+    def sync_up(self, local_dir: str, bucket_name: str, prefix: str = '', **options) -> dict:
+        """
+        将本地目录同步到OBS，只上传新增和变化的文件
+
+        远端对象信息来自分页列举，不逐个查询元数据。变化检测见 obs_transfer.needs_transfer，
+        各文件的检测和上传在线程池中并发执行。远端多出的对象不会删除。
+
+        Args:
+            local_dir: 本地目录
+            bucket_name: 桶名称
+            prefix: 对象名前缀，本地文件的相对路径拼接在其后
+            **options: 可选参数
+                pattern: 文件名匹配模式，默认为 '*'
+                check: 变化检测方式，'md5'（默认）、'mtime' 或 'size'
+                workers: 同时传输的文件数，默认为8
+                transfer_options: 传给 upload_file 的选项字典（如 part_size、multipart_threshold）
+
+        Returns:
+            同步结果字典，summary 中包含传输和跳过的文件数与字节数
+        """
+        if not os.path.isdir(local_dir):
+            raise ValueError(f"目录不存在: {local_dir}")
+        prefix = self._sync_prefix(prefix)
+        remote = {obj['key']: obj for obj in self.iter_objects(bucket_name, prefix or None)}
+        check = options.get('check', 'md5')
+        transfer_options = options.get('transfer_options') or {}
+
+        def sync_one(name, local_path):
+            key = prefix + name
+            changed, reason = needs_transfer(local_path, remote.get(key), check, 'up')
+            if changed and not self.upload_file(local_path, bucket_name, key, **transfer_options):
+                raise RuntimeError(f"上传失败 - 对象: {key}")
+            return key, os.path.getsize(local_path), changed, reason
+
+        tasks = list_local_files(local_dir, options.get('pattern', '*')).items()
+        return self._run_sync('上传', tasks, sync_one, options.get('workers', DEFAULT_SYNC_WORKERS))
+
+    def sync_down(self, bucket_name: str, prefix: str, local_dir: str, **options) -> dict:
+        """
+        将OBS中前缀下的对象同步到本地目录，只下载新增和变化的对象
+
+        下载完成后将本地文件的修改时间设为对象的最后修改时间，供后续按修改时间检测变化。
+        本地多出的文件不会删除。
+
+        Args:
+            bucket_name: 桶名称
+            prefix: 对象名前缀，前缀之后的部分作为本地相对路径
+            local_dir: 本地目录
+            **options: 可选参数
+                pattern: 文件名匹配模式，默认为 '*'
+                check: 变化检测方式，'md5'（默认）、'mtime' 或 'size'
+                workers: 同时传输的文件数，默认为8
+                transfer_options: 传给 download_file 的选项字典（如 part_size、multipart_threshold），
+                    size 和 etag 取自列举结果，不再逐个请求对象元数据
+
+        Returns:
+            同步结果字典，summary 中包含传输和跳过的文件数与字节数
+        """
+        prefix = self._sync_prefix(prefix)
+        check = options.get('check', 'md5')
+        transfer_options = options.get('transfer_options') or {}
+        pattern = options.get('pattern', '*')
+
+        tasks = []
+        for obj in self.iter_objects(bucket_name, prefix or None):
+            name = obj['key'][len(prefix):]
+            # 跳过目录占位对象
+            if not name or name.endswith('/') or not fnmatch.fnmatch(name.rsplit('/', 1)[-1], pattern):
+                continue
+            tasks.append((name, obj))
+
+        def sync_one(name, obj):
+            local_path = os.path.join(local_dir, *name.split('/'))
+            changed, reason = needs_transfer(local_path, obj, check, 'down')
+            if changed:
+                os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                # 列举结果中已有大小和ETag，下载时不再逐个请求对象元数据
+                download_options = dict(transfer_options, size=obj['size'], etag=obj['etag'])
+                if not self.download_file(bucket_name, obj['key'], local_path, **download_options):
+                    raise RuntimeError(f"下载失败 - 对象: {obj['key']}")
+                remote_time = parse_last_modified(obj['last_modified'])
+                if remote_time is not None:
+                    os.utime(local_path, (remote_time, remote_time))
+            return local_path, obj['size'], changed, reason
+
+        return self._run_sync('下载', tasks, sync_one, options.get('workers', DEFAULT_SYNC_WORKERS))
+
+    @staticmethod
+    def _sync_prefix(prefix):
+        """同步时将前缀视为目录，统一以 / 结尾"""
+        prefix = (prefix or '').strip('/')
+        return prefix + '/' if prefix else ''
+
+    def _run_sync(self, label, tasks, sync_one, workers):
+        """在线程池中同步各文件并汇总结果，单个文件失败不影响其他文件"""
+        start = time.perf_counter()
+        files = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(sync_one, name, item): name for name, item in tasks}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    target, size, changed, reason = future.result()
+                    files.append({'name': name, 'target': target, 'size': size,
+                                  'action': 'transferred' if changed else 'skipped', 'reason': reason})
+                except Exception as e:
+                    self._logger.error(f"同步{label}失败 - 文件: {name}, 错误: {str(e)}")
+                    files.append({'name': name, 'target': None, 'size': 0, 'action': 'failed', 'reason': str(e)})
+
+        files.sort(key=lambda entry: entry['name'])
+        summary = {'total': len(files), 'transferred': 0, 'skipped': 0, 'failed': 0,
+                   'bytes_transferred': 0, 'bytes_skipped': 0, 'seconds': time.perf_counter() - start}
+        for entry in files:
+            summary[entry['action']] += 1
+            if entry['action'] != 'failed':
+                summary['bytes_' + entry['action']] += entry['size']
+
+        message = (f"同步{label}完成：共 {summary['total']} 个文件，传输 {summary['transferred']} 个"
+                   f"（{summary['bytes_transferred']} 字节），跳过 {summary['skipped']} 个"
+                   f"（{summary['bytes_skipped']} 字节），失败 {summary['failed']} 个")
+        if summary['failed']:
+            self._logger.warning(message)
+        else:
+            self._logger.info(message)
+        return {'status': 'error' if summary['failed'] else 'success', 'message': message,
+                'summary': summary, 'files': files}
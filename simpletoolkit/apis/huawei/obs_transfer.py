@@ -0,0 +1,246 @@
+import calendar
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+# 分段传输的默认段大小
+DEFAULT_PART_SIZE = 16 * 1024 * 1024
+# OBS分段上传的段大小下限和上限
+MIN_PART_SIZE = 100 * 1024
+MAX_PART_SIZE = 5 * 1024 * 1024 * 1024
+# OBS分段上传的最大段数
+MAX_PART_COUNT = 10000
+# 文件大小超过该值时默认使用分段上传
+DEFAULT_MULTIPART_THRESHOLD = 64 * 1024 * 1024
+# 默认的并发传输数
+DEFAULT_TRANSFER_WORKERS = 4
+# 每段传输失败后的默认重试次数
+DEFAULT_PART_RETRIES = 3
+# 断点记录格式版本，格式变化时旧记录自动失效
+CHECKPOINT_VERSION = 1
+# 上传断点记录文件的扩展名
+UPLOAD_CHECKPOINT_SUFFIX = '.obs_upload'
+# 下载断点记录文件和下载中临时文件的扩展名
+DOWNLOAD_CHECKPOINT_SUFFIX = '.obs_download'
+DOWNLOAD_TEMP_SUFFIX = '.obs_part'
+# 列举对象时每页的最大对象数（OBS上限为1000）
+DEFAULT_LIST_PAGE_SIZE = 1000
+# 目录同步时默认同时传输的文件数
+DEFAULT_SYNC_WORKERS = 8
+# 目录同步的变化检测方式：大小+MD5（ETag不是MD5时退化为修改时间）、大小+修改时间、仅大小
+SYNC_CHECKS = ('md5', 'mtime', 'size')
+# OBS SDK 返回的最后修改时间格式（本地时间）
+LAST_MODIFIED_FORMATS = ('%Y/%m/%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S.%fZ')
+# 计算文件MD5时每次读取的字节数
+MD5_BLOCK_SIZE = 8 * 1024 * 1024
+
+# 不支持 os.pwrite 的平台上定位写入时使用的锁
+_write_lock = threading.Lock()
+
+
+def plan_parts(size, part_size=DEFAULT_PART_SIZE):
+    """
+    将文件划分为段
+
+    段大小限制在OBS允许的范围内，段数超过上限时自动增大段大小。
+
+    Returns:
+        (实际段大小, [(段号, 偏移量, 长度)])，段号从1开始；空文件为一个长度为0的段
+    """
+    part_size = min(max(int(part_size), MIN_PART_SIZE), MAX_PART_SIZE)
+    if size > part_size * MAX_PART_COUNT:
+        part_size = -(-size // MAX_PART_COUNT)
+
+    parts = []
+    for number, offset in enumerate(range(0, size, part_size), start=1):
+        parts.append((number, offset, min(part_size, size - offset)))
+    return part_size, parts or [(1, 0, 0)]
+
+
+def etag_md5(etag):
+    """
+    从ETag中取出对象内容的MD5
+
+    普通上传的对象ETag为内容的MD5；分段上传的对象ETag带有 -段数 后缀，不是内容的MD5，返回 None。
+    """
+    etag = (etag or '').strip('"').lower()
+    return etag if re.fullmatch(r'[0-9a-f]{32}', etag) else None
+
+
+def file_md5(path):
+    """计算本地文件的MD5（十六进制）"""
+    digest = hashlib.md5()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(MD5_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def preallocate(path, size):
+    """创建或调整文件到指定大小，已有内容保留"""
+    with open(path, 'ab') as handle:
+        handle.truncate(size)
+
+
+def write_at(fd, data, offset):
+    """在文件描述符的指定位置写入数据，多线程同时写入不同位置时互不影响"""
+    if hasattr(os, 'pwrite'):
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(fd, view, offset)
+            view = view[written:]
+            offset += written
+        return
+    with _write_lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+
+
+def parse_last_modified(value):
+    """将OBS对象的最后修改时间转换为时间戳（秒），无法解析时返回 None"""
+    for index, date_format in enumerate(LAST_MODIFIED_FORMATS):
+        try:
+            parsed = time.strptime(value, date_format)
+        except (TypeError, ValueError):
+            continue
+        # 第一种为本地时间，第二种为UTC时间（timegm 不受本地时区和夏令时影响）
+        return int(calendar.timegm(parsed) if index else time.mktime(parsed))
+    return None
+
+
+def list_local_files(directory, pattern='*'):
+    """
+    递归列出目录中匹配 pattern 的文件，不包含传输断点记录和临时文件
+
+    Returns:
+        {相对路径（使用 / 分隔）: 文件路径}
+    """
+    skipped_suffixes = (UPLOAD_CHECKPOINT_SUFFIX, DOWNLOAD_CHECKPOINT_SUFFIX, DOWNLOAD_TEMP_SUFFIX, '.tmp')
+    files = {}
+    for root, dirs, names in os.walk(directory):
+        dirs.sort()
+        for name in sorted(names):
+            if name.endswith(skipped_suffixes) or not fnmatch.fnmatch(name, pattern):
+                continue
+            path = os.path.join(root, name)
+            files[os.path.relpath(path, directory).replace(os.sep, '/')] = path
+    return files
+
+
+def needs_transfer(local_path, remote, check='md5', direction='up'):
+    """
+    比较本地文件与远端对象，判断是否需要传输
+
+    大小不同时需要传输；大小相同时按 check 继续比较：'md5' 比较本地文件MD5与ETag（分段上传的对象
+    ETag不是MD5，改为比较修改时间），'mtime' 比较修改时间（上传时本地较新、下载时远端较新才传输），
+    'size' 不再比较。
+
+    Args:
+        local_path: 本地文件路径
+        remote: iter_objects 生成的对象信息，远端不存在时为 None
+        check: 变化检测方式
+        direction: 'up' 上传，'down' 下载
+
+    Returns:
+        (是否需要传输, 原因)
+    """
+    if check not in SYNC_CHECKS:
+        raise ValueError(f"不支持的变化检测方式: {check}，可选: {', '.join(SYNC_CHECKS)}")
+    if remote is None:
+        return True, '远端不存在'
+    if not os.path.exists(local_path):
+        return True, '本地不存在'
+
+    stat = os.stat(local_path)
+    if stat.st_size != remote['size']:
+        return True, '大小不同'
+    if check == 'size':
+        return False, '大小相同'
+    if check == 'md5':
+        expected = etag_md5(remote['etag'])
+        if expected is not None:
+            if file_md5(local_path) != expected:
+                return True, 'MD5不同'
+            return False, 'MD5相同'
+
+    remote_time = parse_last_modified(remote['last_modified'])
+    if remote_time is None:
+        return True, '无法比较修改时间'
+    # 远端时间精确到秒
+    local_time = int(stat.st_mtime)
+    if direction == 'up' and local_time > remote_time:
+        return True, '本地较新'
+    if direction == 'down' and remote_time > local_time:
+        return True, '远端较新'
+    return False, '修改时间未变'
+
+
+class TransferCheckpoint:
+    """
+    传输断点记录
+
+    以JSON文件保存传输的标识信息（桶、对象、本地文件大小等）和已完成的段，每完成一段立即原子写入。
+    标识信息与本次传输不一致（如本地文件已修改）时旧记录作废。
+    """
+
+    def __init__(self, path, identity):
+        self.path = path
+        self.identity = dict(identity)
+        self.state = {}
+        self.done = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        """读取断点记录，返回记录中的状态；不存在或与本次传输不一致时返回 None"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as handle:
+                record = json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+        if record.get('version') != CHECKPOINT_VERSION or record.get('identity') != self.identity:
+            return None
+        self.state = record.get('state', {})
+        self.done = {int(number): value for number, value in record.get('done', {}).items()}
+        return self.state
+
+    def start(self, **state):
+        """开始新的传输，清空已完成的段"""
+        with self._lock:
+            self.state = state
+            self.done = {}
+            self._save()
+
+    def mark_done(self, number, value):
+        """记录一个已完成的段（线程安全）"""
+        with self._lock:
+            self.done[number] = value
+            self._save()
+
+    def remove(self):
+        """传输完成后删除断点记录"""
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def _save(self):
+        record = {
+            'version': CHECKPOINT_VERSION,
+            'identity': self.identity,
+            'state': self.state,
+            'done': {str(number): value for number, value in self.done.items()}
+        }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            json.dump(record, handle)
+        os.replace(temp_path, self.path)
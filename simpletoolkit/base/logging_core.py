@@ -0,0 +1,181 @@
+import threading
+import weakref
+
+from loguru import logger as loguru_logger
+
+# 定义敏感信息关键字
+SENSITIVE_KEYWORDS = ['access_key', 'secret_key', 'secret_id']
+
+# loguru 内置级别对应的级别号
+LEVELS = {
+    'TRACE': 5,
+    'DEBUG': 10,
+    'INFO': 20,
+    'SUCCESS': 25,
+    'WARNING': 30,
+    'ERROR': 40,
+    'CRITICAL': 50,
+}
+
+# 工具日志的默认级别
+DEFAULT_LEVEL = 'DEBUG'
+
+_lock = threading.Lock()
+_default_level_no = LEVELS[DEFAULT_LEVEL]
+# 工具类名 -> 级别号
+_tool_levels = {}
+# 所有存活的工具日志记录器，级别变化时统一刷新
+_loggers = weakref.WeakSet()
+# 已注册的sink：去重键 -> loguru handler id
+_sinks = {}
+
+
+def level_no(level):
+    """将级别名称或级别号转换为级别号"""
+    if isinstance(level, int):
+        return level
+    name = str(level).upper()
+    if name in LEVELS:
+        return LEVELS[name]
+    return loguru_logger.level(name).no
+
+
+def contains_sensitive(message):
+    """消息中是否包含敏感信息关键字"""
+    return any(keyword in message for keyword in SENSITIVE_KEYWORDS)
+
+
+def filter_sensitive(record):
+    """loguru sink 过滤器：过滤包含敏感信息的记录"""
+    return not contains_sensitive(str(record["message"]))
+
+
+def add_sink(sink, level=DEFAULT_LEVEL, **options):
+    """
+    注册进程级日志sink，同一个sink（同一对象或同一路径）只注册一次
+
+    sink 统一带有敏感信息过滤器；其余参数透传给 loguru 的 logger.add。
+
+    Returns:
+        loguru handler id
+    """
+    key = sink if isinstance(sink, str) else id(sink)
+    with _lock:
+        if key not in _sinks:
+            options.setdefault('filter', filter_sensitive)
+            _sinks[key] = loguru_logger.add(sink, level=level, **options)
+        return _sinks[key]
+
+
+def remove_sink(sink):
+    """移除通过 add_sink 注册的sink"""
+    key = sink if isinstance(sink, str) else id(sink)
+    with _lock:
+        handler_id = _sinks.pop(key, None)
+    if handler_id is not None:
+        loguru_logger.remove(handler_id)
+
+
+def set_log_level(level, tool=None):
+    """
+    设置工具日志级别
+
+    Args:
+        level: 级别名称或级别号；为 None 时清除指定工具的级别，恢复为默认级别
+        tool: 工具类名，为 None 时设置所有工具的默认级别
+    """
+    global _default_level_no
+    with _lock:
+        if tool is None:
+            _default_level_no = LEVELS[DEFAULT_LEVEL] if level is None else level_no(level)
+        elif level is None:
+            _tool_levels.pop(tool, None)
+        else:
+            _tool_levels[tool] = level_no(level)
+        loggers = list(_loggers)
+
+    for tool_logger in loggers:
+        tool_logger._refresh()
+
+
+class ToolLogger:
+    """
+    工具日志记录器
+
+    所有工具共享 loguru 的全局sink，不再为每个实例添加sink。调用时先比较级别号，
+    低于当前级别的日志直接返回；消息支持 {} 占位参数，只有在真正输出时才格式化。
+    包含敏感信息关键字的消息不会输出。
+    """
+
+    __slots__ = ('_tool', '_logger', '_level', '_level_no', '__weakref__')
+
+    def __init__(self, tool, logger=None, level=None):
+        self._tool = tool
+        self._logger = logger if logger is not None else loguru_logger.bind(tool=tool)
+        self._level = level
+        self._refresh()
+        with _lock:
+            _loggers.add(self)
+
+    def _refresh(self):
+        if self._level is not None:
+            self._level_no = self._level
+        else:
+            self._level_no = _tool_levels.get(self._tool, _default_level_no)
+
+    def set_level(self, level):
+        """设置当前实例的日志级别，为 None 时恢复为工具类或默认级别"""
+        self._level = None if level is None else level_no(level)
+        self._refresh()
+
+    def is_enabled_for(self, level):
+        """指定级别的日志是否会输出"""
+        return level_no(level) >= self._level_no
+
+    def bind(self, **kwargs):
+        """绑定额外的上下文字段，返回新的日志记录器"""
+        return ToolLogger(self._tool, self._logger.bind(**kwargs), self._level)
+
+    def _log(self, level, number, message, args, kwargs, exception=False):
+        if number < self._level_no:
+            return
+        message = str(message)
+        if args or kwargs:
+            message = message.format(*args, **kwargs)
+        if contains_sensitive(message):
+            return
+        # depth=2 使日志中的调用位置指向工具代码而不是本类
+        self._logger.opt(depth=2, exception=exception).log(level, message)
+
+    def trace(self, message, *args, **kwargs):
+        self._log('TRACE', 5, message, args, kwargs)
+
+    def debug(self, message, *args, **kwargs):
+        self._log('DEBUG', 10, message, args, kwargs)
+
+    def info(self, message, *args, **kwargs):
+        self._log('INFO', 20, message, args, kwargs)
+
+    def success(self, message, *args, **kwargs):
+        self._log('SUCCESS', 25, message, args, kwargs)
+
+    def warning(self, message, *args, **kwargs):
+        self._log('WARNING', 30, message, args, kwargs)
+
+    def error(self, message, *args, **kwargs):
+        self._log('ERROR', 40, message, args, kwargs)
+
+    def critical(self, message, *args, **kwargs):
+        self._log('CRITICAL', 50, message, args, kwargs)
+
+    def exception(self, message, *args, **kwargs):
+        self._log('ERROR', 40, message, args, kwargs, exception=True)
+
+    def log(self, level, message, *args, **kwargs):
+        number = level_no(level)
+        self._log(level if isinstance(level, int) else str(level).upper(), number, message, args, kwargs)
+
+
+def get_logger(tool):
+    """获取绑定了工具类名的日志记录器"""
+    return ToolLogger(tool)
@@ -0,0 +1,84 @@
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+
+def resolve_workers(workers):
+    """解析工作进程数，None 或 0 表示使用全部CPU核数"""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def imap_pool(func, items, workers=None, ordered=True, max_pending=None, cost=None, max_cost=None):
+    """
+    在进程池中对每个输入执行 func，逐个生成结果
+
+    同时提交的任务数受 max_pending 限制（默认为工作进程数的2倍），
+    已完成但尚未取走的结果不会无限堆积。workers 为1时在当前进程中顺序执行。
+    指定 cost 和 max_cost 时，已提交任务的估算占用之和不超过 max_cost（如按输入文件大小估算内存），
+    单个任务超过上限时等其他任务完成后单独运行。
+
+    Args:
+        func: 模块级函数（需可被pickle）
+        items: 输入参数的可迭代对象，每个元素为传给 func 的参数元组
+        workers: 工作进程数，None 表示使用全部CPU核数
+        ordered: 是否按输入顺序生成结果，False 时按完成顺序生成以获得最大吞吐
+        max_pending: 同时提交的任务数上限
+        cost: 估算任务占用的函数，参数与 func 相同（在当前进程中调用）
+        max_cost: 已提交任务的总占用上限
+
+    Yields:
+        func 的返回值
+    """
+    workers = resolve_workers(workers)
+    if workers == 1:
+        for args in items:
+            yield func(*args)
+        return
+
+    max_pending = max_pending or workers * 2
+    items = iter(items)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        costs = {}
+        # 因占用超限暂未提交的任务：(参数, 占用)
+        waiting = None
+        in_flight = 0
+
+        def submit_next():
+            nonlocal waiting, in_flight
+            if waiting is None:
+                args = next(items, None)
+                if args is None:
+                    return False
+                waiting = (args, cost(*args) if cost is not None else 0)
+
+            args, task_cost = waiting
+            if max_cost is not None and pending and in_flight + task_cost > max_cost:
+                return False
+            future = executor.submit(func, *args)
+            pending.append(future)
+            costs[future] = task_cost
+            in_flight += task_cost
+            waiting = None
+            return True
+
+        while len(pending) < max_pending and submit_next():
+            pass
+
+        while pending:
+            if ordered:
+                future = pending.popleft()
+                result = future.result()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                future = done.pop()
+                pending.remove(future)
+                result = future.result()
+            in_flight -= costs.pop(future)
+
+            while len(pending) < max_pending and submit_next():
+                pass
+            yield result
@@ -0,0 +1,185 @@
+# simpletoolkit/filesystems/batch_utils.py
+import fnmatch
+import os
+import re
+import tempfile
+
+from ..base.parallel import imap_pool
+from .fingerprint_utils import SIDECAR_SUFFIX, FileFingerprint
+
+# 批量比较自身使用的选项，不传给单个文件对的比较
+BATCH_OPTIONS = ('pattern', 'key_pattern', 'recursive', 'workers', 'max_pending', 'memory_budget',
+                 'skip_identical', 'output_dir')
+# 无法获取物理内存大小时使用的默认内存预算
+DEFAULT_BATCH_MEMORY_BUDGET = 2 * 1024 * 1024 * 1024
+# 差异输出文件的扩展名
+PAIR_OUTPUT_SUFFIX = '.jsonl'
+# 跳过相同文件时摘要缓存的默认目录（不写入被比较的目录）
+DEFAULT_FINGERPRINT_DIR = os.path.join(tempfile.gettempdir(), 'simpletoolkit_fingerprints')
+
+
+def default_memory_budget():
+    """默认的内存预算：物理内存的一半"""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // 2
+    except (AttributeError, ValueError, OSError):
+        return DEFAULT_BATCH_MEMORY_BUDGET
+
+
+def list_files(directory, pattern='*', recursive=False):
+    """
+    列出目录中匹配 pattern 的文件
+
+    Returns:
+        {相对路径（使用 / 分隔）: 文件路径}，不包含指纹索引等临时文件
+    """
+    files = {}
+    for root, dirs, names in os.walk(directory):
+        if not recursive:
+            dirs.clear()
+        dirs.sort()
+        for name in sorted(names):
+            if name.endswith((SIDECAR_SUFFIX, '.tmp')) or not fnmatch.fnmatch(name, pattern):
+                continue
+            path = os.path.join(root, name)
+            files[os.path.relpath(path, directory).replace(os.sep, '/')] = path
+    return files
+
+
+def pair_key(name, key_pattern=None):
+    """
+    计算文件的配对键
+
+    未指定 key_pattern 时为文件的相对路径；否则为正则表达式匹配到的名为 key 的分组
+    （没有该分组时为第一个分组，没有分组时为整个匹配），不匹配时返回 None。
+    例如 key_pattern=r'(.*)_\\d{8}\\.csv' 可将 orders_20240101.csv 与 orders_20240102.csv 配对。
+    """
+    if key_pattern is None:
+        return name
+    match = re.search(key_pattern, name)
+    if match is None:
+        return None
+    if 'key' in match.re.groupindex:
+        return match.group('key')
+    return match.group(1) if match.re.groups else match.group(0)
+
+
+def pair_files(dir1, dir2, pattern='*', key_pattern=None, recursive=False):
+    """
+    按配对键将两个目录中的文件配对
+
+    Returns:
+        (配对列表 [(键, 文件1, 文件2)], 只在目录1中的文件 [(键, 文件)], 只在目录2中的文件 [(键, 文件)])，
+        均按键排序
+    """
+    keyed = []
+    for directory in (dir1, dir2):
+        if not os.path.isdir(directory):
+            raise ValueError(f"目录不存在: {directory}")
+        files = {}
+        for name, path in list_files(directory, pattern, recursive).items():
+            key = pair_key(name, key_pattern)
+            if key is None:
+                continue
+            if key in files:
+                raise ValueError(f"目录 {directory} 中有多个文件的配对键相同: {key}")
+            files[key] = path
+        keyed.append(files)
+
+    files1, files2 = keyed
+    pairs = [(key, files1[key], files2[key]) for key in sorted(files1) if key in files2]
+    only1 = [(key, files1[key]) for key in sorted(files1) if key not in files2]
+    only2 = [(key, files2[key]) for key in sorted(files2) if key not in files1]
+    return pairs, only1, only2
+
+
+def files_identical(file1, file2, fingerprint_dir=None):
+    """
+    两个文件内容是否完全相同：先比较大小，大小一致时比较整文件摘要
+
+    摘要缓存在 fingerprint_dir（默认为临时目录下的 DEFAULT_FINGERPRINT_DIR）的指纹索引中，
+    不会在被比较的目录中留下索引文件。
+    """
+    if os.path.getsize(file1) != os.path.getsize(file2):
+        return False
+    fingerprint_dir = fingerprint_dir or DEFAULT_FINGERPRINT_DIR
+    return FileFingerprint(file1, fingerprint_dir).digest == FileFingerprint(file2, fingerprint_dir).digest
+
+
+def pair_output_file(output_dir, key):
+    """文件对的差异输出路径，键中的目录分隔符替换为 __"""
+    return os.path.join(output_dir, key.replace('/', '__') + PAIR_OUTPUT_SUFFIX)
+
+
+def iter_batch_compare(compare_pair, dir1, dir2, options, config, memory_factor):
+    """
+    配对两个目录中的文件并在进程池中比较，按完成顺序生成每个文件对的结果
+
+    只在一侧存在的文件最先生成，状态为 'unmatched'。同时运行的比较按
+    (文件1大小 + 文件2大小) * memory_factor 估算内存，总和不超过 memory_budget。
+
+    Args:
+        compare_pair: 模块级比较函数，参数为 (键, 文件1, 文件2, 比较选项, 是否跳过相同文件, 工具配置)
+        dir1: 第一个目录
+        dir2: 第二个目录
+        options: 批量比较选项，BATCH_OPTIONS 以外的选项传给单个文件对的比较
+        config: 工具配置，工作进程中按此配置创建工具
+        memory_factor: 文件大小到内存占用的估算系数
+    """
+    pairs, only1, only2 = pair_files(dir1, dir2, options.get('pattern', '*'), options.get('key_pattern'),
+                                     options.get('recursive', False))
+    for side, unmatched in (('dir1', only1), ('dir2', only2)):
+        for key, path in unmatched:
+            yield {
+                'name': key,
+                'file1': path if side == 'dir1' else None,
+                'file2': path if side == 'dir2' else None,
+                'status': 'unmatched',
+                'message': f'只存在于{side}',
+                'skipped': False,
+                'seconds': 0.0
+            }
+
+    compare_options = {name: value for name, value in options.items() if name not in BATCH_OPTIONS}
+    output_dir = options.get('output_dir')
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    def tasks():
+        for key, file1, file2 in pairs:
+            pair_options = compare_options
+            if output_dir:
+                pair_options = dict(compare_options, output_file=pair_output_file(output_dir, key))
+            yield key, file1, file2, pair_options, options.get('skip_identical', True), config
+
+    def cost(key, file1, file2, *args):
+        return (os.path.getsize(file1) + os.path.getsize(file2)) * memory_factor
+
+    memory_budget = options.get('memory_budget') or default_memory_budget()
+    yield from imap_pool(compare_pair, tasks(), options.get('workers'), ordered=False,
+                         max_pending=options.get('max_pending'), cost=cost, max_cost=memory_budget)
+
+
+def summarize(entries):
+    """统计各状态的文件对数量"""
+    summary = {'total': 0, 'same': 0, 'different': 0, 'error': 0, 'unmatched': 0, 'skipped': 0}
+    for entry in entries:
+        summary['total'] += 1
+        summary[entry['status']] = summary.get(entry['status'], 0) + 1
+        if entry.get('skipped'):
+            summary['skipped'] += 1
+    return summary
+
+
+def batch_result(entries):
+    """汇总批量比较的结果字典"""
+    summary = summarize(entries)
+    if summary['error']:
+        status = 'error'
+    elif summary['different'] or summary['unmatched']:
+        status = 'different'
+    else:
+        status = 'same'
+    message = (f"共 {summary['total']} 对：相同 {summary['same']}（其中跳过 {summary['skipped']}），"
+               f"不同 {summary['different']}，出错 {summary['error']}，未配对 {summary['unmatched']}")
+    return {'status': status, 'message': message, 'summary': summary, 'pairs': entries}
@@ -0,0 +1,473 @@
+# simpletoolkit/filesystems/compare_utils.py
+import os
+
+import numpy as np
+import pandas as pd
+
+# 差异结果中两侧取值列的默认名称
+DEFAULT_VALUE_COLUMNS = ('file1_value', 'file2_value')
+# 差异输出每批写入的单元格数
+DEFAULT_BATCH_SIZE = 50000
+
+
+class DiffResult:
+    """
+    列式差异结果
+
+    按键列比较时包含 key、column 和两侧取值列，按位置比较时以 row 代替 key。
+    差异以整列数组保存，只有调用 to_records() 时才转换为逐条字典的列表格式。
+    """
+
+    def __init__(self, frame, keyed=True, row_count=None, value_columns=DEFAULT_VALUE_COLUMNS):
+        self.frame = frame
+        self.keyed = keyed
+        self.value_columns = tuple(value_columns)
+        # 差异行数（按键列比较时为存在差异的键数，按位置比较时等于差异单元格数）
+        self.row_count = len(frame) if row_count is None else row_count
+
+    def __len__(self):
+        return self.row_count if self.keyed else len(self.frame)
+
+    @property
+    def cell_count(self):
+        """差异单元格数"""
+        return len(self.frame)
+
+    @classmethod
+    def empty(cls, keyed=True, value_columns=DEFAULT_VALUE_COLUMNS):
+        """构建空的差异结果"""
+        columns = ['key' if keyed else 'row', 'column', *value_columns]
+        return cls(pd.DataFrame({col: pd.Series(dtype=object) for col in columns}),
+                   keyed=keyed, row_count=0, value_columns=value_columns)
+
+    @classmethod
+    def concat(cls, results, keyed=True, value_columns=DEFAULT_VALUE_COLUMNS):
+        """合并多个差异结果（各结果之间的键互不重叠）"""
+        results = [result for result in results if result.cell_count]
+        if not results:
+            return cls.empty(keyed=keyed, value_columns=value_columns)
+        frame = pd.concat([result.frame for result in results], ignore_index=True)
+        return cls(frame, keyed=keyed, row_count=sum(result.row_count for result in results),
+                   value_columns=value_columns)
+
+    def iter_batches(self, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        按单元格数切分为多个较小的差异结果
+
+        按键列比较时只在行（键）的边界处切分，同一键的差异总在同一批中，各批 row_count 之和等于总行数；
+        单个键的差异单元格数超过 batch_size 时该批只包含这一个键。
+        """
+        if not self.keyed:
+            for start in range(0, self.cell_count, batch_size):
+                yield DiffResult(self.frame.iloc[start:start + batch_size], keyed=False,
+                                 value_columns=self.value_columns)
+            return
+
+        # 同一键的差异连续存放，键编码变化的位置即为各行的起点
+        codes, _ = pd.factorize(self.frame['key'], use_na_sentinel=False)
+        row_starts = np.flatnonzero(np.diff(codes, prepend=-1) != 0)
+        boundaries = np.append(row_starts, self.cell_count)
+
+        position = 0
+        while position < len(row_starts):
+            start = boundaries[position]
+            # 不超过 batch_size 的最后一个行边界，至少包含一行
+            end_position = max(position + 1, np.searchsorted(boundaries, start + batch_size, side='right') - 1)
+            frame = self.frame.iloc[start:boundaries[end_position]]
+            yield DiffResult(frame, keyed=True, row_count=end_position - position, value_columns=self.value_columns)
+            position = end_position
+
+    def to_records(self):
+        """转换为原有的逐条字典列表格式"""
+        left_name, right_name = self.value_columns
+        columns = self.frame['column'].tolist()
+        left_values = self.frame[left_name].tolist()
+        right_values = self.frame[right_name].tolist()
+
+        if not self.keyed:
+            return [
+                {'row': row, 'column': col, left_name: left, right_name: right}
+                for row, col, left, right in zip(self.frame['row'].tolist(), columns, left_values, right_values)
+            ]
+
+        # 同一键的差异在结果中连续存放，按键编码的变化切分为行
+        keys = self.frame['key'].tolist()
+        codes, _ = pd.factorize(self.frame['key'], use_na_sentinel=False)
+        records = []
+        previous_code = None
+        for code, key, col, left, right in zip(codes, keys, columns, left_values, right_values):
+            if code != previous_code:
+                row_diff = {'key': key, 'differences': {}}
+                records.append(row_diff)
+                previous_code = code
+            row_diff['differences'][col] = {left_name: left, right_name: right}
+        return records
+
+
+def key_text(df):
+    """
+    将键列转换为规范的文本形式，用于计算分区哈希
+
+    分块读取时每块单独推断类型，同一列在含空值的块中为浮点数、在其他块中为整数。
+    整数值的浮点数按整数格式转换（1.0 -> '1'），使相同的键在不同块和不同文件中文本一致。
+    """
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_float_dtype(series.dtype):
+            values = series.to_numpy(dtype=float, na_value=np.nan)
+            integral = np.isfinite(values) & (values == np.floor(values)) & (np.abs(values) < 2 ** 63)
+            text = series.astype(str).to_numpy(dtype=object)
+            text[integral] = values[integral].astype(np.int64).astype(str)
+            text[np.isnan(values)] = ''
+            columns[col] = text
+        else:
+            columns[col] = series.astype(str).where(series.notna(), '').to_numpy(dtype=object)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def align_dtypes(df1, df2):
+    """
+    将两个DataFrame中类型不同的同名列（包括索引）转换为共同类型
+
+    分块读取的两个文件可能对同一列推断出不同类型（如一侧为整数、另一侧为浮点数），
+    转换为两者合并时的类型，与整体读入内存时一致。
+    """
+    for col in df1.columns.intersection(df2.columns):
+        if df1[col].dtype != df2[col].dtype:
+            common = _common_dtype(df1[col], df2[col])
+            df1[col] = _cast(df1[col], common)
+            df2[col] = _cast(df2[col], common)
+
+    index1, index2 = df1.index, df2.index
+    if isinstance(index1, pd.MultiIndex) and isinstance(index2, pd.MultiIndex):
+        levels1, levels2 = [], []
+        for level in range(index1.nlevels):
+            values1 = index1.get_level_values(level).to_series()
+            values2 = index2.get_level_values(level).to_series()
+            if values1.dtype != values2.dtype:
+                common = _common_dtype(values1, values2)
+                values1, values2 = _cast(values1, common), _cast(values2, common)
+            levels1.append(values1.to_numpy())
+            levels2.append(values2.to_numpy())
+        df1.index = pd.MultiIndex.from_arrays(levels1, names=index1.names)
+        df2.index = pd.MultiIndex.from_arrays(levels2, names=index2.names)
+    elif index1.dtype != index2.dtype:
+        common = _common_dtype(index1.to_series(), index2.to_series())
+        df1.index = pd.Index(_cast(index1.to_series(), common), name=index1.name)
+        df2.index = pd.Index(_cast(index2.to_series(), common), name=index2.name)
+    return df1, df2
+
+
+def _common_dtype(series1, series2):
+    return pd.concat([series1.iloc[:0], series2.iloc[:0]]).dtype
+
+
+def _cast(series, dtype):
+    try:
+        return series.astype(dtype)
+    except (TypeError, ValueError):
+        return series.astype(object)
+
+
+def not_equal_mask(series1, series2):
+    """逐元素比较两列，返回布尔数组；两侧均为缺失值的单元格视为相同，缺失值与非缺失值视为不同"""
+    if isinstance(series1.dtype, pd.CategoricalDtype) or isinstance(series2.dtype, pd.CategoricalDtype):
+        # 类别不同的分类列不能直接比较，按取值比较
+        if series1.dtype != series2.dtype:
+            series1 = series1.astype(object)
+            series2 = series2.astype(object)
+    try:
+        mask = series1 != series2
+    except (TypeError, NotImplementedError):
+        # Arrow类型之间没有定义比较时（如文本与数值），按取值比较
+        mask = series1.astype(object) != series2.astype(object)
+    if mask.dtype != bool:
+        mask = mask.fillna(True).astype(bool)
+    return mask.to_numpy() & ~(series1.isna().to_numpy() & series2.isna().to_numpy())
+
+
+def _cell_values(series, rows):
+    """取出指定行的值；缺失值（NaN、None、pd.NA）统一为 NaN，使不同解析引擎的差异结果一致"""
+    return series.iloc[rows].to_numpy(dtype=object, na_value=np.nan)
+
+
+def _changed_cells(df1, df2, one_sided=None):
+    """
+    按列计算差异掩码，返回按 (行位置, 列位置) 排序的差异坐标及两侧取值
+
+    one_sided 为只存在于一侧的行的布尔数组，这些行的所有列都视为差异（包括取值为空的列）。
+    """
+    row_parts, col_parts, left_parts, right_parts = [], [], [], []
+    for col_pos in range(df1.shape[1]):
+        series1 = df1.iloc[:, col_pos]
+        series2 = df2.iloc[:, col_pos]
+        mask = not_equal_mask(series1, series2)
+        if one_sided is not None:
+            mask |= one_sided
+        rows = np.flatnonzero(mask)
+        if rows.size:
+            row_parts.append(rows)
+            col_parts.append(np.full(rows.size, col_pos))
+            left_parts.append(_cell_values(series1, rows))
+            right_parts.append(_cell_values(series2, rows))
+
+    if not row_parts:
+        return None
+
+    rows = np.concatenate(row_parts)
+    cols = np.concatenate(col_parts)
+    order = np.lexsort((cols, rows))
+    return (rows[order], cols[order],
+            np.concatenate(left_parts)[order], np.concatenate(right_parts)[order])
+
+
+def diff_keyed(df1, df2, value_columns=DEFAULT_VALUE_COLUMNS):
+    """
+    比较两个已按键列设置索引的DataFrame
+
+    Args:
+        df1: 第一个DataFrame，索引为键列
+        df2: 第二个DataFrame，索引为键列
+        value_columns: 结果中两侧取值列的名称
+
+    Returns:
+        DiffResult 列式差异结果
+    """
+    # 对齐索引，只存在于一侧的行在另一侧填充为缺失值
+    index1, index2 = df1.index, df2.index
+    df1, df2 = df1.align(df2, join='outer', fill_value=None)
+    one_sided = ~(df1.index.isin(index1) & df1.index.isin(index2))
+
+    changed = _changed_cells(df1, df2, one_sided)
+    if changed is None:
+        return DiffResult.empty(keyed=True, value_columns=value_columns)
+
+    rows, cols, left, right = changed
+    keys = df1.index.take(rows)
+    if isinstance(keys, pd.MultiIndex):
+        keys = keys.to_flat_index()
+
+    left_name, right_name = value_columns
+    frame = pd.DataFrame({
+        'key': keys.to_numpy(),
+        'column': df1.columns.to_numpy()[cols],
+        left_name: left,
+        right_name: right
+    })
+    return DiffResult(frame, keyed=True, row_count=np.unique(rows).size, value_columns=value_columns)
+
+
+def diff_positional(df1, df2, value_columns=DEFAULT_VALUE_COLUMNS):
+    """
+    按行位置比较两个DataFrame
+
+    Args:
+        df1: 第一个DataFrame
+        df2: 第二个DataFrame，列集合需与df1一致
+        value_columns: 结果中两侧取值列的名称
+
+    Returns:
+        DiffResult 列式差异结果
+    """
+    if len(df1) != len(df2):
+        raise ValueError(f"行数不一致({len(df1)} != {len(df2)})，无法按位置比较，请指定key_columns")
+
+    df1 = df1.reset_index(drop=True)
+    df2 = df2.reset_index(drop=True)[list(df1.columns)]
+
+    changed = _changed_cells(df1, df2)
+    if changed is None:
+        return DiffResult.empty(keyed=False, value_columns=value_columns)
+
+    rows, cols, left, right = changed
+    left_name, right_name = value_columns
+    frame = pd.DataFrame({
+        'row': rows,
+        'column': df1.columns.to_numpy()[cols],
+        left_name: left,
+        right_name: right
+    })
+    return DiffResult(frame, keyed=False, value_columns=value_columns)
+
+
+def format_differences(diff, result_format='records'):
+    """
+    按指定格式输出差异
+
+    Args:
+        diff: DiffResult 列式差异结果
+        result_format: 'records' 返回逐条字典列表（默认），'columnar' 直接返回 DiffResult
+    """
+    if result_format == 'columnar':
+        return diff
+    if result_format == 'records':
+        return diff.to_records()
+    raise ValueError(f"不支持的结果格式: {result_format}")
+
+
+def collect_differences(diffs, keyed=True, value_columns=DEFAULT_VALUE_COLUMNS, **options):
+    """
+    汇总差异块，写入输出文件或合并为内存中的结果
+
+    Args:
+        diffs: DiffResult 的可迭代对象
+        keyed: 是否为按键列比较
+        value_columns: 结果中两侧取值列的名称
+        **options: 可选参数
+            output_file: 差异输出文件路径，指定后差异分批写入文件，不在内存中保留
+            output_format: 输出格式（jsonl/csv/parquet），默认根据扩展名判断
+            batch_size: 每批写入的单元格数，默认50000
+            result_format: 未指定输出文件时的差异格式，见 format_differences
+
+    Returns:
+        (差异数, 差异内容)：差异数按键列比较时为行数，否则为单元格数；
+        写入输出文件时差异内容为 None
+    """
+    output_file = options.get('output_file')
+
+    if output_file:
+        columns = ['key' if keyed else 'row', 'column', *value_columns]
+        with open_diff_sink(output_file, options.get('output_format'),
+                            options.get('batch_size', DEFAULT_BATCH_SIZE), columns) as sink:
+            for diff in diffs:
+                sink.write(diff)
+        return sink.count, None
+
+    diff = DiffResult.concat(list(diffs), keyed=keyed, value_columns=value_columns)
+    return len(diff), format_differences(diff, options.get('result_format', 'records'))
+
+
+class DiffSink:
+    """差异输出的基类：差异分批写入文件，内存中只保留计数"""
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE, columns=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.columns = columns
+        # 差异数（按键列比较时为行数，否则为单元格数）
+        self.count = 0
+        self.cell_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, diff):
+        """写入一个差异结果"""
+        self.count += len(diff)
+        self.cell_count += diff.cell_count
+        for start in range(0, diff.cell_count, self.batch_size):
+            self._write_frame(diff.frame.iloc[start:start + self.batch_size])
+
+    def _write_frame(self, frame):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class JsonlDiffSink(DiffSink):
+    """以JSON Lines格式输出差异，每个差异单元格一行"""
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE, columns=None):
+        super().__init__(path, batch_size, columns)
+        self._handle = open(path, 'w', encoding='utf-8')
+
+    def _write_frame(self, frame):
+        text = frame.to_json(orient='records', lines=True, force_ascii=False,
+                             date_format='iso', default_handler=str)
+        self._handle.write(text if text.endswith('\n') else text + '\n')
+        self._handle.flush()
+
+    def close(self):
+        self._handle.close()
+
+
+class CsvDiffSink(DiffSink):
+    """以CSV格式输出差异，每个差异单元格一行"""
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE, columns=None):
+        super().__init__(path, batch_size, columns)
+        self._handle = open(path, 'w', newline='', encoding='utf-8')
+        self._header_written = False
+
+    def _write_frame(self, frame):
+        frame.to_csv(self._handle, index=False, header=not self._header_written)
+        self._header_written = True
+        self._handle.flush()
+
+    def close(self):
+        self._handle.close()
+
+
+class ParquetDiffSink(DiffSink):
+    """以Parquet格式输出差异，键和取值统一保存为文本（需要安装pyarrow）"""
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE, columns=None):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("输出Parquet格式需要安装pyarrow")
+
+        super().__init__(path, batch_size, columns)
+        self._pa = pa
+        self._pq = pq
+        self._writer = None
+
+    @staticmethod
+    def _to_text(series):
+        return series.map(lambda value: None if _is_missing(value) else str(value)).astype(object)
+
+    def _write_frame(self, frame):
+        frame = frame.apply(self._to_text)
+        table = self._pa.Table.from_pandas(frame, preserve_index=False,
+                                           schema=self._schema(frame.columns))
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+
+    def _schema(self, columns):
+        return self._pa.schema([(col, self._pa.string()) for col in columns])
+
+    def close(self):
+        if self._writer is None:
+            # 没有差异时也输出一个只有表结构的空文件
+            self._writer = self._pq.ParquetWriter(self.path, self._schema(self.columns or []))
+        self._writer.close()
+
+
+def _is_missing(value):
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+# 输出格式与差异输出类的对应关系
+DIFF_SINKS = {
+    'jsonl': JsonlDiffSink,
+    'csv': CsvDiffSink,
+    'parquet': ParquetDiffSink
+}
+
+# 文件扩展名与输出格式的对应关系
+DIFF_SINK_EXTENSIONS = {
+    '.jsonl': 'jsonl',
+    '.json': 'jsonl',
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet'
+}
+
+
+def open_diff_sink(path, output_format=None, batch_size=DEFAULT_BATCH_SIZE, columns=None):
+    """根据输出格式（默认按文件扩展名判断）创建差异输出"""
+    if output_format is None:
+        output_format = DIFF_SINK_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if output_format not in DIFF_SINKS:
+        raise ValueError(f"不支持的差异输出格式: {output_format or path}")
+    return DIFF_SINKS[output_format](path, batch_size, columns)
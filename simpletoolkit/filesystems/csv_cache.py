@@ -0,0 +1,185 @@
+# simpletoolkit/filesystems/csv_cache.py
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .fingerprint_utils import file_digest
+from .read_utils import read_csv_frame
+
+# 列式缓存格式版本，格式变化时旧缓存自动失效
+CACHE_VERSION = 2
+# 缓存目录的默认字节上限
+DEFAULT_CSV_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# 默认缓存目录
+DEFAULT_CSV_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'simpletoolkit_csv_cache')
+# 缓存格式 -> 文件扩展名
+CACHE_FORMATS = {'feather': '.feather', 'parquet': '.parquet'}
+# 缓存键的计算方式：stat 按文件路径、大小和修改时间；content 按文件内容摘要
+CACHE_KEY_MODES = ('stat', 'content')
+# 淘汰策略：lru 按最近访问时间；fifo 按写入时间
+CACHE_POLICIES = ('lru', 'fifo')
+
+
+class ColumnarCache:
+    """
+    CSV文件的列式缓存
+
+    首次读取CSV时将解析结果写为 Feather 或 Parquet 文件，之后相同文件、相同读取参数的读取
+    直接加载列式文件（内存映射读取），不再解析文本。缓存目录总大小超过上限时按淘汰策略
+    删除最旧的缓存文件。需要安装pyarrow。
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_CSV_CACHE_MAX_BYTES, cache_format='feather',
+                 key_mode='stat', policy='lru'):
+        if cache_format not in CACHE_FORMATS:
+            raise ValueError(f"不支持的缓存格式: {cache_format}")
+        if key_mode not in CACHE_KEY_MODES:
+            raise ValueError(f"不支持的缓存键方式: {key_mode}")
+        if policy not in CACHE_POLICIES:
+            raise ValueError(f"不支持的淘汰策略: {policy}")
+
+        self.cache_dir = cache_dir or DEFAULT_CSV_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.cache_format = cache_format
+        self.key_mode = key_mode
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+
+    def cache_path(self, path, read_options):
+        """计算CSV文件在指定读取参数下对应的缓存文件路径"""
+        if self.key_mode == 'content':
+            source = file_digest(path)
+        else:
+            stat = os.stat(path)
+            source = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        options = sorted((name, repr(value)) for name, value in read_options.items())
+        key = hashlib.sha1(repr((CACHE_VERSION, source, options)).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key + CACHE_FORMATS[self.cache_format])
+
+    def read_csv(self, path, engine='c', **read_options):
+        """
+        读取CSV文件，优先加载缓存
+
+        不同解析引擎得到的类型不同，分别缓存；pyarrow 引擎的缓存读回后仍为Arrow类型。
+
+        Returns:
+            (DataFrame, 是否命中缓存)
+        """
+        cache_path = self.cache_path(path, dict(read_options, engine=engine))
+        if os.path.exists(cache_path):
+            df = self._load(cache_path, engine)
+            if df is not None:
+                self.hits += 1
+                if self.policy == 'lru':
+                    self._touch(cache_path)
+                return df, True
+
+        self.misses += 1
+        df = read_csv_frame(path, engine, **read_options)
+        if self._save(cache_path, df):
+            self.evict()
+        return df, False
+
+    def evict(self):
+        """缓存目录超过字节上限时，按淘汰策略删除最旧的缓存文件，返回删除的文件数"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(tuple(CACHE_FORMATS.values())):
+                continue
+            file_path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, file_path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, file_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(file_path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        """删除全部缓存文件"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(tuple(CACHE_FORMATS.values())):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def _save(self, cache_path, df):
+        """原子地写入缓存文件，无法写为列式格式（如列中混合多种类型）时返回False"""
+        try:
+            import pyarrow as pa
+            import pyarrow.feather as feather
+            import pyarrow.parquet as pq
+        except ImportError:
+            return False
+
+        temp_path = cache_path + '.tmp'
+        try:
+            table = pa.Table.from_pandas(df)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if self.cache_format == 'feather':
+                # 不压缩，读取时可以直接内存映射
+                feather.write_feather(table, temp_path, compression='uncompressed')
+            else:
+                pq.write_table(table, temp_path)
+            os.replace(temp_path, cache_path)
+        except (OSError, ValueError, TypeError, NotImplementedError, pa.ArrowException):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return False
+        return True
+
+    def _load(self, cache_path, engine='c'):
+        try:
+            import pyarrow as pa
+            import pyarrow.feather as feather
+            import pyarrow.parquet as pq
+        except ImportError:
+            return None
+
+        try:
+            if self.cache_format == 'feather':
+                table = feather.read_table(cache_path, memory_map=True)
+            else:
+                table = pq.read_table(cache_path, memory_map=True)
+            if engine == 'pyarrow':
+                return table.to_pandas(types_mapper=pd.ArrowDtype)
+            df = table.to_pandas()
+        except (OSError, ValueError, pa.ArrowException):
+            return None
+        return self._restore_missing(df)
+
+    @staticmethod
+    def _restore_missing(df):
+        """文本列中的缺失值读回后为 None，恢复为与 read_csv 一致的 NaN"""
+        for col in df.columns[df.dtypes == object]:
+            values = df[col].to_numpy(dtype=object, copy=True)
+            values[pd.isna(values)] = np.nan
+            df[col] = values
+        return df
+
+    @staticmethod
+    def _touch(cache_path):
+        try:
+            os.utime(cache_path)
+        except OSError:
+            pass
@@ -1,11 +1,174 @@
 # simpletoolkit/filesystems/csv_tools.py
 import csv
+import math
+import os
+import pickle
+import tempfile
+import time
+
 import pandas as pd
 from ..base.base_tool import BaseTool
+from ..base.parallel import imap_pool, resolve_workers
+from .batch_utils import batch_result, files_identical, iter_batch_compare
+from .compare_utils import (DEFAULT_BATCH_SIZE, DEFAULT_VALUE_COLUMNS, DiffResult, collect_differences,
+                            align_dtypes, diff_keyed, diff_positional, key_text)
+from .csv_cache import DEFAULT_CSV_CACHE_MAX_BYTES, ColumnarCache
+from .excel_stream import EXCEL_MAX_ROWS, StreamingWorkbookWriter, frame_rows
+from .fingerprint_utils import (FileFingerprint, build_row_hashes, changed_rows, iter_csv_records,
+                                load_snapshot, read_changed_rows, save_snapshot)
+from .read_utils import backend_options, check_parser_engine, read_csv_frame, select_columns
+from .sample_utils import DEFAULT_CONFIDENCE, DEFAULT_SAMPLE_RATE, estimate_difference, sample_row_hashes
+from .sort_utils import DEFAULT_SORT_MEMORY_BUDGET, external_sort, make_sort_key, merge_runs
+
+# 分区比较模式的默认内存预算（字节）
+DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024
+# CSV文本加载为DataFrame后的内存膨胀系数（经验值）
+CSV_MEMORY_FACTOR = 4
+# 分块读取的默认行数
+DEFAULT_CHUNK_SIZE = 100000
+# 按字节拷贝时的缓冲区大小
+COPY_BUFFER_SIZE = 8 * 1024 * 1024
+
+
+def _copy_byte_range(infile, outfile, offset, count):
+    """将输入文件从 offset 开始的 count 个字节追加写入输出文件，优先使用零拷贝系统调用"""
+    in_fd = infile.fileno()
+    out_fd = outfile.fileno()
+
+    for copy in (getattr(os, 'copy_file_range', None), getattr(os, 'sendfile', None)):
+        if copy is None:
+            continue
+        try:
+            while count > 0:
+                if copy is os.sendfile:
+                    copied = os.sendfile(out_fd, in_fd, offset, count)
+                else:
+                    copied = os.copy_file_range(in_fd, out_fd, count, offset)
+                if copied == 0:
+                    break
+                offset += copied
+                count -= copied
+            if count == 0:
+                return
+        except OSError:
+            # 文件系统不支持时回退到下一种方式
+            continue
+
+    infile.seek(offset)
+    while count > 0:
+        block = infile.read(min(COPY_BUFFER_SIZE, count))
+        if not block:
+            break
+        outfile.write(block)
+        count -= len(block)
+
+
+def _write_csv_body(file_path, out_path, delimiter, encoding, sort_options=None):
+    """
+    解析CSV文件除表头外的数据行，重新序列化写入临时文件（在工作进程中执行）
+
+    指定 sort_options 时按 (表头, sort_by, ascending, 内存预算, 临时目录) 外部排序后写出，
+    结果为 utf-8 编码的有序段，供主进程多路归并；否则按输出编码写出，供主进程按字节拼接。
+    只返回文件路径，数据不经进程间通信传回。
+    """
+    with open(file_path, 'r', newline='', encoding=encoding) as infile:
+        reader = csv.reader(infile, delimiter=delimiter)
+        # 跳过表头
+        next(reader, None)
+        if sort_options is None:
+            with open(out_path, 'w', newline='', encoding=encoding) as outfile:
+                csv.writer(outfile, delimiter=delimiter).writerows(reader)
+        else:
+            headers, sort_by, ascending, memory_budget, temp_dir = sort_options
+            rows = external_sort(reader, make_sort_key(headers, sort_by, ascending), memory_budget, temp_dir)
+            with open(out_path, 'w', newline='', encoding='utf-8') as outfile:
+                csv.writer(outfile, delimiter=delimiter).writerows(rows)
+    return file_path, out_path
+
+
+def _compare_csv_pair(name, file1, file2, options, skip_identical, config):
+    """比较目录中的一个文件对（在工作进程中执行），返回结果条目"""
+    entry = {'name': name, 'file1': file1, 'file2': file2, 'skipped': False}
+    start = time.perf_counter()
+    try:
+        if skip_identical and files_identical(file1, file2, options.get('fingerprint_dir')):
+            entry.update(status='same', message='文件摘要一致，跳过比较', skipped=True)
+        else:
+            tool = CSVTool()
+            tool.configure(**config)
+            result = tool.compare_csv(file1, file2, **options)
+            entry.update(status=result['status'], message=result['message'], result=result)
+    except Exception as e:
+        entry.update(status='error', message=str(e), error=str(e))
+
+    entry['seconds'] = round(time.perf_counter() - start, 3)
+    return entry
 
 
 class CSVTool(BaseTool):
-    """CSV文件处理工具"""
+    """
+    CSV文件处理工具
+
+    可通过 configure 启用列式缓存，重复读取的CSV文件只解析一次（需要安装pyarrow）：
+        csv_cache: 是否启用列式缓存，默认为False（单次调用可用 use_cache 选项覆盖）
+        csv_cache_dir: 缓存目录，默认为系统临时目录下的 simpletoolkit_csv_cache
+        csv_cache_max_bytes: 缓存目录的字节上限，默认2GB
+        csv_cache_format: 缓存格式，'feather'（默认，内存映射读取）或'parquet'（体积更小）
+        csv_cache_key: 缓存键的计算方式，'stat'（默认，路径+大小+修改时间）或'content'（内容摘要）
+        csv_cache_policy: 淘汰策略，'lru'（默认，按最近访问时间）或'fifo'（按写入时间）
+
+    解析引擎同样可通过 configure（或 configure_global）设置，单次调用可用 parser_engine 选项覆盖：
+        parser_engine: 'c'（默认，pandas默认解析器）或'pyarrow'（多线程Arrow解析器，结果使用Arrow类型，
+            需要安装pyarrow）。分块读取（分区比较、stream 转换）仍由默认解析器解析，但同样使用Arrow类型；
+            日期列与默认引擎一样保留为文本，比较结果中的缺失值统一为 NaN；浮点数按精确的往返精度解析，
+            与默认解析器的结果可能在最后一位有差别
+    """
+
+    # 缓存相关的配置项，变化时重建缓存
+    CACHE_OPTIONS = ('csv_cache_dir', 'csv_cache_max_bytes', 'csv_cache_format', 'csv_cache_key', 'csv_cache_policy')
+
+    def __init__(self):
+        super().__init__()
+        self._csv_cache = None
+
+    def configure(self, **kwargs):
+        """配置工具参数"""
+        super().configure(**kwargs)
+        if any(option in kwargs for option in self.CACHE_OPTIONS):
+            self._csv_cache = None
+        return self
+
+    @property
+    def csv_cache(self):
+        """CSV列式缓存（首次访问时按配置创建）"""
+        if self._csv_cache is None:
+            self._csv_cache = ColumnarCache(
+                cache_dir=self._config.get('csv_cache_dir'),
+                max_bytes=self._config.get('csv_cache_max_bytes', DEFAULT_CSV_CACHE_MAX_BYTES),
+                cache_format=self._config.get('csv_cache_format', 'feather'),
+                key_mode=self._config.get('csv_cache_key', 'stat'),
+                policy=self._config.get('csv_cache_policy', 'lru')
+            )
+        return self._csv_cache
+
+    def clear_cache(self):
+        """删除全部列式缓存文件"""
+        self.csv_cache.clear()
+
+    def _parser_engine(self, options):
+        """单次调用的解析引擎，默认取 configure 中的 parser_engine"""
+        return check_parser_engine(options.get('parser_engine', self._config.get('parser_engine', 'c')))
+
+    def _read_csv(self, file_path, options, **read_options):
+        """读取整个CSV文件，启用列式缓存时优先加载缓存"""
+        engine = self._parser_engine(options)
+        if not options.get('use_cache', self._config.get('csv_cache', False)):
+            return read_csv_frame(file_path, engine, logger=self._logger, **read_options)
+
+        df, hit = self.csv_cache.read_csv(file_path, engine=engine, **read_options)
+        if hit:
+            self._logger.debug("列式缓存命中: {}", file_path)
+        return df
 
     def compare_csv(self, file1, file2, **options):
         """
@@ -16,125 +179,661 @@ class CSVTool(BaseTool):
             file2: 第二个CSV文件路径
             **options: 可选参数
                 key_columns: 用于匹配行的键列，列表类型
-                ignore_columns: 忽略比较的列，列表类型
+                ignore_columns: 忽略比较的列，列表类型（不会被读取）
+                compare_columns: 只比较这些列，列表类型，默认为全部；键列自动包含，其余列不会被读取
+                dtype: 列类型映射，如 {'id': 'int32', 'city': 'category', 'name': 'string[pyarrow]'}，
+                    解析时直接使用指定类型，减少内存占用（归并模式按原始文本比较，不使用此参数）
                 delimiter: CSV分隔符，默认为逗号
                 encoding: 文件编码，默认为utf-8
+                mode: 比较模式，默认为'memory'（整体读入内存），各模式中两侧均为空的单元格都视为相同；
+                    'partitioned' 为按键列哈希分区的外存比较，需指定key_columns；
+                    'sorted' 为针对已按键列排序文件的归并比较，内存占用恒定，需指定key_columns；
+                    'approximate' 为按键哈希抽样的近似比较，需指定key_columns，不返回具体差异，
+                    只返回差异率的估计及置信区间，适合监控两个大文件是否基本一致（需要安装pyarrow）
+                sample_rate: 近似模式的抽样比例，默认0.01；抽样由键的哈希决定，两个文件抽中相同的键
+                confidence: 近似模式置信区间的置信水平，默认0.95
+                sample_seed: 近似模式的抽样种子（整数），不同种子抽中不同的键，默认使用固定的哈希密钥
+                memory_budget: 分区模式下单个分区对的内存预算（字节），默认512MB
+                num_partitions: 分区模式下的分区数，默认根据文件大小和内存预算计算
+                chunk_size: 分区模式下分块读取的行数，默认100000
+                temp_dir: 分区模式下临时分区文件的存放目录，默认为系统临时目录
+                verify_sorted: 归并模式下是否在遍历时校验键列有序且不重复，默认为True
+                key_type: 归并模式下键列的排序方式，'str'（默认，按文本）或'numeric'（按数值）
+                fingerprint: 是否使用文件指纹，默认为False；整文件摘要一致时不解析文件直接判定相同，
+                    内存模式按键列比较时只重新解析行哈希不同的行，结果与不使用指纹时一致
+                fingerprint_dir: 指纹索引文件的存放目录，默认与CSV文件放在同一目录
+                result_format: 差异的输出格式，默认为'records'（逐条字典列表）；
+                    'columnar' 返回列式的 DiffResult，可按需调用 to_records() 转换
+                output_file: 差异输出文件路径（.jsonl/.csv/.parquet），指定后差异分批写入文件，
+                    结果中只保留差异计数；只有分区模式和归并模式的内存占用有上限，
+                    内存模式仍先在内存中得到完整的差异结果再分批写出
+                output_format: 差异输出格式（jsonl/csv/parquet），默认根据扩展名判断
+                batch_size: 差异每批写入的单元格数，默认50000
+                use_cache: 内存模式是否使用列式缓存，默认取 configure 中的 csv_cache
+                parser_engine: CSV解析引擎，默认取 configure 中的 parser_engine（归并模式按原始文本比较，不使用此参数）
 
         Returns:
             包含差异信息的字典
         """
+        self._logger.info(f"开始比较CSV文件: {file1} 和 {file2}")
+
+        try:
+            if options.get('mode') == 'approximate':
+                return self._compare_approximate(file1, file2, **options)
+
+            keyed, diffs, error = self._csv_diffs(file1, file2, **options)
+            if error:
+                return error
+
+            count, differences = collect_differences(diffs, keyed, **options)
+            return self._compare_result(keyed, count, differences, options.get('output_file'))
+
+        except Exception as e:
+            self._logger.error(f"CSV比较失败: {str(e)}")
+            raise
+
+    def iter_compare_csv(self, file1, file2, **options):
+        """
+        逐批生成两个CSV文件的差异，下游可以在比较完成前开始处理
+
+        Args:
+            file1: 第一个CSV文件路径
+            file2: 第二个CSV文件路径
+            **options: 可选参数，同 compare_csv
+
+        分区模式和归并模式边比较边生成差异，内存占用有上限；内存模式（以及指纹模式）先得到完整的差异结果，
+        再切分为批次，内存占用与差异总量成正比。
+
+        Yields:
+            DiffResult 列式差异结果，每批最多 batch_size 个差异单元格（单个键的差异超过时除外），
+            同一键的差异不会跨批
+        """
+        batch_size = options.get('batch_size', DEFAULT_BATCH_SIZE)
+
+        self._logger.info(f"开始逐批比较CSV文件: {file1} 和 {file2}")
+
+        keyed, diffs, error = self._csv_diffs(file1, file2, **options)
+        if error:
+            raise ValueError(f"列不一致: 仅在file1中 {error['only_in_file1']}，仅在file2中 {error['only_in_file2']}")
+
+        for diff in diffs:
+            yield from diff.iter_batches(batch_size)
+
+    def compare_directories(self, dir1, dir2, **options):
+        """
+        批量比较两个目录中的CSV文件（如昨天与今天的导出目录）
+
+        文件按名称（或 key_pattern 提取的配对键）配对，各文件对在进程池中并行比较。
+
+        Args:
+            dir1: 第一个目录
+            dir2: 第二个目录
+            **options: 可选参数，除以下批量选项外均传给每个文件对的 compare_csv
+                pattern: 参与比较的文件名通配符，默认为'*.csv'
+                key_pattern: 从相对路径中提取配对键的正则表达式，默认按相对路径配对，
+                    如 r'(.*)_\\d{8}\\.csv' 将 orders_20240101.csv 与 orders_20240102.csv 配对
+                recursive: 是否包含子目录，默认为False
+                workers: 并行进程数，默认为None（使用全部CPU核数），为1时在当前进程中顺序比较
+                max_pending: 同时提交的文件对数上限，默认为进程数的2倍
+                memory_budget: 同时比较的文件对估算内存之和的上限（字节），默认为物理内存的一半；
+                    单个文件对超过上限时单独比较
+                skip_identical: 大小和整文件摘要一致的文件对是否直接判定相同而不解析，默认为True
+                    （摘要缓存在 fingerprint_dir，默认为临时目录，不写入被比较的目录）
+                output_dir: 差异输出目录，指定后每个文件对的差异写入 <配对键>.jsonl，结果中只保留差异计数
+
+        Returns:
+            包含 status、message、summary（total、same、different、error、unmatched、skipped 计数）
+            和 pairs（各文件对的结果条目，按完成顺序排列）的字典
+        """
+        self._logger.info(f"开始批量比较目录: {dir1} 和 {dir2}")
+
+        try:
+            entries = list(self.iter_compare_directories(dir1, dir2, **options))
+            result = batch_result(entries)
+            self._logger.info(result['message'])
+            return result
+
+        except Exception as e:
+            self._logger.error(f"批量比较目录失败: {str(e)}")
+            raise
+
+    def iter_compare_directories(self, dir1, dir2, **options):
+        """
+        批量比较两个目录中的CSV文件，每个文件对比较完成后立即生成其结果条目
+
+        参数与 compare_directories 相同。只在一侧存在的文件最先生成（status 为 'unmatched'），
+        其余条目按完成顺序生成，包含 name、file1、file2、status、message、skipped、seconds，
+        比较完成时另有 result（compare_csv 的结果），出错时另有 error。
+        """
+        options = dict(options)
+        options.setdefault('pattern', '*.csv')
+        for entry in iter_batch_compare(_compare_csv_pair, dir1, dir2, options, dict(self._config),
+                                        CSV_MEMORY_FACTOR):
+            if entry['status'] == 'error':
+                self._logger.error(f"比较 {entry['name']} 失败: {entry['message']}")
+            else:
+                self._logger.debug("已比较 {}: {}，耗时: {}s", entry['name'], entry['status'], entry['seconds'])
+            yield entry
+
+    def _csv_diffs(self, file1, file2, **options):
+        """
+        计算两个CSV文件的差异
+
+        Returns:
+            (keyed, diffs, error)：keyed 表示是否按键列比较，diffs 为 DiffResult 的迭代器；
+            列不一致时 error 为错误结果字典
+        """
         key_columns = options.get('key_columns', [])
         ignore_columns = options.get('ignore_columns', [])
+        compare_columns = options.get('compare_columns')
+        dtype = options.get('dtype')
         delimiter = options.get('delimiter', ',')
         encoding = options.get('encoding', 'utf-8')
+        mode = options.get('mode', 'memory')
 
-        self._logger.info(f"开始比较CSV文件: {file1} 和 {file2}")
+        if options.get('fingerprint'):
+            fingerprinted = self._csv_diffs_fingerprint(file1, file2, **options)
+            if fingerprinted is not None:
+                return fingerprinted
+
+        if mode == 'approximate':
+            raise ValueError("近似比较模式不生成具体差异，请使用 compare_csv")
+        if mode == 'partitioned':
+            return self._csv_diffs_partitioned(file1, file2, **options)
+        if mode == 'sorted':
+            return self._csv_diffs_sorted(file1, file2, **options)
+
+        # 读取文件，忽略列和不需要比较的列不解析
+        usecols1 = select_columns(self._read_columns(file1, delimiter, encoding),
+                                  key_columns, compare_columns, ignore_columns)
+        usecols2 = select_columns(self._read_columns(file2, delimiter, encoding),
+                                  key_columns, compare_columns, ignore_columns)
+        df1 = self._read_csv(file1, options, delimiter=delimiter, encoding=encoding, usecols=usecols1, dtype=dtype)
+        df2 = self._read_csv(file2, options, delimiter=delimiter, encoding=encoding, usecols=usecols2, dtype=dtype)
+
+        # 检查列是否一致
+        if set(df1.columns) != set(df2.columns):
+            return False, None, self._column_mismatch(df1.columns, df2.columns)
+
+        # 如果指定了键列，则按键列比较
+        if key_columns and all(col in df1.columns for col in key_columns):
+            # 设置索引进行比较
+            df1 = df1.set_index(key_columns)
+            df2 = df2.set_index(key_columns)
+            return True, iter([diff_keyed(df1, df2)]), None
+
+        # 未指定键列时，直接比较整个数据框
+        df1 = df1.reset_index(drop=True)
+        df2 = df2.reset_index(drop=True)
+        if df1.equals(df2):
+            return False, iter([]), None
+        return False, iter([diff_positional(df1, df2)]), None
+
+    def _csv_diffs_fingerprint(self, file1, file2, **options):
+        """
+        基于文件指纹的比较
+
+        整文件摘要一致时直接判定相同；内存模式按键列比较时，用行哈希索引找出内容不同的行，
+        只重新解析并逐列比较这些行。无法使用指纹时返回 None，回退到常规比较。
+        """
+        key_columns = options.get('key_columns', [])
+        compare_columns = options.get('compare_columns')
+        delimiter = options.get('delimiter', ',')
+        encoding = options.get('encoding', 'utf-8')
+        mode = options.get('mode', 'memory')
+        fingerprint_dir = options.get('fingerprint_dir')
+
+        fingerprint1 = FileFingerprint(file1, fingerprint_dir)
+        fingerprint2 = FileFingerprint(file2, fingerprint_dir)
+
+        header1 = self._read_header(file1, delimiter, encoding)
+        header2 = self._read_header(file2, delimiter, encoding)
+        columns1 = select_columns(header1, key_columns, compare_columns, options.get('ignore_columns', []))
+        columns2 = select_columns(header2, key_columns, compare_columns, options.get('ignore_columns', []))
+        # 不需要比较的列不参与行哈希
+        ignore_columns = sorted(col for col in set(header1) | set(header2) if col not in columns1)
+        use_rows = (mode == 'memory' and key_columns and set(columns1) == set(columns2)
+                    and all(col in columns1 for col in key_columns))
+
+        if use_rows:
+            # 建立行哈希索引的同时计算整文件摘要，避免重复读取
+            rows1 = fingerprint1.row_index(key_columns, ignore_columns, delimiter, encoding)
+            rows2 = fingerprint2.row_index(key_columns, ignore_columns, delimiter, encoding)
+
+        if fingerprint1.digest == fingerprint2.digest:
+            self._logger.info("两个文件的摘要一致，跳过解析")
+            return bool(key_columns), iter([]), None
+
+        if not use_rows:
+            return None
+
+        changed1, changed2 = changed_rows(rows1, rows2, key_columns)
+        self._logger.info(f"行指纹比较: 第一个文件 {len(changed1)} 行、第二个文件 {len(changed2)} 行需要重新解析")
+        if changed1.empty and changed2.empty:
+            return True, iter([]), None
+
+        df1, df2 = read_changed_rows(file1, file2, changed1, changed2,
+                                     fingerprint1.header, fingerprint2.header, delimiter, encoding,
+                                     usecols=columns1, dtype=options.get('dtype'),
+                                     engine=self._parser_engine(options))
+        return True, iter([diff_keyed(df1.set_index(key_columns), df2.set_index(key_columns))]), None
+
+    def _compare_approximate(self, file1, file2, **options):
+        """
+        按键哈希抽样的近似比较
 
+        两个文件各顺序读取一遍，只有被抽中的行计算内容哈希并保留在内存中，
+        比较抽样行得到差异率的估计和 Wilson 置信区间。
+        """
+        key_columns = options.get('key_columns', [])
+        delimiter = options.get('delimiter', ',')
+        encoding = options.get('encoding', 'utf-8')
+        sample_rate = options.get('sample_rate', DEFAULT_SAMPLE_RATE)
+        confidence = options.get('confidence', DEFAULT_CONFIDENCE)
+        seed = options.get('sample_seed')
+
+        if not key_columns:
+            self._logger.error("近似比较模式需要指定key_columns")
+            raise ValueError("近似比较模式需要指定key_columns")
+
+        columns1 = select_columns(self._read_columns(file1, delimiter, encoding), key_columns,
+                                  options.get('compare_columns'), options.get('ignore_columns', []))
+        columns2 = select_columns(self._read_columns(file2, delimiter, encoding), key_columns,
+                                  options.get('compare_columns'), options.get('ignore_columns', []))
+        if set(columns1) != set(columns2):
+            return self._column_mismatch(columns1, columns2)
+
+        missing_keys = [col for col in key_columns if col not in columns1]
+        if missing_keys:
+            self._logger.error(f"键列不存在: {missing_keys}")
+            raise ValueError(f"键列不存在: {missing_keys}")
+
+        self._logger.info(f"使用近似比较模式，抽样比例: {sample_rate}")
+        sample1, rows1 = sample_row_hashes(file1, key_columns, sample_rate, columns1, seed, delimiter, encoding)
+        sample2, rows2 = sample_row_hashes(file2, key_columns, sample_rate, columns1, seed, delimiter, encoding)
+        estimate = estimate_difference(sample1, sample2, sample_rate, confidence)
+
+        low, high = estimate['difference_rate_bounds']
+        if estimate['different_rows'] == 0:
+            status = 'same'
+            message = (f"抽样 {estimate['sampled_rows']} 行均相同，"
+                       f"差异率上限约 {high:.4%}（置信水平 {confidence:.0%}）")
+        else:
+            status = 'different'
+            message = (f"抽样 {estimate['sampled_rows']} 行中 {estimate['different_rows']} 行不同，"
+                       f"差异率约 {estimate['difference_rate']:.4%}"
+                       f"（{confidence:.0%} 置信区间 {low:.4%} ~ {high:.4%}）")
+        self._logger.info(message)
+
+        return {
+            'status': status,
+            'message': message,
+            'approximate': True,
+            'rows_file1': rows1,
+            'rows_file2': rows2,
+            **estimate
+        }
+
+    def _column_mismatch(self, columns1, columns2):
+        """构建列不一致时的错误结果"""
+        self._logger.warning("两个CSV文件的列不一致")
+        return {
+            'status': 'error',
+            'message': '列不一致',
+            'only_in_file1': list(set(columns1) - set(columns2)),
+            'only_in_file2': list(set(columns2) - set(columns1))
+        }
+
+    def _compare_result(self, keyed, count, differences, output_file=None):
+        """根据差异计数构建比较结果字典"""
+        if count == 0:
+            self._logger.info("两个CSV文件内容完全相同")
+            result = {
+                'status': 'same',
+                'message': '文件内容完全相同'
+            }
+        else:
+            unit = '行' if keyed else '处'
+            self._logger.info(f"找到 {count} {unit}差异")
+            result = {
+                'status': 'different',
+                'message': f'找到 {count} {unit}差异'
+            }
+
+        if output_file:
+            result['output_file'] = output_file
+            result['difference_count'] = count
+        else:
+            result['differences'] = differences
+        return result
+
+    def _csv_diffs_partitioned(self, file1, file2, **options):
+        """
+        按键列哈希分区的外存比较
+
+        两个文件分块读取，每行按键列哈希值写入磁盘上的分区文件，
+        随后逐个分区对进行比较，峰值内存由内存预算而非文件大小决定。
+        差异的顺序按分区排列，与整体读入内存时的行顺序不同。
+        """
+        key_columns = options.get('key_columns', [])
+        ignore_columns = options.get('ignore_columns', [])
+        compare_columns = options.get('compare_columns')
+        delimiter = options.get('delimiter', ',')
+        encoding = options.get('encoding', 'utf-8')
+        memory_budget = options.get('memory_budget', DEFAULT_MEMORY_BUDGET)
+        num_partitions = options.get('num_partitions')
+
+        if not key_columns:
+            self._logger.error("分区比较模式需要指定key_columns")
+            raise ValueError("分区比较模式需要指定key_columns")
+
+        # 只读取表头，检查列是否一致
+        columns1 = select_columns(self._read_columns(file1, delimiter, encoding),
+                                  key_columns, compare_columns, ignore_columns)
+        columns2 = select_columns(self._read_columns(file2, delimiter, encoding),
+                                  key_columns, compare_columns, ignore_columns)
+
+        if set(columns1) != set(columns2):
+            return True, None, self._column_mismatch(columns1, columns2)
+
+        missing_keys = [col for col in key_columns if col not in columns1]
+        if missing_keys:
+            self._logger.error(f"键列不存在: {missing_keys}")
+            raise ValueError(f"键列不存在: {missing_keys}")
+
+        if not num_partitions:
+            total_size = os.path.getsize(file1) + os.path.getsize(file2)
+            num_partitions = max(1, math.ceil(total_size * CSV_MEMORY_FACTOR / memory_budget))
+
+        self._logger.info(f"使用分区比较模式，分区数: {num_partitions}")
+        return True, self._iter_partition_diffs(file1, file2, columns1, num_partitions, options), None
+
+    def _iter_partition_diffs(self, file1, file2, columns, num_partitions, options):
+        """写出两个文件的分区后逐个分区对比较，生成各分区的差异"""
+        key_columns = options.get('key_columns', [])
+        read_options = {
+            'delimiter': options.get('delimiter', ','),
+            'encoding': options.get('encoding', 'utf-8'),
+            'chunksize': options.get('chunk_size', DEFAULT_CHUNK_SIZE),
+            'usecols': columns,
+            'dtype': options.get('dtype'),
+            **backend_options(self._parser_engine(options))
+        }
+
+        with tempfile.TemporaryDirectory(prefix='csv_compare_', dir=options.get('temp_dir')) as work_dir:
+            self._partition_csv(file1, os.path.join(work_dir, 'left'), key_columns,
+                                num_partitions, read_options)
+            self._partition_csv(file2, os.path.join(work_dir, 'right'), key_columns,
+                                num_partitions, read_options)
+
+            for partition in range(num_partitions):
+                df1 = self._load_partition(os.path.join(work_dir, 'left'), partition, columns)
+                df2 = self._load_partition(os.path.join(work_dir, 'right'), partition, columns)
+                if df1.empty and df2.empty:
+                    continue
+
+                # 两侧分块推断的类型可能不同，先转换为共同类型
+                df1, df2 = align_dtypes(df1.set_index(key_columns), df2.set_index(key_columns))
+                yield diff_keyed(df1, df2)
+                self._logger.debug("已比较分区 {}/{}", partition + 1, num_partitions)
+
+    def _csv_diffs_sorted(self, file1, file2, **options):
+        """
+        针对已按键列排序文件的归并比较
+
+        两个文件用 csv.reader 同步顺序遍历，按键列归并配对，边遍历边输出新增、删除和修改的行。
+        取值按原始文本比较，只存在于一侧的行在另一侧取值为 None。
+        """
+        key_columns = options.get('key_columns', [])
+        ignore_columns = options.get('ignore_columns', [])
+        compare_columns = options.get('compare_columns')
+        delimiter = options.get('delimiter', ',')
+        encoding = options.get('encoding', 'utf-8')
+
+        if not key_columns:
+            self._logger.error("归并比较模式需要指定key_columns")
+            raise ValueError("归并比较模式需要指定key_columns")
+
+        columns1 = select_columns(self._read_header(file1, delimiter, encoding),
+                                  key_columns, compare_columns, ignore_columns)
+        columns2 = select_columns(self._read_header(file2, delimiter, encoding),
+                                  key_columns, compare_columns, ignore_columns)
+
+        if set(columns1) != set(columns2):
+            return True, None, self._column_mismatch(columns1, columns2)
+
+        missing_keys = [col for col in key_columns if col not in columns1]
+        if missing_keys:
+            self._logger.error(f"键列不存在: {missing_keys}")
+            raise ValueError(f"键列不存在: {missing_keys}")
+
+        self._logger.info("使用归并比较模式")
+        value_columns = [col for col in columns1 if col not in key_columns]
+        return True, self._iter_sorted_diffs(file1, file2, value_columns, options), None
+
+    def _iter_sorted_diffs(self, file1, file2, value_columns, options):
+        """同步遍历两个已排序文件，按批生成差异"""
+        key_columns = options.get('key_columns', [])
+        delimiter = options.get('delimiter', ',')
+        encoding = options.get('encoding', 'utf-8')
+        verify_sorted = options.get('verify_sorted', True)
+        key_parser = float if options.get('key_type', 'str') == 'numeric' else None
+        batch_size = options.get('batch_size', DEFAULT_BATCH_SIZE)
+        left_name, right_name = DEFAULT_VALUE_COLUMNS
+
+        batch = {'key': [], 'column': [], left_name: [], right_name: []}
+        row_count = 0
+
+        def flush():
+            frame = pd.DataFrame({name: pd.Series(values, dtype=object) for name, values in batch.items()})
+            for values in batch.values():
+                values.clear()
+            return DiffResult(frame, keyed=True, row_count=row_count)
+
+        with open(file1, 'r', newline='', encoding=encoding) as handle1, \
+                open(file2, 'r', newline='', encoding=encoding) as handle2:
+            rows1 = self._iter_keyed_rows(csv.reader(handle1, delimiter=delimiter), file1,
+                                          key_columns, value_columns, key_parser, verify_sorted)
+            rows2 = self._iter_keyed_rows(csv.reader(handle2, delimiter=delimiter), file2,
+                                          key_columns, value_columns, key_parser, verify_sorted)
+
+            left = next(rows1, None)
+            right = next(rows2, None)
+            while left is not None or right is not None:
+                if right is None or (left is not None and left[0] < right[0]):
+                    # 只存在于第一个文件的行
+                    key, cells = left[1], [(col, value, None) for col, value in zip(value_columns, left[2])]
+                    left = next(rows1, None)
+                elif left is None or right[0] < left[0]:
+                    # 只存在于第二个文件的行
+                    key, cells = right[1], [(col, None, value) for col, value in zip(value_columns, right[2])]
+                    right = next(rows2, None)
+                else:
+                    key = left[1]
+                    cells = [(col, value1, value2)
+                             for col, value1, value2 in zip(value_columns, left[2], right[2])
+                             if value1 != value2]
+                    left = next(rows1, None)
+                    right = next(rows2, None)
+
+                if not cells:
+                    continue
+
+                row_count += 1
+                for col, value1, value2 in cells:
+                    batch['key'].append(key)
+                    batch['column'].append(col)
+                    batch[left_name].append(value1)
+                    batch[right_name].append(value2)
+
+                # 只在行边界处输出，保证同一键的差异不会拆分到两批
+                if len(batch['key']) >= batch_size:
+                    yield flush()
+                    row_count = 0
+
+        if batch['key']:
+            yield flush()
+
+    @staticmethod
+    def _iter_keyed_rows(reader, file_path, key_columns, value_columns, key_parser=None, verify_sorted=True):
+        """逐行生成 (排序键, 键, 取值列表)，可选校验键列有序且不重复"""
+        header = next(reader, [])
+        key_index = [header.index(col) for col in key_columns]
+        value_index = [header.index(col) for col in value_columns]
+        width = len(header)
+        previous = None
+
+        for row in reader:
+            if not row:
+                continue
+            if len(row) < width:
+                row = row + [''] * (width - len(row))
+
+            key = tuple(row[i] for i in key_index)
+            sort_key = tuple(key_parser(value) for value in key) if key_parser else key
+            if verify_sorted and previous is not None and sort_key <= previous:
+                reason = '重复' if sort_key == previous else '未按键列排序'
+                raise ValueError(f"文件 {file_path} 的键 {key} {reason}，无法使用归并比较模式")
+            previous = sort_key
+
+            yield sort_key, key[0] if len(key) == 1 else key, [row[i] for i in value_index]
+
+    @staticmethod
+    def _read_columns(file_path, delimiter=',', encoding='utf-8'):
+        """读取pandas解析后的列名（与 read_csv 的列名一致，不解析数据行）"""
+        return list(pd.read_csv(file_path, delimiter=delimiter, encoding=encoding, nrows=0).columns)
+
+    @staticmethod
+    def _read_header(file_path, delimiter=',', encoding='utf-8'):
+        """读取CSV文件的表头"""
+        with open(file_path, 'r', newline='', encoding=encoding) as handle:
+            return next(csv.reader(handle, delimiter=delimiter), [])
+
+    @staticmethod
+    def _partition_csv(file_path, partition_dir, key_columns, num_partitions, read_options):
+        """分块读取CSV文件，按键列哈希值将各行追加写入对应的分区文件"""
+        os.makedirs(partition_dir)
+        handles = {}
         try:
-            # 读取文件
-            df1 = pd.read_csv(file1, delimiter=delimiter, encoding=encoding)
-            df2 = pd.read_csv(file2, delimiter=delimiter, encoding=encoding)
-
-            # 处理忽略列
-            if ignore_columns:
-                df1 = df1.drop(columns=[col for col in ignore_columns if col in df1.columns])
-                df2 = df2.drop(columns=[col for col in ignore_columns if col in df2.columns])
-
-            # 检查列是否一致
-            if set(df1.columns) != set(df2.columns):
-                self._logger.warning("两个CSV文件的列不一致")
-                return {
-                    'status': 'error',
-                    'message': '列不一致',
-                    'only_in_file1': list(set(df1.columns) - set(df2.columns)),
-                    'only_in_file2': list(set(df2.columns) - set(df1.columns))
-                }
+            for chunk in pd.read_csv(file_path, **read_options):
+                # 按键列的规范文本形式计算哈希，保证两个文件中相同的键落入同一分区
+                hashes = pd.util.hash_pandas_object(key_text(chunk[key_columns]), index=False)
+                partitions = hashes.to_numpy() % num_partitions
+                for partition, part in chunk.groupby(partitions):
+                    handle = handles.get(partition)
+                    if handle is None:
+                        handle = open(os.path.join(partition_dir, f'{partition}.pkl'), 'wb')
+                        handles[partition] = handle
+                    pickle.dump(part, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            for handle in handles.values():
+                handle.close()
 
-            # 如果指定了键列，则按键列比较
-            if key_columns and all(col in df1.columns for col in key_columns):
-                # 设置索引进行比较
-                df1 = df1.set_index(key_columns)
-                df2 = df2.set_index(key_columns)
-
-                # 对齐索引
-                df1, df2 = df1.align(df2, join='outer', fill_value=None)
-
-                # 比较差异
-                diff = df1 != df2
-                diff_count = diff.sum().sum()
-
-                if diff_count == 0:
-                    self._logger.info("两个CSV文件内容完全相同")
-                    return {
-                        'status': 'same',
-                        'message': '文件内容完全相同',
-                        'differences': []
-                    }
-
-                # 获取不同的值
-                diff_rows = []
-                for row_idx, row in diff.iterrows():
-                    if row.any():
-                        row_diff = {
-                            'key': row_idx,
-                            'differences': {}
-                        }
-                        for col in df1.columns:
-                            if row[col]:
-                                row_diff['differences'][col] = {
-                                    'file1_value': df1.at[row_idx, col],
-                                    'file2_value': df2.at[row_idx, col]
-                                }
-                        diff_rows.append(row_diff)
-
-                self._logger.info(f"找到 {len(diff_rows)} 行差异")
-                return {
-                    'status': 'different',
-                    'message': f'找到 {len(diff_rows)} 行差异',
-                    'differences': diff_rows
-                }
+    @staticmethod
+    def _load_partition(partition_dir, partition, columns):
+        """读取一个分区文件中的所有数据块"""
+        path = os.path.join(partition_dir, f'{partition}.pkl')
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=columns)
+
+        parts = []
+        with open(path, 'rb') as handle:
+            while True:
+                try:
+                    parts.append(pickle.load(handle))
+                except EOFError:
+                    break
+        return pd.concat(parts)[columns]
 
-            # 未指定键列时，直接比较整个数据框
+    def compare_with_snapshot(self, csv_file, snapshot_file, **options):
+        """
+        将CSV文件与上一次运行保存的快照比较（变更捕获模式）
+
+        快照中只保存每个键对应行内容的哈希。每次运行只需读取新文件，
+        与快照比较得到新增、删除和修改的键，随后用新文件的哈希更新快照。
+
+        Args:
+            csv_file: 本次的CSV文件路径
+            snapshot_file: 快照文件路径，不存在时以本次文件建立基线
+            **options: 可选参数
+                key_columns: 用于匹配行的键列，列表类型，必须指定
+                ignore_columns: 忽略比较的列，列表类型
+                delimiter: CSV分隔符，默认为逗号
+                encoding: 文件编码，默认为utf-8
+                chunk_size: 分块读取的行数，默认100000
+                update_snapshot: 比较后是否用本次文件更新快照，默认为True
+
+        Returns:
+            包含变更信息的字典，inserted、deleted、updated 为对应的键列表（键为文本）
+        """
+        key_columns = options.get('key_columns', [])
+        ignore_columns = options.get('ignore_columns', [])
+        delimiter = options.get('delimiter', ',')
+        encoding = options.get('encoding', 'utf-8')
+        chunk_size = options.get('chunk_size', DEFAULT_CHUNK_SIZE)
+        update_snapshot = options.get('update_snapshot', True)
+
+        if not key_columns:
+            self._logger.error("快照比较需要指定key_columns")
+            raise ValueError("快照比较需要指定key_columns")
+
+        self._logger.info(f"开始将CSV文件 {csv_file} 与快照 {snapshot_file} 比较")
+
+        try:
+            rows = build_row_hashes(csv_file, key_columns, ignore_columns, delimiter, encoding, chunk_size)
+            duplicated = rows.duplicated(subset=key_columns, keep='last')
+            if duplicated.any():
+                self._logger.warning(f"存在 {int(duplicated.sum())} 个重复键，仅保留最后一次出现的行")
+                rows = rows[~duplicated].reset_index(drop=True)
+
+            snapshot = load_snapshot(snapshot_file, key_columns, ignore_columns)
+            if snapshot is None:
+                self._logger.info(f"未找到可用快照，以本次文件建立基线，行数: {len(rows)}")
+                result = {
+                    'status': 'baseline',
+                    'message': f'已建立基线，行数: {len(rows)}',
+                    'inserted': [],
+                    'deleted': [],
+                    'updated': []
+                }
             else:
-                # 重置索引以确保正确比较
-                df1 = df1.reset_index(drop=True)
-                df2 = df2.reset_index(drop=True)
-
-                # 比较
-                if df1.equals(df2):
-                    self._logger.info("两个CSV文件内容完全相同")
-                    return {
-                        'status': 'same',
-                        'message': '文件内容完全相同'
-                    }
-
-                # 查找不同的行
-                ne_stacked = (df1 != df2).stack()
-                changed = ne_stacked[ne_stacked]
-                changed.index.names = ['id', 'col']
-
-                difference_locations = [(id_, col) for id_, col in changed.index]
-                diff_values = []
-
-                for id_, col in difference_locations:
-                    diff_values.append({
-                        'row': id_,
-                        'column': col,
-                        'file1_value': df1.iloc[id_][col],
-                        'file2_value': df2.iloc[id_][col]
-                    })
-
-                self._logger.info(f"找到 {len(diff_values)} 处差异")
-                return {
-                    'status': 'different',
-                    'message': f'找到 {len(diff_values)} 处差异',
-                    'differences': diff_values
+                merged = snapshot['rows'].merge(rows, on=key_columns, how='outer',
+                                                suffixes=('_old', '_new'), indicator=True)
+                inserted = merged[merged['_merge'] == 'right_only']
+                deleted = merged[merged['_merge'] == 'left_only']
+                updated = merged[(merged['_merge'] == 'both') & (merged['row_hash_old'] != merged['row_hash_new'])]
+
+                result = {
+                    'inserted': self._frame_keys(inserted, key_columns),
+                    'deleted': self._frame_keys(deleted, key_columns),
+                    'updated': self._frame_keys(updated, key_columns)
                 }
+                change_count = len(inserted) + len(deleted) + len(updated)
+                if change_count == 0:
+                    self._logger.info("与快照相比没有变化")
+                    result.update(status='same', message='与快照相比没有变化')
+                else:
+                    message = f'新增 {len(inserted)} 行，删除 {len(deleted)} 行，修改 {len(updated)} 行'
+                    self._logger.info(message)
+                    result.update(status='different', message=message)
+
+            if update_snapshot:
+                save_snapshot(snapshot_file, rows, key_columns, ignore_columns, source=csv_file)
+                self._logger.debug("已更新快照: {}", snapshot_file)
+
+            return result
 
         except Exception as e:
-            self._logger.error(f"CSV比较失败: {str(e)}")
+            self._logger.error(f"快照比较失败: {str(e)}")
             raise
 
+    @staticmethod
+    def _frame_keys(frame, key_columns):
+        """将键列转换为键列表，单键列时为标量，多键列时为元组"""
+        if len(key_columns) == 1:
+            return frame[key_columns[0]].tolist()
+        return list(frame[key_columns].itertuples(index=False, name=None))
+
     def merge_csv_files(self, file_list, output_file, **options):
         """
         合并多个CSV文件
@@ -148,22 +847,56 @@ class CSVTool(BaseTool):
                 encoding: 文件编码，默认为utf-8
                 sort_by: 按指定列排序，列表类型
                 ascending: 排序方向，布尔值列表
+                memory_budget: 排序时的内存预算（字节），默认256MB；超出预算的数据分段排序后写入临时文件
+                temp_dir: 排序时临时文件的存放目录，默认为系统临时目录
+                raw_copy: 是否按字节直接拷贝数据行，默认为False；要求所有文件表头、编码和分隔符一致，
+                    校验表头后跳过表头，其余字节不经解析直接拷贝，不能与sort_by同时使用
+                workers: 并行解析输入文件的进程数，默认为1（顺序处理），None 表示使用全部CPU核数；
+                    各进程把数据行写入临时文件（指定sort_by时为排序后的有序段，每个进程的内存预算为
+                    memory_budget / workers），主进程再按字节拼接或多路归并
+                ordered: 并行且不排序时是否按输入顺序写出，默认为True；False 时按解析完成顺序写出以获得最大吞吐
         """
         header = options.get('header', True)
         delimiter = options.get('delimiter', ',')
         encoding = options.get('encoding', 'utf-8')
         sort_by = options.get('sort_by', None)
-        ascending = options.get('ascending', True)
+        raw_copy = options.get('raw_copy', False)
+        workers = options.get('workers', 1)
 
         self._logger.info(f"开始合并 {len(file_list)} 个CSV文件到: {output_file}")
 
+        if raw_copy and sort_by:
+            self._logger.error("raw_copy 不能与 sort_by 同时使用")
+            raise ValueError("raw_copy 不能与 sort_by 同时使用")
+
         try:
+            # 按字节直接拷贝数据行
+            if raw_copy:
+                self._merge_csv_raw(file_list, output_file, **options)
+                self._logger.success("CSV文件合并成功")
+                return True
+
+            # 多进程并行解析
+            if resolve_workers(workers) > 1:
+                self._merge_csv_parallel(file_list, output_file, **options)
+                if sort_by:
+                    self._logger.info(f"已按 {sort_by} 排序合并后的文件")
+                self._logger.success("CSV文件合并成功")
+                return True
+
+            # 如果指定了排序，外部排序后直接写入输出文件
+            if sort_by:
+                self._merge_csv_sorted(file_list, output_file, **options)
+                self._logger.info(f"已按 {sort_by} 排序合并后的文件")
+                self._logger.success("CSV文件合并成功")
+                return True
+
             # 创建输出文件并写入表头（如果需要）
             with open(output_file, 'w', newline='', encoding=encoding) as outfile:
                 writer = None
 
                 for file_path in file_list:
-                    self._logger.debug(f"处理文件: {file_path}")
+                    self._logger.debug("处理文件: {}", file_path)
 
                     with open(file_path, 'r', encoding=encoding) as infile:
                         reader = csv.reader(infile, delimiter=delimiter)
@@ -183,13 +916,6 @@ class CSVTool(BaseTool):
                         for row in reader:
                             writer.writerow(row)
 
-            # 如果指定了排序，读取并排序
-            if sort_by:
-                df = pd.read_csv(output_file, delimiter=delimiter, encoding=encoding)
-                df = df.sort_values(by=sort_by, ascending=ascending)
-                df.to_csv(output_file, index=False, sep=delimiter, encoding=encoding)
-                self._logger.info(f"已按 {sort_by} 排序合并后的文件")
-
             self._logger.success(f"CSV文件合并成功")
             return True
 
@@ -198,6 +924,145 @@ class CSVTool(BaseTool):
             raise
             return False
 
+    def _merge_csv_parallel(self, file_list, output_file, **options):
+        """
+        在进程池中并行解析各输入文件，合并写入输出文件
+
+        工作进程把各文件的数据行写入临时目录中的文件，主进程按输入顺序（或完成顺序）
+        将其按字节拼接到输出文件；指定 sort_by 时各进程输出排序后的有序段，主进程按输入顺序
+        多路归并，键相同的行保持输入顺序，与顺序合并的结果一致。
+        """
+        header = options.get('header', True)
+        delimiter = options.get('delimiter', ',')
+        encoding = options.get('encoding', 'utf-8')
+        sort_by = options.get('sort_by')
+        ascending = options.get('ascending', True)
+        memory_budget = options.get('memory_budget', DEFAULT_SORT_MEMORY_BUDGET)
+        temp_dir = options.get('temp_dir')
+        workers = resolve_workers(options.get('workers'))
+        ordered = options.get('ordered', True)
+
+        if not file_list:
+            raise ValueError("没有需要合并的CSV文件")
+
+        headers = self._read_header(file_list[0], delimiter, encoding)
+        sort_options = None
+        if sort_by:
+            sort_key = make_sort_key(headers, sort_by, ascending)
+            sort_options = (headers, sort_by, ascending, max(1, memory_budget // workers), temp_dir)
+            # 归并需要按输入顺序排列有序段才能保持稳定
+            ordered = True
+        self._logger.info(f"使用 {workers} 个进程并行解析，按{'输入' if ordered else '完成'}顺序写出")
+
+        with tempfile.TemporaryDirectory(prefix='csv_merge_', dir=temp_dir) as work_dir:
+            tasks = ((file_path, os.path.join(work_dir, f'part_{index}.csv'), delimiter, encoding, sort_options)
+                     for index, file_path in enumerate(file_list))
+            parts = imap_pool(_write_csv_body, tasks, workers, ordered)
+
+            with open(output_file, 'w', newline='', encoding=encoding) as outfile:
+                writer = csv.writer(outfile, delimiter=delimiter)
+                if header:
+                    writer.writerow(headers)
+                if sort_by:
+                    runs = [part_path for _, part_path in parts]
+                    writer.writerows(merge_runs(runs, sort_key, work_dir, delimiter, logger=self._logger))
+                    return
+
+            with open(output_file, 'ab', buffering=0) as outfile:
+                for file_path, part_path in parts:
+                    with open(part_path, 'rb', buffering=0) as infile:
+                        _copy_byte_range(infile, outfile, 0, os.fstat(infile.fileno()).st_size)
+                    os.remove(part_path)
+                    self._logger.debug("已写入文件: {}", file_path)
+
+    def _merge_csv_raw(self, file_list, output_file, **options):
+        """
+        按字节合并多个CSV文件
+
+        校验各文件表头与第一个文件一致后，跳过表头，将其余字节用 copy_file_range/sendfile
+        （不支持时使用大缓冲区拷贝）直接写入输出文件；文件末尾缺少换行时自动补齐。
+        """
+        header = options.get('header', True)
+        delimiter = options.get('delimiter', ',')
+        encoding = options.get('encoding', 'utf-8')
+
+        if not file_list:
+            raise ValueError("没有需要合并的CSV文件")
+
+        # 校验表头并记录各文件数据部分的起始偏移
+        expected = None
+        header_bytes = b''
+        bodies = []
+        for file_path in file_list:
+            with open(file_path, 'rb') as infile:
+                record = next(iter_csv_records(infile), (0, b''))[1]
+            columns = next(csv.reader([record.decode(encoding).rstrip('\r\n')], delimiter=delimiter), [])
+            if expected is None:
+                expected = columns
+                header_bytes = record
+            elif columns != expected:
+                self._logger.error(f"文件 {file_path} 的表头与第一个文件不一致")
+                raise ValueError(f"文件 {file_path} 的表头与第一个文件不一致: {columns} != {expected}")
+            bodies.append((file_path, len(record)))
+
+        line_end = b'\r\n' if header_bytes.endswith(b'\r\n') else b'\n'
+
+        with open(output_file, 'wb', buffering=0) as outfile:
+            if header:
+                outfile.write(header_bytes if header_bytes.endswith(b'\n') else header_bytes + line_end)
+
+            for file_path, body_offset in bodies:
+                self._logger.debug("拷贝文件: {}", file_path)
+                with open(file_path, 'rb', buffering=0) as infile:
+                    size = os.fstat(infile.fileno()).st_size
+                    count = size - body_offset
+                    if count <= 0:
+                        continue
+
+                    _copy_byte_range(infile, outfile, body_offset, count)
+
+                    # 文件末尾缺少换行时补齐，避免与下一个文件的首行粘连
+                    infile.seek(size - 1)
+                    if infile.read(1) != b'\n':
+                        outfile.write(line_end)
+
+    def _merge_csv_sorted(self, file_list, output_file, **options):
+        """
+        合并并排序多个CSV文件
+
+        各文件的数据行按内存预算切分为有序段，再用堆进行多路归并，直接写入输出文件，
+        只需一次写出，内存占用由内存预算决定。数值按数值排序，其余按文本排序，空值排在最后。
+        """
+        header = options.get('header', True)
+        delimiter = options.get('delimiter', ',')
+        encoding = options.get('encoding', 'utf-8')
+        sort_by = options.get('sort_by')
+        ascending = options.get('ascending', True)
+        memory_budget = options.get('memory_budget', DEFAULT_SORT_MEMORY_BUDGET)
+        temp_dir = options.get('temp_dir')
+
+        if not file_list:
+            raise ValueError("没有需要合并的CSV文件")
+
+        headers = self._read_header(file_list[0], delimiter, encoding)
+        sort_key = make_sort_key(headers, sort_by, ascending)
+
+        def iter_rows():
+            for file_path in file_list:
+                self._logger.debug("处理文件: {}", file_path)
+                with open(file_path, 'r', newline='', encoding=encoding) as infile:
+                    reader = csv.reader(infile, delimiter=delimiter)
+                    # 跳过表头
+                    next(reader, None)
+                    yield from reader
+
+        with open(output_file, 'w', newline='', encoding=encoding) as outfile:
+            writer = csv.writer(outfile, delimiter=delimiter)
+            if header:
+                writer.writerow(headers)
+            writer.writerows(external_sort(iter_rows(), sort_key, memory_budget, temp_dir,
+                                           logger=self._logger))
+
     def csv_to_excel(self, csv_file, excel_file, **options):
         """
         将CSV文件转换为Excel文件
@@ -210,17 +1075,48 @@ class CSVTool(BaseTool):
                 encoding: 文件编码，默认为utf-8
                 sheet_name: Excel表名，默认为'Sheet1'
                 na_rep: 缺失值表示，默认为nan
+                engine: 写入引擎，默认为'pandas'（整个文件读入后一次写出）；
+                    'stream' 分块读取CSV并追加到只写工作簿，内存占用与文件大小无关，
+                    超过Excel单表行数上限时自动续写到新sheet（Sheet1_2、Sheet1_3……）
+                chunk_size: stream 引擎每块读取的行数，默认为100000
+                max_rows: stream 引擎每个sheet的最大行数（含表头），默认为Excel的上限1048576
+                use_cache: pandas 引擎是否使用列式缓存，默认取 configure 中的 csv_cache
+                parser_engine: CSV解析引擎，默认取 configure 中的 parser_engine
         """
         delimiter = options.get('delimiter', ',')
         encoding = options.get('encoding', 'utf-8')
         sheet_name = options.get('sheet_name', 'Sheet1')
         na_rep = options.get('na_rep', 'nan')
+        engine = options.get('engine', 'pandas')
+        chunk_size = options.get('chunk_size', DEFAULT_CHUNK_SIZE)
+        max_rows = options.get('max_rows', EXCEL_MAX_ROWS)
 
         self._logger.info(f"开始将CSV文件转换为Excel: {csv_file} -> {excel_file}")
 
+        if engine not in ('pandas', 'stream'):
+            raise ValueError(f"不支持的写入引擎: {engine}")
+
         try:
+            if engine == 'stream':
+                with StreamingWorkbookWriter(excel_file, sheet_name=sheet_name, max_rows=max_rows) as writer:
+                    chunks = pd.read_csv(csv_file, delimiter=delimiter, encoding=encoding, chunksize=chunk_size,
+                                         **backend_options(self._parser_engine(options)))
+                    for chunk in chunks:
+                        # 表头使用pandas解析后的列名，与 pandas 引擎的输出一致
+                        if writer.header is None:
+                            writer.header = list(chunk.columns)
+                        writer.writerows(frame_rows(chunk, na_rep))
+                        self._logger.debug("已写入 {} 行", writer.row_count)
+                    if writer.header is None:
+                        writer.header = self._read_header(csv_file, delimiter, encoding)
+
+                if len(writer.sheet_names) > 1:
+                    self._logger.info(f"数据超过单表行数上限，已写入 {len(writer.sheet_names)} 个sheet: {writer.sheet_names}")
+                self._logger.success("CSV转Excel成功")
+                return True
+
             # 读取CSV文件
-            df = pd.read_csv(csv_file, delimiter=delimiter, encoding=encoding)
+            df = self._read_csv(csv_file, options, delimiter=delimiter, encoding=encoding)
 
             # 写入Excel文件
             with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
@@ -232,4 +1128,4 @@ class CSVTool(BaseTool):
         except Exception as e:
             self._logger.error(f"CSV转Excel失败: {str(e)}")
             raise
-            return False
\ No newline at end of file
+            return False
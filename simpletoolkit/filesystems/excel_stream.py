@@ -0,0 +1,227 @@
+# simpletoolkit/filesystems/excel_stream.py
+import csv
+import os
+import zipfile
+from xml.etree import ElementTree
+
+# 流式读写时每批处理的行数
+DEFAULT_STREAM_BATCH_SIZE = 10000
+# 流式引擎支持的文件扩展名（openpyxl 不支持旧版 .xls）
+STREAM_EXTENSIONS = ('.xlsx', '.xlsm', '.xltx', '.xltm')
+
+
+def supports_streaming(path):
+    """文件是否可以使用流式引擎读取"""
+    return os.fspath(path).lower().endswith(STREAM_EXTENSIONS)
+
+
+def list_sheet_names(path):
+    """
+    获取工作簿中的sheet名称
+
+    .xlsx 等格式只读取压缩包中的 workbook.xml，不解析单元格和共享字符串；其余格式使用pandas。
+    """
+    if supports_streaming(path):
+        with zipfile.ZipFile(path) as archive:
+            root = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+        return [element.get('name') for element in root.iter() if element.tag.endswith('}sheet')]
+
+    import pandas as pd
+
+    return pd.ExcelFile(path).sheet_names
+
+
+def open_workbook(path):
+    """以只读模式打开工作簿，逐行读取而不在内存中保留全部单元格；使用完毕需调用 close()"""
+    from openpyxl import load_workbook
+
+    return load_workbook(path, read_only=True, data_only=True)
+
+
+def iter_sheet_rows(worksheet):
+    """
+    逐行读取只读工作表，生成 (表头, 数据行迭代器)
+
+    与 pandas.read_excel 一致：表头末尾的空列被去掉，空的表头单元格命名为 'Unnamed: <位置>'，
+    重复的列名依次加上 .1、.2 后缀；数据行之间完全为空的行保留为全空行，末尾的空行被去掉；
+    每行按表头宽度截断或补齐。工作表为空时表头为空列表。
+
+    与 pandas 的差异：表头之前的空行被跳过，以第一个非空行为表头（pandas 以第一行为表头，
+    列名均为 'Unnamed: <位置>'）；超出表头宽度的单元格被丢弃（pandas 为其补充 'Unnamed' 列）。
+    """
+    # 部分工具生成的文件记录的范围不准确，重置后按实际内容读取
+    worksheet.reset_dimensions()
+    rows = worksheet.iter_rows(values_only=True)
+
+    header = []
+    for row in rows:
+        if any(value is not None for value in row):
+            header = list(row)
+            break
+    while header and header[-1] is None:
+        header.pop()
+    header = _header_names(header)
+    width = len(header)
+
+    def data_rows():
+        # 连续空行的数量，遇到后续的非空行时才写出，末尾的空行不写出
+        blank_rows = 0
+        for row in rows:
+            if not any(value is not None for value in row):
+                blank_rows += 1
+                continue
+            for _ in range(blank_rows):
+                yield [None] * width
+            blank_rows = 0
+            row = list(row[:width])
+            if len(row) < width:
+                row.extend([None] * (width - len(row)))
+            yield row
+
+    return header, data_rows()
+
+
+def _header_names(header):
+    """
+    按 pandas 的规则命名表头
+
+    空单元格命名为 'Unnamed: <位置>'；重复的列名依次加 .1、.2 后缀，表头中（包括后面的列）
+    已有的名称不会被占用，如 ['a', 'a', 'a.1'] 命名为 ['a', 'a.2', 'a.1']。
+    """
+    unnamed = [position for position, value in enumerate(header) if value is None or value == '']
+    names = [f'Unnamed: {position}' if position in unnamed else value for position, value in enumerate(header)]
+    # 与 pandas 一致，先处理有名称的列，再处理空单元格的列
+    order = [position for position in range(len(names)) if position not in unnamed] + unnamed
+    counts = {}
+    for position in order:
+        base = name = names[position]
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[base] = count + 1
+            name = f'{base}.{count}'
+            count = count + 1 if name in names else counts.get(name, 0)
+        names[position] = name
+        counts[name] = count + 1
+    return names
+
+
+def write_sheet_csv(worksheet, output_file, na_rep='nan', batch_size=DEFAULT_STREAM_BATCH_SIZE, encoding='utf-8'):
+    """
+    将只读工作表逐行写入CSV文件，内存占用与工作表大小无关
+
+    行按批写出，读到第一行数据时即创建输出文件；没有数据行时不创建文件。
+
+    Returns:
+        写出的数据行数
+    """
+    header, rows = iter_sheet_rows(worksheet)
+    if not header:
+        return 0
+
+    count = 0
+    handle = None
+    try:
+        batch = []
+        for row in rows:
+            batch.append([na_rep if value is None else value for value in row])
+            if len(batch) >= batch_size:
+                if handle is None:
+                    handle, writer = _open_csv(output_file, header, encoding)
+                writer.writerows(batch)
+                count += len(batch)
+                batch = []
+
+        if batch:
+            if handle is None:
+                handle, writer = _open_csv(output_file, header, encoding)
+            writer.writerows(batch)
+            count += len(batch)
+    finally:
+        if handle is not None:
+            handle.close()
+    return count
+
+
+def _open_csv(output_file, header, encoding):
+    handle = open(output_file, 'w', newline='', encoding=encoding)
+    writer = csv.writer(handle, lineterminator=os.linesep)
+    writer.writerow(header)
+    return handle, writer
+
+
+def frame_rows(df, na_rep=None):
+    """将DataFrame转换为Python值的行列表，缺失值替换为 na_rep（为 None 时写为空单元格）"""
+    values = df.to_numpy(dtype=object)
+    values[df.isna().to_numpy()] = na_rep
+    return values.tolist()
+
+
+# Excel单个工作表的最大行数（含表头）
+EXCEL_MAX_ROWS = 1048576
+# Excel工作表名称的最大长度
+SHEET_NAME_MAX_LENGTH = 31
+
+
+class StreamingWorkbookWriter:
+    """
+    只写模式的工作簿写入器
+
+    行逐批追加到只写工作簿，已写出的行不在内存中保留单元格对象。当前sheet达到行数上限时
+    自动新建续表（名称依次为 Sheet1、Sheet1_2、Sheet1_3……），每个续表都重复写入表头。
+    写入方法与 csv.writer 一致，可与之互换使用。
+    """
+
+    def __init__(self, path, sheet_name='Sheet1', header=None, max_rows=EXCEL_MAX_ROWS):
+        from openpyxl import Workbook
+
+        if max_rows < 2:
+            raise ValueError(f"每个sheet的最大行数至少为2（表头和一行数据）: {max_rows}")
+        self.path = path
+        self.sheet_name = sheet_name
+        self.header = list(header) if header is not None else None
+        self.max_rows = max_rows
+        self.sheet_names = []
+        self.row_count = 0
+        self._workbook = Workbook(write_only=True)
+        self._worksheet = None
+        self._sheet_rows = 0
+
+    def _next_sheet_name(self):
+        index = len(self.sheet_names) + 1
+        if index == 1:
+            return self.sheet_name[:SHEET_NAME_MAX_LENGTH]
+        suffix = f'_{index}'
+        return self.sheet_name[:SHEET_NAME_MAX_LENGTH - len(suffix)] + suffix
+
+    def _new_sheet(self):
+        name = self._next_sheet_name()
+        self._worksheet = self._workbook.create_sheet(title=name)
+        self.sheet_names.append(name)
+        self._sheet_rows = 0
+        if self.header is not None:
+            self._worksheet.append(self.header)
+            self._sheet_rows = 1
+
+    def writerow(self, row):
+        if self._worksheet is None or self._sheet_rows >= self.max_rows:
+            self._new_sheet()
+        self._worksheet.append(row)
+        self._sheet_rows += 1
+        self.row_count += 1
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def close(self):
+        """保存工作簿；没有写入任何行时也会生成只含表头的sheet"""
+        if self._worksheet is None:
+            self._new_sheet()
+        self._workbook.save(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
@@ -1,19 +1,221 @@
 # simpletoolkit/filesystems/excel_tools.py
+import csv
+import glob
 import os
+import time
 
 import pandas as pd
 from ..base.base_tool import BaseTool
+from ..base.parallel import imap_pool, resolve_workers
+from .batch_utils import batch_result, files_identical, iter_batch_compare
+from .compare_utils import DEFAULT_BATCH_SIZE, collect_differences, diff_keyed, diff_positional
+from .excel_stream import (DEFAULT_STREAM_BATCH_SIZE, EXCEL_MAX_ROWS, StreamingWorkbookWriter, iter_sheet_rows,
+                           list_sheet_names, open_workbook, supports_streaming, write_sheet_csv)
+from .fingerprint_utils import FileFingerprint
+from .read_utils import backend_options, check_parser_engine, column_filter
+from .sheet_cache import DEFAULT_CACHE_MAX_BYTES, DEFAULT_SPILL_MAX_BYTES, SheetCache
+
+# 比较结果中两侧取值列的名称
+EXCEL_VALUE_COLUMNS = ('excel1_value', 'excel2_value')
+# 工作簿解析为DataFrame后的内存膨胀系数（经验值，xlsx为压缩的XML）
+EXCEL_MEMORY_FACTOR = 20
+
+
+def _parse_excel_sheet(excel_file, sheet_name, columns=None, ignore_columns=(), dtype=None, engine='c'):
+    """解析一个sheet（在工作进程中执行），返回 (文件路径, sheet名称, DataFrame, 错误信息)"""
+    try:
+        df = pd.ExcelFile(excel_file).parse(sheet_name, usecols=column_filter(columns, ignore_columns), dtype=dtype,
+                                            **backend_options(engine))
+        return excel_file, sheet_name, df, None
+    except Exception as e:
+        return excel_file, sheet_name, None, str(e)
+
+
+def _read_variant(columns=None, ignore_columns=(), dtype=None, engine='c'):
+    """读取参数对应的缓存键（可哈希）"""
+    if columns is None and not ignore_columns and not dtype and engine == 'c':
+        return None
+    return (None if columns is None else tuple(columns), tuple(sorted(ignore_columns)),
+            tuple(sorted((col, str(value)) for col, value in (dtype or {}).items())), engine)
+
+
+def _sheet_csv_path(output_dir, excel_file, sheet_name):
+    """sheet对应的CSV输出路径：excel表名__sheet名.csv"""
+    # 获取Excel文件名（不包含路径和扩展名）
+    excel_name = os.path.splitext(os.path.basename(excel_file))[0]
+    # 构建安全的sheet名称，只保留字母数字和特定字符
+    safe_sheet_name = "".join([c for c in sheet_name if c.isalnum() or c in ('_', '-')])
+    return f"{output_dir}/{excel_name}__{safe_sheet_name}.csv"
+
+
+def _convert_sheet(excel_file, sheet_name, output_file, engine, na_rep, batch_size, parser_engine='c'):
+    """将一个sheet转换为CSV（在工作进程中执行），返回清单条目"""
+    entry = {'workbook': excel_file, 'sheet': sheet_name, 'output_file': None, 'rows': 0}
+    start = time.perf_counter()
+    try:
+        if engine == 'stream' and supports_streaming(excel_file):
+            workbook = open_workbook(excel_file)
+            try:
+                rows = write_sheet_csv(workbook[sheet_name], output_file, na_rep=na_rep, batch_size=batch_size)
+            finally:
+                workbook.close()
+        else:
+            df = pd.read_excel(excel_file, sheet_name=sheet_name, **backend_options(parser_engine))
+            rows = len(df)
+            if rows:
+                df.to_csv(output_file, index=False, na_rep=na_rep)
+
+        entry['rows'] = rows
+        entry['status'] = 'success' if rows else 'empty'
+        if rows:
+            entry['output_file'] = output_file
+    except Exception as e:
+        entry['status'] = 'error'
+        entry['error'] = str(e)
+
+    entry['seconds'] = round(time.perf_counter() - start, 3)
+    return entry
+
+
+def _compare_excel_pair(name, excel1, excel2, options, skip_identical, config):
+    """
+    比较目录中的一个工作簿对（在工作进程中执行），返回结果条目
+
+    未指定 sheet_names 时比较两个工作簿中同名的sheet，只在一侧存在的sheet使结果为不同。
+    """
+    entry = {'name': name, 'file1': excel1, 'file2': excel2, 'skipped': False}
+    start = time.perf_counter()
+    try:
+        if skip_identical and files_identical(excel1, excel2, options.get('fingerprint_dir')):
+            entry.update(status='same', message='文件摘要一致，跳过比较', skipped=True)
+        else:
+            options = dict(options)
+            sheet_names = options.pop('sheet_names', None)
+            output_file = options.pop('output_file', None)
+            names1 = list_sheet_names(excel1)
+            names2 = list_sheet_names(excel2)
+            if sheet_names is None:
+                sheet_names = [sheet for sheet in names1 if sheet in names2]
+                entry['only_in_file1'] = [sheet for sheet in names1 if sheet not in names2]
+                entry['only_in_file2'] = [sheet for sheet in names2 if sheet not in names1]
+
+            tool = ExcelTool()
+            tool.configure(**config)
+            sheets = {}
+            for sheet_name in sheet_names:
+                if output_file:
+                    base, extension = os.path.splitext(output_file)
+                    safe_sheet_name = "".join([c for c in sheet_name if c.isalnum() or c in ('_', '-')])
+                    options['output_file'] = f"{base}__{safe_sheet_name}{extension}"
+                sheets[sheet_name] = tool.compare_excel(excel1, excel2, sheet_name, sheet_name, **options)
+
+            statuses = {result['status'] for result in sheets.values()}
+            if 'error' in statuses:
+                status = 'error'
+            elif 'different' in statuses or entry.get('only_in_file1') or entry.get('only_in_file2'):
+                status = 'different'
+            else:
+                status = 'same'
+            different = [sheet for sheet, result in sheets.items() if result['status'] != 'same']
+            entry.update(status=status, message=f'比较 {len(sheets)} 个sheet，不同: {different}', sheets=sheets)
+    except Exception as e:
+        entry.update(status='error', message=str(e), error=str(e))
+
+    entry['seconds'] = round(time.perf_counter() - start, 3)
+    return entry
 
 
 class ExcelTool(BaseTool):
-    """Excel文件处理工具"""
+    """
+    Excel文件处理工具
+
+    可通过 configure 启用已解析sheet的缓存，同一工作簿在多次调用之间只解析一次：
+        cache_sheets: 是否启用缓存，默认为False（单次调用可用 use_cache 选项覆盖）
+        cache_max_bytes: 内存中缓存的字节预算，默认512MB，超出时按LRU淘汰
+        cache_spill_dir: 被淘汰条目的溢出目录（写为Feather文件，可在进程之间共享），默认不溢出
+        cache_spill_max_bytes: 溢出目录的字节上限，默认4GB，超出时删除最旧的溢出文件
+
+    parser_engine 与 CSVTool 共用（可通过 configure_global 统一设置）：为'pyarrow'时解析后的sheet
+    使用Arrow类型，比较结果和CSV输出与 CSVTool 的 pyarrow 引擎一致；默认为'c'（NumPy类型）。
+    单次调用可用 parser_engine 选项覆盖。
+    """
+
+    # 缓存相关的配置项，变化时重建缓存
+    CACHE_OPTIONS = ('cache_max_bytes', 'cache_spill_dir', 'cache_spill_max_bytes')
+
+    def __init__(self):
+        super().__init__()
+        self._sheet_cache = None
+
+    def configure(self, **kwargs):
+        """配置工具参数"""
+        super().configure(**kwargs)
+        if any(option in kwargs for option in self.CACHE_OPTIONS) and self._sheet_cache is not None:
+            self._sheet_cache.clear()
+            self._sheet_cache = None
+        return self
+
+    @property
+    def sheet_cache(self):
+        """已解析sheet的缓存（首次访问时按配置创建）"""
+        if self._sheet_cache is None:
+            self._sheet_cache = SheetCache(
+                max_bytes=self._config.get('cache_max_bytes', DEFAULT_CACHE_MAX_BYTES),
+                spill_dir=self._config.get('cache_spill_dir'),
+                spill_max_bytes=self._config.get('cache_spill_max_bytes', DEFAULT_SPILL_MAX_BYTES)
+            )
+        return self._sheet_cache
+
+    def clear_cache(self):
+        """清空已解析sheet的缓存"""
+        if self._sheet_cache is not None:
+            self._sheet_cache.clear()
+
+    def _cache_for(self, options):
+        """本次调用使用的缓存，未启用时返回 None"""
+        if options.get('use_cache', self._config.get('cache_sheets', False)):
+            return self.sheet_cache
+        return None
+
+    def _parser_engine(self, options):
+        """单次调用的解析引擎，默认取 configure 中的 parser_engine"""
+        return check_parser_engine(options.get('parser_engine', self._config.get('parser_engine', 'c')))
+
+    def _read_sheet(self, excel_file, sheet_name, cache=None, workbooks=None,
+                    columns=None, ignore_columns=(), dtype=None, engine='c'):
+        """
+        解析sheet，启用缓存时优先从缓存读取
+
+        workbooks 为 {文件路径: pd.ExcelFile} 字典，用于在多次调用之间复用已打开的工作簿，
+        只有缓存未命中时才会打开文件。columns、ignore_columns 和 dtype 直接传给解析函数，
+        不需要的列不会被解析。engine 为'pyarrow'时结果使用Arrow类型。
+        """
+        variant = _read_variant(columns, ignore_columns, dtype, engine)
+        if cache is not None:
+            df = cache.get(excel_file, sheet_name, variant)
+            if df is not None:
+                self._logger.debug("sheet缓存命中: {} [{}]", excel_file, sheet_name)
+                return df
+
+        if workbooks is None:
+            xls = pd.ExcelFile(excel_file)
+        else:
+            xls = workbooks.get(excel_file)
+            if xls is None:
+                xls = workbooks[excel_file] = pd.ExcelFile(excel_file)
+        df = xls.parse(sheet_name, usecols=column_filter(columns, ignore_columns), dtype=dtype,
+                       **backend_options(engine))
+
+        if cache is not None:
+            cache.put(excel_file, sheet_name, df, variant)
+        return df
 
     def merge_excel_sheets(self, excel_file, output_file, **options):
         """
         合并Excel文件中的多个sheet
 
         Args:
-            excel_file: 输入Excel文件路径
+            excel_file: 输入Excel文件路径，也可以是路径列表（合并多个文件中的sheet）
             output_file: 输出文件路径
             **options: 可选参数
                 sheet_names: 指定要合并的sheet名称列表，默认为全部
@@ -21,37 +223,81 @@ class ExcelTool(BaseTool):
                 header: 是否包含表头，默认为True
                 sort_by: 按指定列排序，列表类型
                 ascending: 排序方向，布尔值列表
+                workers: 并行解析sheet的进程数，默认为1（顺序处理），None 表示使用全部CPU核数
+                ordered: 并行时是否按输入顺序合并，默认为True；False 时按解析完成顺序合并以获得最大吞吐
+                use_cache: 是否使用已解析sheet的缓存，默认取 configure 中的 cache_sheets
+                columns: 只读取这些列，列表类型，默认为全部
+                ignore_columns: 不读取的列，列表类型
+                dtype: 列类型映射，如 {'id': 'int32', 'city': 'category'}，解析时直接使用指定类型
+                    （stream 引擎按单元格原始值写出，不使用此参数）
+                parser_engine: 解析引擎，默认取 configure 中的 parser_engine（stream 引擎不使用此参数）
+                engine: 合并引擎，默认为'pandas'（所有sheet读入内存后合并写出）；
+                    'stream' 逐行读取各sheet并直接写出，内存占用与数据量无关，输出Excel时超过单表行数上限
+                    自动续写到新sheet（Merged_2、Merged_3……）；不支持 sort_by，也不使用 workers
+                max_rows: stream 引擎输出Excel时每个sheet的最大行数（含表头），默认为Excel的上限1048576
         """
         sheet_names = options.get('sheet_names')
         ignore_index = options.get('ignore_index', True)
         header = options.get('header', True)
         sort_by = options.get('sort_by', None)
         ascending = options.get('ascending', True)
+        workers = options.get('workers', 1)
+        ordered = options.get('ordered', True)
+        engine = options.get('engine', 'pandas')
+        read_options = {
+            'columns': options.get('columns'),
+            'ignore_columns': options.get('ignore_columns', []),
+            'dtype': options.get('dtype'),
+            'engine': self._parser_engine(options)
+        }
+
+        excel_files = [excel_file] if isinstance(excel_file, (str, os.PathLike)) else list(excel_file)
 
         self._logger.info(f"开始合并Excel文件 {excel_file} 中的多个sheet")
 
-        try:
-            # 读取Excel文件
-            xls = pd.ExcelFile(excel_file)
+        if engine not in ('pandas', 'stream'):
+            raise ValueError(f"不支持的合并引擎: {engine}")
+        if engine == 'stream':
+            if sort_by:
+                raise ValueError("stream 引擎不支持 sort_by，排序需要读入全部数据")
+            unsupported = [path for path in excel_files if not supports_streaming(path)]
+            if unsupported:
+                self._logger.warning(f"stream 引擎不支持这些文件的格式，改用pandas合并: {unsupported}")
+                engine = 'pandas'
 
-            # 获取所有sheet名称
-            if not sheet_names:
-                sheet_names = xls.sheet_names
-                self._logger.info(f"未指定sheet，将处理所有sheet: {sheet_names}")
+        try:
+            # 读取Excel文件，获取所有待合并的 (文件, sheet)
+            tasks = []
+            for path in excel_files:
+                names = sheet_names
+                if not names:
+                    names = list_sheet_names(path)
+                    self._logger.info(f"未指定sheet，将处理所有sheet: {names}")
+                tasks.extend((path, name) for name in names)
+
+            if engine == 'stream':
+                return self._merge_sheets_stream(tasks, output_file, header,
+                                                 column_filter(read_options['columns'], read_options['ignore_columns']),
+                                                 options.get('max_rows', EXCEL_MAX_ROWS))
+
+            cache = self._cache_for(options)
+            if resolve_workers(workers) > 1:
+                self._logger.info(f"使用 {resolve_workers(workers)} 个进程并行解析sheet")
+                parsed = self._iter_parsed_sheets_parallel(tasks, cache, workers, ordered, read_options)
+            else:
+                parsed = self._iter_parsed_sheets(tasks, cache, read_options)
 
             # 合并sheet
             dfs = []
-            for sheet_name in sheet_names:
-                try:
-                    df = xls.parse(sheet_name)
-                    if not df.empty:
-                        df['sheet_name'] = sheet_name  # 添加sheet名称列
-                        dfs.append(df)
-                        self._logger.debug(f"已读取sheet: {sheet_name}，行数: {len(df)}")
-                    else:
-                        self._logger.warning(f"sheet {sheet_name} 为空，跳过")
-                except Exception as e:
-                    self._logger.error(f"读取sheet {sheet_name} 失败: {str(e)}")
+            for _, sheet_name, df, error in parsed:
+                if error is not None:
+                    self._logger.error(f"读取sheet {sheet_name} 失败: {error}")
+                elif not df.empty:
+                    df['sheet_name'] = sheet_name  # 添加sheet名称列
+                    dfs.append(df)
+                    self._logger.debug("已读取sheet: {}，行数: {}", sheet_name, len(df))
+                else:
+                    self._logger.warning(f"sheet {sheet_name} 为空，跳过")
 
             if not dfs:
                 self._logger.error("没有可合并的有效数据")
@@ -84,6 +330,141 @@ class ExcelTool(BaseTool):
             raise
             return False
 
+    def _merge_sheets_stream(self, tasks, output_file, header=True, usecols=None, max_rows=EXCEL_MAX_ROWS):
+        """
+        流式合并sheet
+
+        先读取各sheet的表头确定合并后的列（列顺序与 pd.concat 一致，末尾的 sheet_name 列位置也相同），
+        再逐行读取并写出，不在内存中保留sheet数据。usecols 为列过滤函数，未选中的列不写出；
+        max_rows 为输出Excel时每个sheet的最大行数。
+        """
+        if output_file.lower().endswith('.csv'):
+            is_csv = True
+        elif output_file.lower().endswith(('.xlsx', '.xls')):
+            is_csv = False
+        else:
+            self._logger.error(f"不支持的输出文件格式: {output_file}")
+            return False
+
+        workbooks = {}
+        try:
+            # 第一遍：读取表头，跳过读取失败和没有数据行的sheet
+            columns = {}
+            sheets = []
+            for path, sheet_name in tasks:
+                try:
+                    if path not in workbooks:
+                        workbooks[path] = open_workbook(path)
+                    sheet_header, rows = iter_sheet_rows(workbooks[path][sheet_name])
+                    has_rows = next(rows, None) is not None
+                except Exception as e:
+                    self._logger.error(f"读取sheet {sheet_name} 失败: {str(e)}")
+                    continue
+
+                if not has_rows:
+                    self._logger.warning(f"sheet {sheet_name} 为空，跳过")
+                    continue
+                # (表头中的位置, 合并后的位置)
+                selected = [(index, col) for index, col in enumerate(sheet_header) if usecols is None or usecols(col)]
+                for _, col in selected:
+                    columns.setdefault(col, len(columns))
+                columns.setdefault('sheet_name', len(columns))
+                sheets.append((path, sheet_name, [(index, columns[col]) for index, col in selected]))
+
+            if not sheets:
+                self._logger.error("没有可合并的有效数据")
+                return False
+
+            # 第二遍：逐行写出
+            width = len(columns)
+            sheet_position = columns['sheet_name']
+            if is_csv:
+                handle = open(output_file, 'w', newline='', encoding='utf-8')
+                writer = csv.writer(handle, lineterminator=os.linesep)
+                if header:
+                    writer.writerow(list(columns))
+            else:
+                handle = None
+                writer = StreamingWorkbookWriter(output_file, sheet_name='Merged', header=list(columns),
+                                                 max_rows=max_rows)
+
+            try:
+                for path, sheet_name, positions in sheets:
+                    _, rows = iter_sheet_rows(workbooks[path][sheet_name])
+                    count = 0
+                    for row in rows:
+                        merged_row = [None] * width
+                        for index, position in positions:
+                            merged_row[position] = row[index]
+                        merged_row[sheet_position] = sheet_name  # 添加sheet名称列
+                        writer.writerow(merged_row)
+                        count += 1
+                    self._logger.debug("已写入sheet: {}，行数: {}", sheet_name, count)
+            finally:
+                if handle is not None:
+                    handle.close()
+
+            if is_csv:
+                self._logger.success(f"已将合并结果保存为CSV: {output_file}")
+            else:
+                writer.close()
+                if len(writer.sheet_names) > 1:
+                    self._logger.info(f"数据超过单表行数上限，已写入 {len(writer.sheet_names)} 个sheet: {writer.sheet_names}")
+                self._logger.success(f"已将合并结果保存为Excel: {output_file}")
+            return True
+
+        finally:
+            for workbook in workbooks.values():
+                workbook.close()
+
+    def _iter_parsed_sheets(self, tasks, cache=None, read_options=None):
+        """在当前进程中顺序解析sheet，同一文件只打开一次"""
+        read_options = read_options or {}
+        workbooks = {}
+        for path, sheet_name in tasks:
+            try:
+                yield path, sheet_name, self._read_sheet(path, sheet_name, cache, workbooks, **read_options), None
+            except Exception as e:
+                yield path, sheet_name, None, str(e)
+            finally:
+                # 只保留当前文件的工作簿，避免同时打开过多文件
+                for other in [other for other in workbooks if other != path]:
+                    del workbooks[other]
+
+    def _iter_parsed_sheets_parallel(self, tasks, cache, workers, ordered, read_options=None):
+        """在进程池中并行解析sheet，缓存命中的sheet不再提交到进程池"""
+        read_options = read_options or {}
+        variant = _read_variant(**read_options)
+        read_args = (read_options.get('columns'), read_options.get('ignore_columns', ()), read_options.get('dtype'),
+                     read_options.get('engine', 'c'))
+
+        cached = {}
+        if cache is not None:
+            for task in tasks:
+                df = cache.get(*task, variant)
+                if df is not None:
+                    cached[task] = df
+        misses = [(*task, *read_args) for task in tasks if task not in cached]
+        results = imap_pool(_parse_excel_sheet, misses, workers, ordered)
+
+        def store(result):
+            path, sheet_name, df, error = result
+            if cache is not None and error is None:
+                cache.put(path, sheet_name, df, variant)
+            return result
+
+        if ordered:
+            for task in tasks:
+                if task in cached:
+                    yield (*task, cached[task], None)
+                else:
+                    yield store(next(results))
+        else:
+            for task, df in cached.items():
+                yield (*task, df, None)
+            for result in results:
+                yield store(result)
+
     def split_excel_to_csv(self, excel_file, output_dir='.', **options):
         """
         将Excel文件的多个sheet拆分为单独的CSV文件
@@ -96,44 +477,73 @@ class ExcelTool(BaseTool):
                 prefix: 输出文件名前缀
                 suffix: 输出文件名后缀
                 na_rep: 缺失值表示，默认为nan
+                engine: 读取引擎，默认为'pandas'（整个sheet解析为DataFrame后写出）；
+                    'stream' 使用只读工作簿逐行读取并分批写入CSV，内存占用与sheet大小无关，
+                    单元格按原始值写出，不做pandas的类型推断（如整数列含缺失值时写为 1 而不是 1.0），
+                    表头规则与pandas的差异见 excel_stream.iter_sheet_rows（仅支持.xlsx等格式，.xls自动使用pandas）
+                batch_size: stream 引擎每批写出的行数，默认为10000
+                use_cache: pandas 引擎是否使用已解析sheet的缓存，默认取 configure 中的 cache_sheets
+                parser_engine: pandas 引擎的解析引擎，默认取 configure 中的 parser_engine
         """
         sheet_names = options.get('sheet_names')
         prefix = options.get('prefix', '')
         suffix = options.get('suffix', '')
         na_rep = options.get('na_rep', 'nan')
+        engine = options.get('engine', 'pandas')
+        batch_size = options.get('batch_size', DEFAULT_STREAM_BATCH_SIZE)
 
         self._logger.info(f"开始将Excel文件 {excel_file} 拆分为多个CSV文件")
 
+        if engine not in ('pandas', 'stream'):
+            raise ValueError(f"不支持的读取引擎: {engine}")
+        if engine == 'stream' and not supports_streaming(excel_file):
+            self._logger.warning(f"stream 引擎不支持该文件格式，改用pandas读取: {excel_file}")
+            engine = 'pandas'
+
         try:
             # 读取Excel文件
-            xls = pd.ExcelFile(excel_file)
+            if engine == 'stream':
+                workbook = open_workbook(excel_file)
+                all_sheet_names = workbook.sheetnames
+            else:
+                # 启用缓存时工作簿只在缓存未命中时才打开
+                cache = self._cache_for(options)
+                if cache is None:
+                    workbooks = {excel_file: pd.ExcelFile(excel_file)}
+                    all_sheet_names = workbooks[excel_file].sheet_names
+                else:
+                    workbooks = {}
+                    all_sheet_names = list_sheet_names(excel_file)
 
             # 获取所有sheet名称
             if not sheet_names:
-                sheet_names = xls.sheet_names
+                sheet_names = all_sheet_names
                 self._logger.info(f"未指定sheet，将处理所有sheet: {sheet_names}")
 
-            # 获取Excel文件名（不包含路径和扩展名）
-            excel_basename = os.path.basename(excel_file)
-            excel_name = os.path.splitext(excel_basename)[0]
-
-            # 为每个sheet创建CSV文件
-            for sheet_name in sheet_names:
-                try:
-                    df = xls.parse(sheet_name)
-                    if not df.empty:
-                        # 构建安全的sheet名称，只保留字母数字和特定字符
-                        safe_sheet_name = "".join([c for c in sheet_name if c.isalnum() or c in ('_', '-')])
-                        # 构建输出文件名：excel表名__sheet名.csv
-                        output_file = f"{output_dir}/{excel_name}__{safe_sheet_name}.csv"
-
-                        # 保存为CSV
-                        df.to_csv(output_file, index=False, na_rep=na_rep)
-                        self._logger.info(f"已将sheet {sheet_name} 保存为CSV: {output_file}，行数: {len(df)}")
-                    else:
-                        self._logger.warning(f"sheet {sheet_name} 为空，跳过")
-                except Exception as e:
-                    self._logger.error(f"处理sheet {sheet_name} 失败: {str(e)}")
+            try:
+                # 为每个sheet创建CSV文件
+                for sheet_name in sheet_names:
+                    try:
+                        output_file = _sheet_csv_path(output_dir, excel_file, sheet_name)
+                        if engine == 'stream':
+                            rows = write_sheet_csv(workbook[sheet_name], output_file, na_rep=na_rep,
+                                                   batch_size=batch_size)
+                        else:
+                            df = self._read_sheet(excel_file, sheet_name, cache, workbooks,
+                                                  engine=self._parser_engine(options))
+                            rows = len(df)
+                            if rows:
+                                df.to_csv(output_file, index=False, na_rep=na_rep)
+
+                        if rows:
+                            self._logger.info("已将sheet {} 保存为CSV: {}，行数: {}", sheet_name, output_file, rows)
+                        else:
+                            self._logger.warning(f"sheet {sheet_name} 为空，跳过")
+                    except Exception as e:
+                        self._logger.error(f"处理sheet {sheet_name} 失败: {str(e)}")
+            finally:
+                if engine == 'stream':
+                    workbook.close()
 
             return True
 
@@ -141,6 +551,91 @@ class ExcelTool(BaseTool):
             self._logger.error(f"拆分Excel为CSV失败: {str(e)}")
             raise
 
+    def convert_workbooks_to_csv(self, workbooks, output_dir='.', **options):
+        """
+        批量将多个工作簿的sheet转换为CSV文件
+
+        以 (工作簿, sheet) 为单位分发到进程池并行转换，输出文件命名规则与 split_excel_to_csv 相同。
+
+        Args:
+            workbooks: 工作簿的glob模式（如 'data/*.xlsx'），或工作簿路径列表
+            output_dir: 输出目录，默认为当前目录
+            **options: 可选参数
+                sheet_names: 每个工作簿中要转换的sheet名称列表，默认为全部
+                na_rep: 缺失值表示，默认为nan
+                engine: 读取引擎，默认为'stream'（逐行读取，内存占用与sheet大小无关），可选'pandas'
+                batch_size: stream 引擎每批写出的行数，默认为10000
+                workers: 并行进程数，默认为None（使用全部CPU核数），为1时在当前进程中顺序转换
+                max_pending: 同时提交的任务数上限，默认为进程数的2倍
+                parser_engine: pandas 引擎的解析引擎，默认取 configure 中的 parser_engine
+
+        Returns:
+            清单列表，按工作簿和sheet的顺序排列，每项包含 workbook、sheet、output_file、rows、
+            seconds 和 status（'success'、'empty' 或 'error'，出错时另有 error）
+        """
+        sheet_names = options.get('sheet_names')
+        na_rep = options.get('na_rep', 'nan')
+        engine = options.get('engine', 'stream')
+        batch_size = options.get('batch_size', DEFAULT_STREAM_BATCH_SIZE)
+        workers = options.get('workers')
+        max_pending = options.get('max_pending')
+        parser_engine = self._parser_engine(options)
+
+        if engine not in ('pandas', 'stream'):
+            raise ValueError(f"不支持的读取引擎: {engine}")
+
+        if isinstance(workbooks, (str, os.PathLike)):
+            workbook_files = sorted(glob.glob(os.fspath(workbooks)))
+        else:
+            workbook_files = list(workbooks)
+
+        self._logger.info(f"开始批量转换 {len(workbook_files)} 个工作簿为CSV文件，进程数: {resolve_workers(workers)}")
+        start = time.perf_counter()
+        os.makedirs(output_dir, exist_ok=True)
+
+        # 展开为 (工作簿, sheet) 任务，无法读取的工作簿和重名的输出文件直接记入清单，
+        # 待转换的任务先在清单中占位，保证清单按工作簿和sheet的顺序排列
+        manifest = []
+        tasks = []
+        slots = {}
+        output_files = set()
+        for excel_file in workbook_files:
+            try:
+                names = sheet_names or list_sheet_names(excel_file)
+            except Exception as e:
+                self._logger.error(f"读取工作簿 {excel_file} 的sheet列表失败: {str(e)}")
+                manifest.append({'workbook': excel_file, 'sheet': None, 'output_file': None, 'rows': 0,
+                                 'seconds': 0.0, 'status': 'error', 'error': str(e)})
+                continue
+
+            for sheet_name in names:
+                output_file = _sheet_csv_path(output_dir, excel_file, sheet_name)
+                if output_file in output_files:
+                    error = f"输出文件重名: {output_file}"
+                    self._logger.error(f"跳过 {excel_file} 的sheet {sheet_name}: {error}")
+                    manifest.append({'workbook': excel_file, 'sheet': sheet_name, 'output_file': None, 'rows': 0,
+                                     'seconds': 0.0, 'status': 'error', 'error': error})
+                    continue
+                output_files.add(output_file)
+                slots[(excel_file, sheet_name)] = len(manifest)
+                manifest.append(None)
+                tasks.append((excel_file, sheet_name, output_file, engine, na_rep, batch_size, parser_engine))
+
+        # 按完成顺序取回结果以获得最大吞吐
+        for entry in imap_pool(_convert_sheet, tasks, workers, ordered=False, max_pending=max_pending):
+            if entry['status'] == 'error':
+                self._logger.error(f"转换 {entry['workbook']} 的sheet {entry['sheet']} 失败: {entry['error']}")
+            else:
+                self._logger.debug("已转换 {} 的sheet {}，行数: {}，耗时: {}s",
+                                   entry['workbook'], entry['sheet'], entry['rows'], entry['seconds'])
+            manifest[slots[(entry['workbook'], entry['sheet'])]] = entry
+
+        errors = sum(1 for entry in manifest if entry['status'] == 'error')
+        self._logger.success(
+            f"批量转换完成 - sheet数: {len(manifest)}，行数: {sum(entry['rows'] for entry in manifest)}，"
+            f"失败: {errors}，耗时: {time.perf_counter() - start:.2f}s"
+        )
+        return manifest
 
     def compare_excel(self, excel1, excel2, sheet1, sheet2, **options):
         """
@@ -153,122 +648,188 @@ class ExcelTool(BaseTool):
             sheet2: 第二个Excel的sheet名称或索引
             **options: 可选参数
                 key_columns: 用于匹配行的键列，列表类型
-                ignore_columns: 忽略比较的列，列表类型
+                ignore_columns: 忽略比较的列，列表类型（不会被解析）
+                compare_columns: 只比较这些列，列表类型，默认为全部；键列自动包含，其余列不会被解析
+                dtype: 列类型映射，如 {'id': 'int32', 'city': 'category', 'name': 'string[pyarrow]'}
+                parser_engine: 解析引擎，默认取 configure 中的 parser_engine
                 na_rep: 缺失值表示，默认为nan
+                result_format: 差异的输出格式，默认为'records'（逐条字典列表）；
+                    'columnar' 返回列式的 DiffResult，可按需调用 to_records() 转换
+                output_file: 差异输出文件路径（.jsonl/.csv/.parquet），指定后差异分批写入文件，
+                    结果中只保留差异计数（差异结果仍先在内存中完整得到）
+                output_format: 差异输出格式（jsonl/csv/parquet），默认根据扩展名判断
+                batch_size: 差异每批写入的单元格数，默认50000
+                fingerprint: 是否使用文件指纹，默认为False；两个文件摘要一致且sheet相同时不解析直接判定相同。
+                    Excel只使用整文件摘要，没有行哈希索引，摘要不同时照常完整解析两个sheet
+                fingerprint_dir: 指纹索引文件的存放目录，默认与Excel文件放在同一目录
+                use_cache: 是否使用已解析sheet的缓存，默认取 configure 中的 cache_sheets
         """
-        key_columns = options.get('key_columns', [])
-        ignore_columns = options.get('ignore_columns', [])
-        na_rep = options.get('na_rep', 'nan')
-
         self._logger.info(f"开始比较Excel文件: {excel1} (sheet: {sheet1}) 和 {excel2} (sheet: {sheet2})")
 
         try:
-            # 读取第一个Excel文件
-            xls1 = pd.ExcelFile(excel1)
-            df1 = xls1.parse(sheet1)
-            self._logger.info(f"已读取第一个Excel的sheet {sheet1}，行数: {len(df1)}")
-
-            # 读取第二个Excel文件
-            xls2 = pd.ExcelFile(excel2)
-            df2 = xls2.parse(sheet2)
-            self._logger.info(f"已读取第二个Excel的sheet {sheet2}，行数: {len(df2)}")
-
-            # 处理忽略列
-            if ignore_columns:
-                df1 = df1.drop(columns=[col for col in ignore_columns if col in df1.columns])
-                df2 = df2.drop(columns=[col for col in ignore_columns if col in df2.columns])
-
-            # 检查列是否一致
-            if set(df1.columns) != set(df2.columns):
-                self._logger.warning("两个sheet的列不一致")
-                return {
-                    'status': 'error',
-                    'message': '列不一致',
-                    'only_in_excel1': list(set(df1.columns) - set(df2.columns)),
-                    'only_in_excel2': list(set(df2.columns) - set(df1.columns))
+            keyed, diffs, error = self._excel_diffs(excel1, excel2, sheet1, sheet2, **options)
+            if error:
+                return error
+
+            count, differences = collect_differences(diffs, keyed, EXCEL_VALUE_COLUMNS, **options)
+            output_file = options.get('output_file')
+
+            if count == 0:
+                self._logger.info("两个sheet内容完全相同")
+                result = {
+                    'status': 'same',
+                    'message': '内容完全相同'
                 }
-
-            # 如果指定了键列，则按键列比较
-            if key_columns and all(col in df1.columns for col in key_columns):
-                # 设置索引进行比较
-                df1 = df1.set_index(key_columns)
-                df2 = df2.set_index(key_columns)
-
-                # 对齐索引
-                df1, df2 = df1.align(df2, join='outer', fill_value=None)
-
-                # 比较差异
-                diff = df1 != df2
-                diff_count = diff.sum().sum()
-
-                if diff_count == 0:
-                    self._logger.info("两个sheet内容完全相同")
-                    return {
-                        'status': 'same',
-                        'message': '内容完全相同',
-                        'differences': []
-                    }
-
-                # 获取不同的值
-                diff_rows = []
-                for row_idx, row in diff.iterrows():
-                    if row.any():
-                        row_diff = {
-                            'key': row_idx,
-                            'differences': {}
-                        }
-                        for col in df1.columns:
-                            if row[col]:
-                                row_diff['differences'][col] = {
-                                    'excel1_value': df1.at[row_idx, col],
-                                    'excel2_value': df2.at[row_idx, col]
-                                }
-                        diff_rows.append(row_diff)
-
-                self._logger.info(f"找到 {len(diff_rows)} 行差异")
-                return {
+            else:
+                unit = '行' if keyed else '处'
+                self._logger.info(f"找到 {count} {unit}差异")
+                result = {
                     'status': 'different',
-                    'message': f'找到 {len(diff_rows)} 行差异',
-                    'differences': diff_rows
+                    'message': f'找到 {count} {unit}差异'
                 }
 
-            # 未指定键列时，直接比较整个数据框
+            if output_file:
+                result['output_file'] = output_file
+                result['difference_count'] = count
             else:
-                # 重置索引以确保正确比较
-                df1 = df1.reset_index(drop=True)
-                df2 = df2.reset_index(drop=True)
-
-                # 比较
-                if df1.equals(df2):
-                    self._logger.info("两个sheet内容完全相同")
-                    return {
-                        'status': 'same',
-                        'message': '内容完全相同'
-                    }
-
-                # 查找不同的行
-                ne_stacked = (df1 != df2).stack()
-                changed = ne_stacked[ne_stacked]
-                changed.index.names = ['id', 'col']
-
-                difference_locations = [(id_, col) for id_, col in changed.index]
-                diff_values = []
-
-                for id_, col in difference_locations:
-                    diff_values.append({
-                        'row': id_,
-                        'column': col,
-                        'excel1_value': df1.iloc[id_][col],
-                        'excel2_value': df2.iloc[id_][col]
-                    })
-
-                self._logger.info(f"找到 {len(diff_values)} 处差异")
-                return {
-                    'status': 'different',
-                    'message': f'找到 {len(diff_values)} 处差异',
-                    'differences': diff_values
-                }
+                result['differences'] = differences
+            return result
 
         except Exception as e:
             self._logger.error(f"Excel比较失败: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def iter_compare_excel(self, excel1, excel2, sheet1, sheet2, **options):
+        """
+        逐批生成两个Excel文件指定sheet的差异
+
+        Args:
+            excel1: 第一个Excel文件路径
+            excel2: 第二个Excel文件路径
+            sheet1: 第一个Excel的sheet名称或索引
+            sheet2: 第二个Excel的sheet名称或索引
+            **options: 可选参数，同 compare_excel
+
+        两个sheet整体读入内存后比较，完整的差异结果在内存中得到后再切分为批次。
+
+        Yields:
+            DiffResult 列式差异结果，每批最多 batch_size 个差异单元格（单个键的差异超过时除外），
+            同一键的差异不会跨批
+        """
+        batch_size = options.get('batch_size', DEFAULT_BATCH_SIZE)
+
+        keyed, diffs, error = self._excel_diffs(excel1, excel2, sheet1, sheet2, **options)
+        if error:
+            raise ValueError(f"列不一致: 仅在excel1中 {error['only_in_excel1']}，仅在excel2中 {error['only_in_excel2']}")
+
+        for diff in diffs:
+            yield from diff.iter_batches(batch_size)
+
+    def compare_directories(self, dir1, dir2, **options):
+        """
+        批量比较两个目录中的Excel工作簿
+
+        工作簿按名称（或 key_pattern 提取的配对键）配对，各工作簿对在进程池中并行比较，
+        每对默认比较两侧同名的全部sheet。
+
+        Args:
+            dir1: 第一个目录
+            dir2: 第二个目录
+            **options: 可选参数，除以下选项外均传给每个sheet的 compare_excel
+                sheet_names: 每个工作簿中要比较的sheet名称列表，默认为两侧同名的全部sheet
+                pattern: 参与比较的文件名通配符，默认为'*.xlsx'
+                key_pattern: 从相对路径中提取配对键的正则表达式，默认按相对路径配对
+                recursive: 是否包含子目录，默认为False
+                workers: 并行进程数，默认为None（使用全部CPU核数），为1时在当前进程中顺序比较
+                max_pending: 同时提交的工作簿对数上限，默认为进程数的2倍
+                memory_budget: 同时比较的工作簿对估算内存之和的上限（字节），默认为物理内存的一半
+                skip_identical: 大小和整文件摘要一致的工作簿对是否直接判定相同而不解析，默认为True
+                    （摘要缓存在 fingerprint_dir，默认为临时目录，不写入被比较的目录）
+                output_dir: 差异输出目录，指定后每个sheet的差异写入 <配对键>__<sheet名>.jsonl
+
+        Returns:
+            包含 status、message、summary 和 pairs 的字典，见 CSVTool.compare_directories；
+            每个条目的 sheets 为各sheet的 compare_excel 结果，only_in_file1/only_in_file2 为只在一侧存在的sheet
+        """
+        self._logger.info(f"开始批量比较目录: {dir1} 和 {dir2}")
+
+        try:
+            entries = list(self.iter_compare_directories(dir1, dir2, **options))
+            result = batch_result(entries)
+            self._logger.info(result['message'])
+            return result
+
+        except Exception as e:
+            self._logger.error(f"批量比较目录失败: {str(e)}")
+            raise
+
+    def iter_compare_directories(self, dir1, dir2, **options):
+        """批量比较两个目录中的Excel工作簿，每个工作簿对比较完成后立即生成其结果条目，参数同 compare_directories"""
+        options = dict(options)
+        options.setdefault('pattern', '*.xlsx')
+        for entry in iter_batch_compare(_compare_excel_pair, dir1, dir2, options, dict(self._config),
+                                        EXCEL_MEMORY_FACTOR):
+            if entry['status'] == 'error':
+                self._logger.error(f"比较 {entry['name']} 失败: {entry['message']}")
+            else:
+                self._logger.debug("已比较 {}: {}，耗时: {}s", entry['name'], entry['status'], entry['seconds'])
+            yield entry
+
+    def _excel_diffs(self, excel1, excel2, sheet1, sheet2, **options):
+        """
+        计算两个Excel文件指定sheet的差异
+
+        Returns:
+            (keyed, diffs, error)：keyed 表示是否按键列比较，diffs 为 DiffResult 的迭代器；
+            列不一致时 error 为错误结果字典
+        """
+        key_columns = options.get('key_columns', [])
+        ignore_columns = options.get('ignore_columns', [])
+        fingerprint = options.get('fingerprint', False)
+
+        if fingerprint and sheet1 == sheet2:
+            fingerprint_dir = options.get('fingerprint_dir')
+            if FileFingerprint(excel1, fingerprint_dir).digest == FileFingerprint(excel2, fingerprint_dir).digest:
+                self._logger.info("两个文件的摘要一致，跳过解析")
+                return bool(key_columns), iter([]), None
+
+        cache = self._cache_for(options)
+        compare_columns = options.get('compare_columns')
+        read_options = {
+            'columns': None if compare_columns is None else [*key_columns, *compare_columns],
+            'ignore_columns': ignore_columns,
+            'dtype': options.get('dtype'),
+            'engine': self._parser_engine(options)
+        }
+
+        # 读取第一个Excel文件（忽略列和不需要比较的列不解析）
+        df1 = self._read_sheet(excel1, sheet1, cache, **read_options)
+        self._logger.info(f"已读取第一个Excel的sheet {sheet1}，行数: {len(df1)}")
+
+        # 读取第二个Excel文件
+        df2 = self._read_sheet(excel2, sheet2, cache, **read_options)
+        self._logger.info(f"已读取第二个Excel的sheet {sheet2}，行数: {len(df2)}")
+
+        # 检查列是否一致
+        if set(df1.columns) != set(df2.columns):
+            self._logger.warning("两个sheet的列不一致")
+            return False, None, {
+                'status': 'error',
+                'message': '列不一致',
+                'only_in_excel1': list(set(df1.columns) - set(df2.columns)),
+                'only_in_excel2': list(set(df2.columns) - set(df1.columns))
+            }
+
+        # 如果指定了键列，则按键列比较
+        if key_columns and all(col in df1.columns for col in key_columns):
+            # 设置索引进行比较
+            df1 = df1.set_index(key_columns)
+            df2 = df2.set_index(key_columns)
+            return True, iter([diff_keyed(df1, df2, value_columns=EXCEL_VALUE_COLUMNS)]), None
+
+        # 未指定键列时，直接比较整个数据框
+        df1 = df1.reset_index(drop=True)
+        df2 = df2.reset_index(drop=True)
+        if df1.equals(df2):
+            return False, iter([]), None
+        return False, iter([diff_positional(df1, df2, value_columns=EXCEL_VALUE_COLUMNS)]), None
@@ -0,0 +1,387 @@
+# simpletoolkit/filesystems/fingerprint_utils.py
+import csv
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .read_utils import read_csv_frame
+
+# 指纹索引文件（sidecar）的扩展名
+SIDECAR_SUFFIX = '.fpidx'
+# 指纹索引格式版本，格式变化时旧索引自动失效
+FINGERPRINT_VERSION = 3
+# 计算文件摘要时每次读取的字节数
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path, chunk_size=DIGEST_CHUNK_SIZE):
+    """计算文件内容的摘要，不解析文件"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def row_hash(fields):
+    """计算一行取值的64位哈希（跨进程稳定，可持久化）"""
+    data = '\x1f'.join(fields).encode('utf-8', 'surrogatepass')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def iter_csv_records(handle, on_bytes=None):
+    """
+    以二进制方式逐条读取CSV记录，生成 (字节偏移, 记录原始字节)
+
+    引号内的换行不会拆分记录；只支持与ASCII兼容的编码（如utf-8、gbk）。
+    on_bytes 回调会收到读取到的全部字节，可用于同时计算文件摘要。
+    """
+    offset = 0
+    start = 0
+    parts = []
+    quotes = 0
+    for line in handle:
+        if on_bytes is not None:
+            on_bytes(line)
+        if not parts:
+            start = offset
+        parts.append(line)
+        offset += len(line)
+        quotes += line.count(b'"')
+        if quotes % 2:
+            continue
+        yield start, b''.join(parts)
+        parts = []
+        quotes = 0
+
+    if parts:
+        yield start, b''.join(parts)
+
+
+def _encode_text(values):
+    """将文本列编码为 (UTF-8字节, 偏移) 两个数组，与Arrow的变长字符串布局相同"""
+    encoded = [value.encode('utf-8', 'surrogatepass') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)))
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _decode_text(data, offsets):
+    raw = data.tobytes()
+    bounds = offsets.tolist()
+    return [raw[start:end].decode('utf-8', 'surrogatepass') for start, end in zip(bounds, bounds[1:])]
+
+
+def save_state(path, state, frame=None):
+    """
+    原子地将状态字典（可JSON序列化）和可选的DataFrame写入 .npz 文件
+
+    文本列保存为UTF-8字节和偏移数组（按实际长度存储，不按最长取值定长），数值列保存为原始数组，
+    读取时不需要pickle，因此读取他人可写目录中的索引或快照不会执行任意代码。
+    """
+    arrays = {}
+    columns = []
+    if frame is not None:
+        for position, col in enumerate(frame.columns):
+            series = frame[col]
+            if pd.api.types.is_numeric_dtype(series.dtype):
+                numpy_dtype = getattr(series.dtype, 'numpy_dtype', series.dtype)
+                arrays[f'c{position}'] = series.to_numpy(dtype=numpy_dtype)
+                columns.append([col, str(series.dtype)])
+            else:
+                arrays[f'c{position}'], arrays[f'o{position}'] = _encode_text([str(value) for value in series.tolist()])
+                columns.append([col, 'utf8'])
+    meta = dict(state, columns=columns if frame is not None else None)
+    arrays['meta'] = np.array(json.dumps(meta, ensure_ascii=False))
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as handle:
+        np.savez(handle, **arrays)
+    os.replace(temp_path, path)
+
+
+def load_state(path):
+    """
+    读取 save_state 写入的文件
+
+    Returns:
+        (状态字典, DataFrame 或 None)；文件不存在或格式不正确时返回 (None, None)
+    """
+    try:
+        with np.load(path, allow_pickle=False) as arrays:
+            meta = json.loads(str(arrays['meta']))
+            columns = meta.pop('columns', None)
+            if columns is None:
+                return meta, None
+            frame = pd.DataFrame({
+                col: (pd.Series(_decode_text(arrays[f'c{position}'], arrays[f'o{position}']), dtype=object)
+                      if kind == 'utf8' else pd.Series(arrays[f'c{position}']).astype(kind))
+                for position, (col, kind) in enumerate(columns)
+            })
+    except (OSError, ValueError, KeyError, TypeError, UnicodeDecodeError):
+        return None, None
+    return meta, frame
+
+
+class FileFingerprint:
+    """
+    文件指纹：整文件摘要和按键列组织的行哈希索引
+
+    指纹保存在 sidecar 索引文件中，文件大小或修改时间变化时自动失效，
+    重复比较同一文件时可以直接复用。
+    """
+
+    def __init__(self, path, fingerprint_dir=None):
+        self.path = path
+        stat = os.stat(path)
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+
+        if fingerprint_dir:
+            name = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+            self.sidecar_path = os.path.join(fingerprint_dir, name + SIDECAR_SUFFIX)
+        else:
+            self.sidecar_path = path + SIDECAR_SUFFIX
+
+        self._digest = None
+        self._row_params = None
+        self._rows = None
+        self._header = None
+        self._load()
+
+    def _load(self):
+        """读取sidecar索引，大小或修改时间不一致时丢弃"""
+        state, rows = load_state(self.sidecar_path)
+        if state is None:
+            return
+
+        if (state.get('version') != FINGERPRINT_VERSION or state.get('path') != os.path.abspath(self.path)
+                or state.get('size') != self.size or state.get('mtime_ns') != self.mtime_ns):
+            return
+
+        self._digest = state.get('digest')
+        row_params = state.get('row_params')
+        self._row_params = None if row_params is None else (tuple(row_params[0]), tuple(row_params[1]),
+                                                             *row_params[2:])
+        self._rows = rows
+        self._header = state.get('header')
+
+    def save(self):
+        """写入sidecar索引，目录不可写时返回False（指纹仍可在本次比较中使用）"""
+        directory = os.path.dirname(self.sidecar_path)
+
+        state = {
+            'version': FINGERPRINT_VERSION,
+            'path': os.path.abspath(self.path),
+            'size': self.size,
+            'mtime_ns': self.mtime_ns,
+            'digest': self._digest,
+            'row_params': self._row_params,
+            'header': self._header
+        }
+        try:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            save_state(self.sidecar_path, state, self._rows)
+        except OSError:
+            return False
+        return True
+
+    @property
+    def digest(self):
+        """整文件摘要"""
+        if self._digest is None:
+            self._digest = file_digest(self.path)
+            self.save()
+        return self._digest
+
+    @property
+    def header(self):
+        """建立行哈希索引时读取的表头"""
+        return self._header
+
+    def row_index(self, key_columns, ignore_columns=(), delimiter=',', encoding='utf-8'):
+        """
+        获取CSV文件的行哈希索引
+
+        Returns:
+            DataFrame，包含键列（文本）、row_hash、offset 和 length 列；
+            row_hash 按列名排序后计算，不包含忽略列，因此与列顺序无关
+        """
+        params = (tuple(key_columns), tuple(sorted(ignore_columns)), delimiter, encoding)
+        if self._rows is not None and self._row_params == params:
+            return self._rows
+
+        digest = hashlib.blake2b(digest_size=16)
+        keys = [[] for _ in key_columns]
+        hashes, offsets, lengths = [], [], []
+
+        with open(self.path, 'rb') as handle:
+            records = iter_csv_records(handle, digest.update)
+            header_record = next(records, None)
+            header = self._parse_record(header_record[1], delimiter, encoding) if header_record else []
+            missing = [col for col in key_columns if col not in header]
+            if missing:
+                raise ValueError(f"键列不存在: {missing}")
+
+            key_index = [header.index(col) for col in key_columns]
+            hash_index = [header.index(col) for col in sorted(header) if col not in ignore_columns]
+            width = len(header)
+
+            for offset, record in records:
+                fields = self._parse_record(record, delimiter, encoding)
+                if not fields or fields == ['']:
+                    continue
+                if len(fields) < width:
+                    fields = fields + [''] * (width - len(fields))
+
+                for values, i in zip(keys, key_index):
+                    values.append(fields[i])
+                hashes.append(row_hash([fields[i] for i in hash_index]))
+                offsets.append(offset)
+                lengths.append(len(record))
+
+        rows = pd.DataFrame({col: pd.Series(values, dtype=object) for col, values in zip(key_columns, keys)})
+        rows['row_hash'] = pd.array(hashes, dtype='UInt64')
+        rows['offset'] = pd.array(offsets, dtype='Int64')
+        rows['length'] = pd.array(lengths, dtype='Int64')
+
+        self._digest = digest.hexdigest()
+        self._row_params = params
+        self._rows = rows
+        self._header = header
+        self.save()
+        return rows
+
+    @staticmethod
+    def _parse_record(record, delimiter, encoding):
+        text = record.decode(encoding).rstrip('\r\n')
+        return next(csv.reader([text], delimiter=delimiter), [])
+
+
+def changed_rows(rows1, rows2, key_columns):
+    """
+    根据两个行哈希索引找出需要重新解析的行
+
+    Returns:
+        (rows1 中哈希不同或仅存在于文件1的行, rows2 中哈希不同或仅存在于文件2的行)
+    """
+    merged = rows1.merge(rows2, on=list(key_columns), how='outer', suffixes=('_1', '_2'), indicator=True)
+    changed = (merged['_merge'] != 'both') | (merged['row_hash_1'] != merged['row_hash_2']).fillna(True)
+    merged = merged[changed.astype(bool)]
+
+    left = merged[merged['_merge'] != 'right_only']
+    right = merged[merged['_merge'] != 'left_only']
+    return (
+        left[['offset_1', 'length_1']].rename(columns={'offset_1': 'offset', 'length_1': 'length'}),
+        right[['offset_2', 'length_2']].rename(columns={'offset_2': 'offset', 'length_2': 'length'})
+    )
+
+
+def read_record_bytes(path, rows):
+    """按偏移读取指定行的原始字节"""
+    chunks = []
+    rows = rows.sort_values('offset')
+    with open(path, 'rb') as handle:
+        for offset, length in zip(rows['offset'].tolist(), rows['length'].tolist()):
+            handle.seek(offset)
+            record = handle.read(length)
+            chunks.append(record if record.endswith(b'\n') else record + b'\n')
+    return b''.join(chunks)
+
+
+def read_header_bytes(path):
+    """读取表头记录的原始字节"""
+    with open(path, 'rb') as handle:
+        record = next(iter_csv_records(handle), (0, b''))[1]
+    return record if record.endswith(b'\n') else record + b'\n'
+
+
+def read_changed_rows(file1, file2, rows1, rows2, header1, header2, delimiter=',', encoding='utf-8',
+                      usecols=None, dtype=None, engine='c'):
+    """
+    只解析两个文件中发生变化的行
+
+    表头顺序一致时两侧的行合并后一次解析，保证两侧的类型推断一致；
+    否则分别解析。usecols 和 dtype 透传给 read_csv，engine 为解析引擎（见 read_utils.PARSER_ENGINES）。
+
+    Returns:
+        (df1, df2)
+    """
+    body1 = read_record_bytes(file1, rows1)
+    body2 = read_record_bytes(file2, rows2)
+    read_options = {'delimiter': delimiter, 'encoding': encoding, 'usecols': usecols, 'dtype': dtype}
+
+    if header1 == header2:
+        data = read_header_bytes(file1) + body1 + body2
+        df = read_csv_frame(io.BytesIO(data), engine, **read_options)
+        return df.iloc[:len(rows1)], df.iloc[len(rows1):]
+
+    df1 = read_csv_frame(io.BytesIO(read_header_bytes(file1) + body1), engine, **read_options)
+    df2 = read_csv_frame(io.BytesIO(read_header_bytes(file2) + body2), engine, **read_options)
+    return df1, df2
+
+
+# 快照格式版本
+SNAPSHOT_VERSION = 3
+
+
+def build_row_hashes(path, key_columns, ignore_columns=(), delimiter=',', encoding='utf-8', chunk_size=100000):
+    """
+    分块读取CSV文件，计算每个键对应行内容的64位哈希
+
+    各列按原始文本参与哈希，列按名称排序，不包含忽略列，因此与列顺序无关。
+
+    Returns:
+        DataFrame，包含键列（文本）和 row_hash 列
+    """
+    parts = []
+    hash_columns = None
+    for chunk in pd.read_csv(path, delimiter=delimiter, encoding=encoding, dtype=str,
+                             keep_default_na=False, chunksize=chunk_size):
+        if hash_columns is None:
+            missing = [col for col in key_columns if col not in chunk.columns]
+            if missing:
+                raise ValueError(f"键列不存在: {missing}")
+            hash_columns = sorted(col for col in chunk.columns if col not in ignore_columns)
+
+        part = chunk[list(key_columns)].copy()
+        part['row_hash'] = pd.util.hash_pandas_object(chunk[hash_columns], index=False).to_numpy()
+        parts.append(part)
+
+    if not parts:
+        return pd.DataFrame({**{col: pd.Series(dtype=object) for col in key_columns},
+                             'row_hash': pd.Series(dtype='uint64')})
+    return pd.concat(parts, ignore_index=True)
+
+
+def load_snapshot(path, key_columns, ignore_columns=()):
+    """读取快照，文件不存在或键列、忽略列与本次不一致时返回 None"""
+    state, rows = load_state(path)
+    if state is None:
+        return None
+
+    if (state.get('version') != SNAPSHOT_VERSION or state.get('key_columns') != list(key_columns)
+            or state.get('ignore_columns') != sorted(ignore_columns)):
+        return None
+    state['rows'] = rows
+    return state
+
+
+def save_snapshot(path, rows, key_columns, ignore_columns=(), source=None):
+    """原子地写入快照"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    state = {
+        'version': SNAPSHOT_VERSION,
+        'key_columns': list(key_columns),
+        'ignore_columns': sorted(ignore_columns),
+        'source': source
+    }
+    save_state(path, state, rows)
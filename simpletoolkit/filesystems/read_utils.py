@@ -0,0 +1,123 @@
+# simpletoolkit/filesystems/read_utils.py
+import pandas as pd
+
+from ..base.logging_core import get_logger
+
+# 未传入日志记录器时使用的模块日志记录器
+_logger = get_logger('read_utils')
+
+
+def select_columns(header, key_columns=(), compare_columns=None, ignore_columns=()):
+    """
+    根据表头确定需要读取的列（保持表头中的顺序）
+
+    忽略列总是被排除；指定 compare_columns 时只保留键列和待比较的列。
+    """
+    ignored = set(ignore_columns)
+    wanted = None if compare_columns is None else set(compare_columns) | set(key_columns)
+    return [col for col in header if col not in ignored and (wanted is None or col in wanted)]
+
+
+def column_filter(columns=None, ignore_columns=()):
+    """
+    构建传给读取函数 usecols 参数的列过滤函数
+
+    Args:
+        columns: 需要读取的列，None 表示全部
+        ignore_columns: 不读取的列
+
+    Returns:
+        过滤函数；不需要过滤时返回 None
+    """
+    if columns is None and not ignore_columns:
+        return None
+    wanted = None if columns is None else set(columns)
+    ignored = set(ignore_columns)
+
+    def usecols(col):
+        return col not in ignored and (wanted is None or col in wanted)
+
+    return usecols
+
+
+# 支持的CSV解析引擎：'c' 为pandas默认的单线程解析器；'pyarrow' 为多线程的Arrow解析器，结果使用Arrow类型
+PARSER_ENGINES = ('c', 'pyarrow')
+
+
+def check_parser_engine(engine):
+    """检查解析引擎名称，不支持时抛出 ValueError"""
+    if engine not in PARSER_ENGINES:
+        raise ValueError(f"不支持的解析引擎: {engine}")
+    return engine
+
+
+def backend_options(engine):
+    """
+    解析引擎对应的类型后端参数
+
+    用于Arrow解析器不支持的读取（分块读取、Excel解析）：仍由原有解析器解析，
+    但结果与 pyarrow 引擎一样使用Arrow类型。
+    """
+    return {'dtype_backend': 'pyarrow'} if engine == 'pyarrow' else {}
+
+
+def read_csv_frame(source, engine='c', logger=None, **read_options):
+    """
+    按解析引擎读取整个CSV
+
+    pyarrow 引擎与 c 引擎的类型语义保持一致：Arrow会把 ISO 格式的日期推断为日期类型，
+    而 c 引擎保留为文本，因此先读取首个数据块的推断结果，把日期和时间列固定为文本。
+    Arrow只按首个数据块推断类型，后续数据块类型冲突（或使用了Arrow不支持的参数）时
+    回退到 c 引擎解析，结果仍使用Arrow类型。
+
+    Args:
+        source: 文件路径或可重复读取的二进制文件对象
+        engine: 解析引擎，见 PARSER_ENGINES
+        logger: 可选的日志记录器，回退到 c 引擎时记录警告
+        **read_options: 透传给 pd.read_csv 的参数
+    """
+    if check_parser_engine(engine) == 'c':
+        return pd.read_csv(source, **read_options)
+
+    read_options = dict(read_options, dtype_backend='pyarrow')
+    try:
+        dtype = _pin_temporal_columns(source, read_options)
+        _rewind(source)
+        return pd.read_csv(source, engine='pyarrow', **dict(read_options, dtype=dtype))
+    except ValueError as e:
+        # pyarrow.ArrowInvalid 也是 ValueError 的子类；回退会再完整解析一次文件
+        (logger or _logger).warning(f"pyarrow 引擎解析失败，改用 c 引擎重新解析: {e}")
+        _rewind(source)
+        return pd.read_csv(source, **read_options)
+
+
+def _pin_temporal_columns(source, read_options):
+    """返回在原有 dtype 基础上把Arrow推断为日期/时间的列固定为文本后的类型映射"""
+    dtype = read_options.get('dtype')
+    if dtype is not None and not isinstance(dtype, dict):
+        # 已为所有列指定统一类型
+        return dtype
+
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    reader = pa_csv.open_csv(
+        source,
+        read_options=pa_csv.ReadOptions(encoding=read_options.get('encoding') or 'utf-8'),
+        parse_options=pa_csv.ParseOptions(delimiter=read_options.get('delimiter', read_options.get('sep', ',')))
+    )
+    try:
+        schema = reader.schema
+    finally:
+        reader.close()
+
+    pinned = dict(dtype or {})
+    for field in schema:
+        if pa.types.is_temporal(field.type) and field.name not in pinned:
+            pinned[field.name] = pd.ArrowDtype(pa.string())
+    return pinned or None
+
+
+def _rewind(source):
+    if hasattr(source, 'seek'):
+        source.seek(0)
@@ -0,0 +1,177 @@
+# simpletoolkit/filesystems/sample_utils.py
+import csv
+import math
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+# 抽样时使用键哈希的低32位与阈值比较
+SAMPLE_HASH_BITS = 32
+# 默认抽样比例
+DEFAULT_SAMPLE_RATE = 0.01
+# 默认置信水平
+DEFAULT_CONFIDENCE = 0.95
+
+
+# 多项式哈希的乘数和 splitmix64 的混合常数
+POLY_MULTIPLIER = 0x100000001B3
+SPLITMIX_GAMMA = 0x9E3779B97F4A7C15
+SPLITMIX_MULTIPLIERS = (0xBF58476D1CE4E5B9, 0x94D049BB133111EB)
+# 流式读取时每个数据块的字节数
+DEFAULT_SAMPLE_BLOCK_SIZE = 16 * 1024 * 1024
+
+
+def _mix(values):
+    """splitmix64 混合函数（uint64 数组，溢出按模 2^64 回绕）"""
+    values = values + np.uint64(SPLITMIX_GAMMA)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(SPLITMIX_MULTIPLIERS[0])
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(SPLITMIX_MULTIPLIERS[1])
+    return values ^ (values >> np.uint64(31))
+
+
+def hash_text_array(array):
+    """
+    Arrow 文本数组中每个值的64位内容哈希
+
+    直接在文本数组的偏移量和数据缓冲区上做向量化的多项式哈希，再经 splitmix64 混合，
+    不逐个创建Python字符串。结果只取决于文本内容，在不同文件、不同进程之间一致。
+    """
+    import pyarrow as pa
+
+    if array.type != pa.string():
+        array = array.cast(pa.string())
+    _, offset_buffer, data_buffer = array.buffers()
+    offsets = np.frombuffer(offset_buffer, dtype=np.int32)[array.offset:array.offset + len(array) + 1]
+    offsets = offsets.astype(np.int64)
+    lengths = np.diff(offsets)
+    data = np.frombuffer(data_buffer, dtype=np.uint8) if data_buffer is not None else np.empty(0, np.uint8)
+    data = data[offsets[0]:offsets[-1]].astype(np.uint64)
+
+    # 每个字节在所属值内的位置，对应乘数的幂
+    positions = np.arange(data.size) - np.repeat(offsets[:-1] - offsets[0], lengths)
+    powers = np.cumprod(np.full(int(lengths.max(initial=0)) + 1, POLY_MULTIPLIER, dtype=np.uint64))
+    powers = np.concatenate([np.ones(1, np.uint64), powers[:-1]])
+    terms = (data + np.uint64(1)) * powers[positions]
+
+    cumulative = np.concatenate([np.zeros(1, np.uint64), np.cumsum(terms, dtype=np.uint64)])
+    sums = cumulative[offsets[1:] - offsets[0]] - cumulative[offsets[:-1] - offsets[0]]
+    return _mix(sums ^ (lengths.astype(np.uint64) * np.uint64(POLY_MULTIPLIER)))
+
+
+def hash_keys(batch, key_columns, seed=None):
+    """计算记录批中每行键列文本的64位哈希，seed 不同时哈希值不同"""
+    hashes = _mix(np.full(batch.num_rows, 0 if seed is None else int(seed), dtype=np.uint64))
+    for col in key_columns:
+        hashes = _mix(hashes * np.uint64(POLY_MULTIPLIER) + hash_text_array(batch.column(col)))
+    return hashes
+
+
+def sample_row_hashes(path, key_columns, sample_rate=DEFAULT_SAMPLE_RATE, hash_columns=None, seed=None,
+                      delimiter=',', encoding='utf-8', block_size=DEFAULT_SAMPLE_BLOCK_SIZE):
+    """
+    按键哈希确定性抽样，计算被抽中行的内容哈希（需要安装pyarrow）
+
+    用Arrow流式读取CSV，各列均按原始文本读取（空单元格为空文本），内存占用与文件大小无关。
+    每行按键列文本计算64位哈希，低32位小于 sample_rate 对应阈值的行被抽中。抽样只取决于键，
+    两个文件中相同的键总是同时被抽中或同时不被抽中，不需要关联两个文件。只有被抽中的行
+    计算内容哈希，内容哈希的各列按名称排序，与列顺序无关。
+
+    Args:
+        path: CSV文件路径
+        key_columns: 键列
+        sample_rate: 抽样比例，(0, 1]
+        hash_columns: 参与内容哈希的列，默认为全部列
+        seed: 抽样种子（整数），不同种子抽中不同的键，默认为None
+        delimiter: CSV分隔符
+        encoding: 文件编码
+        block_size: 流式读取时每个数据块的字节数
+
+    Returns:
+        (DataFrame(key_hash, row_hash)，键重复时保留最后一次出现的行；文件总行数)
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    if not 0 < sample_rate <= 1:
+        raise ValueError(f"抽样比例需在 (0, 1] 之间: {sample_rate}")
+
+    if hash_columns is None:
+        with open(path, 'r', newline='', encoding=encoding) as handle:
+            hash_columns = next(csv.reader(handle, delimiter=delimiter), [])
+    columns = list(dict.fromkeys([*key_columns, *sorted(hash_columns)]))
+
+    threshold = np.uint64(min(int(sample_rate * 2 ** SAMPLE_HASH_BITS), 2 ** SAMPLE_HASH_BITS))
+    mask = np.uint64(2 ** SAMPLE_HASH_BITS - 1)
+    reader = pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(encoding=encoding, block_size=block_size),
+        parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+        convert_options=pa_csv.ConvertOptions(include_columns=columns,
+                                              column_types={col: pa.string() for col in columns},
+                                              strings_can_be_null=False, null_values=[])
+    )
+
+    parts = []
+    total = 0
+    for batch in reader:
+        total += batch.num_rows
+        key_hash = hash_keys(batch, key_columns, seed)
+        selected = (key_hash & mask) < threshold
+        if not selected.any():
+            continue
+        sampled = batch.filter(pa.array(selected)).to_pandas()
+        parts.append(pd.DataFrame({
+            'key_hash': key_hash[selected],
+            'row_hash': pd.util.hash_pandas_object(sampled[sorted(hash_columns)], index=False).to_numpy()
+        }))
+
+    if not parts:
+        return pd.DataFrame({'key_hash': pd.Series(dtype='uint64'), 'row_hash': pd.Series(dtype='uint64')}), total
+    rows = pd.concat(parts, ignore_index=True)
+    return rows.drop_duplicates(subset='key_hash', keep='last'), total
+
+
+def wilson_interval(successes, trials, confidence=DEFAULT_CONFIDENCE):
+    """二项比例的 Wilson 置信区间，trials 为0时返回 (0.0, 1.0)"""
+    if trials == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+def estimate_difference(sample1, sample2, sample_rate, confidence=DEFAULT_CONFIDENCE):
+    """
+    根据两个文件的抽样行估计差异率
+
+    差异行为只在一侧被抽中的键（新增或删除）以及两侧内容哈希不同的键（修改），
+    差异率为差异行数占抽中键总数的比例。
+
+    Returns:
+        估计结果字典
+    """
+    merged = sample1.merge(sample2, on='key_hash', how='outer', suffixes=('_1', '_2'), indicator=True)
+    deleted = int((merged['_merge'] == 'left_only').sum())
+    inserted = int((merged['_merge'] == 'right_only').sum())
+    updated = int(((merged['_merge'] == 'both') & (merged['row_hash_1'] != merged['row_hash_2'])).sum())
+
+    sampled = len(merged)
+    different = deleted + inserted + updated
+    low, high = wilson_interval(different, sampled, confidence)
+    rate = different / sampled if sampled else 0.0
+    return {
+        'sample_rate': sample_rate,
+        'sampled_rows': sampled,
+        'different_rows': different,
+        'inserted': inserted,
+        'deleted': deleted,
+        'updated': updated,
+        'difference_rate': rate,
+        'confidence': confidence,
+        'difference_rate_bounds': (low, high),
+        'estimated_different_rows': round(different / sample_rate)
+    }
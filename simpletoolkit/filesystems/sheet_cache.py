@@ -0,0 +1,197 @@
+# simpletoolkit/filesystems/sheet_cache.py
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+# 内存中缓存的默认字节预算
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# 溢出到磁盘的默认字节上限
+DEFAULT_SPILL_MAX_BYTES = 4 * 1024 * 1024 * 1024
+# 溢出文件的扩展名（Feather列式格式）
+SPILL_SUFFIX = '.feather'
+
+
+def frame_nbytes(df):
+    """估算DataFrame占用的内存字节数（包含对象列中的字符串）"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class SheetCache:
+    """
+    已解析sheet的LRU缓存
+
+    缓存键为 (文件绝对路径, 文件大小, 修改时间, sheet, 读取参数)，文件变化后旧条目自然失效。
+    内存中的条目总大小超过预算时淘汰最久未使用的条目；指定 spill_dir 时被淘汰的条目
+    写为 Feather 文件（需要安装pyarrow），再次访问时从磁盘读回。
+
+    溢出文件按缓存键命名，溢出目录本身就是磁盘上的索引：其他进程（包括已退出或崩溃的进程）
+    溢出的条目同样可以命中，目录总大小按文件修改时间淘汰最旧的文件，不超过 spill_max_bytes。
+    列名不是文本或列中混合多种类型等无法写为Feather的DataFrame不溢出。
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_MAX_BYTES, spill_dir=None,
+                 spill_max_bytes=DEFAULT_SPILL_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = spill_max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()   # 键 -> (DataFrame, 字节数)
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def make_key(path, sheet_name, variant=None):
+        """variant 区分同一sheet按不同参数（列选择、类型映射等）读取的结果，需要可哈希"""
+        stat = os.stat(path)
+        return os.path.abspath(path), stat.st_size, stat.st_mtime_ns, sheet_name, variant
+
+    def get(self, path, sheet_name, variant=None):
+        """读取缓存的sheet，未命中时返回 None；返回的是副本，可以放心修改"""
+        key = self.make_key(path, sheet_name, variant)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[0].copy()
+
+            df = self._read_spill(key)
+            if df is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._store(key, df)
+            return df.copy()
+
+    def put(self, path, sheet_name, df, variant=None):
+        """缓存解析后的sheet（保存副本，调用方之后对 df 的修改不影响缓存）"""
+        key = self.make_key(path, sheet_name, variant)
+        with self._lock:
+            self._discard(key)
+            self._store(key, df.copy())
+
+    def clear(self):
+        """清空内存中的全部条目和溢出目录中的全部溢出文件"""
+        with self._lock:
+            for file_path, _, _ in self._spill_files():
+                self._remove_file(file_path)
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    def evict(self):
+        """溢出目录超过字节上限时按修改时间删除最旧的溢出文件，返回删除的文件数"""
+        entries = sorted(self._spill_files(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        removed = 0
+        for file_path, _, size in entries:
+            if total <= self.spill_max_bytes:
+                break
+            if self._remove_file(file_path):
+                total -= size
+                removed += 1
+        return removed
+
+    def __len__(self):
+        return len(self._memory) + len(self._spill_files())
+
+    @property
+    def memory_bytes(self):
+        return self._memory_bytes
+
+    @property
+    def disk_bytes(self):
+        return sum(size for _, _, size in self._spill_files())
+
+    def _store(self, key, df):
+        nbytes = frame_nbytes(df)
+        if nbytes > self.max_bytes:
+            # 单个条目超过内存预算时直接溢出或放弃缓存
+            self._spill(key, df)
+            return
+
+        self._memory[key] = (df, nbytes)
+        self._memory_bytes += nbytes
+        while self._memory_bytes > self.max_bytes:
+            old_key, (old_df, old_bytes) = self._memory.popitem(last=False)
+            self._memory_bytes -= old_bytes
+            self._spill(old_key, old_df)
+
+    def _discard(self, key):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[1]
+        if self.spill_dir:
+            self._remove_file(self._spill_path(key))
+
+    def _spill_path(self, key):
+        name = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.spill_dir, name + SPILL_SUFFIX)
+
+    def _spill_files(self):
+        """溢出目录中的溢出文件：[(路径, 修改时间, 字节数)]"""
+        if not self.spill_dir or not os.path.isdir(self.spill_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.spill_dir):
+            if not name.endswith(SPILL_SUFFIX):
+                continue
+            file_path = os.path.join(self.spill_dir, name)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            entries.append((file_path, stat.st_mtime_ns, stat.st_size))
+        return entries
+
+    def _spill(self, key, df):
+        if not self.spill_dir or not all(isinstance(col, str) for col in df.columns):
+            # feather 会把非文本列名转换为文本，读回后与解析结果不一致
+            return
+        try:
+            import pyarrow as pa
+            import pyarrow.feather as feather
+        except ImportError:
+            return
+
+        file_path = self._spill_path(key)
+        temp_path = f'{file_path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            feather.write_feather(df, temp_path)
+            os.replace(temp_path, file_path)
+        except (OSError, ValueError, TypeError, NotImplementedError, pa.ArrowException):
+            # 列中混合多种类型等无法写为feather时放弃溢出
+            self._remove_file(temp_path)
+            return
+        self.evict()
+
+    def _read_spill(self, key):
+        """读取并删除溢出文件（读回的条目重新放入内存），不存在或已损坏时返回 None"""
+        if not self.spill_dir:
+            return None
+        file_path = self._spill_path(key)
+        if not os.path.exists(file_path):
+            return None
+        try:
+            import pyarrow as pa
+            import pyarrow.feather as feather
+        except ImportError:
+            return None
+
+        try:
+            df = feather.read_table(file_path).to_pandas()
+        except (OSError, ValueError, pa.ArrowException):
+            df = None
+        self._remove_file(file_path)
+        return df
+
+    @staticmethod
+    def _remove_file(file_path):
+        try:
+            os.remove(file_path)
+        except OSError:
+            return False
+        return True
@@ -0,0 +1,173 @@
+# simpletoolkit/filesystems/sort_utils.py
+import csv
+import heapq
+import os
+import tempfile
+
+# 外部排序的默认内存预算（字节）
+DEFAULT_SORT_MEMORY_BUDGET = 256 * 1024 * 1024
+# 估算内存时每行、每个字段的额外开销（字节）
+ROW_OVERHEAD = 120
+FIELD_OVERHEAD = 56
+# 单次多路归并同时打开的有序段数量上限
+DEFAULT_MERGE_FANOUT = 128
+
+
+class _Descending:
+    """倒序比较的包装，用于在同一个排序键中混合升序和降序列"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def _value_key(value):
+    """数值按数值排序并排在文本之前，其余按文本排序；空值和NaN返回 None"""
+    if value == '':
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        return 1, value
+    return None if number != number else (0, number)
+
+
+def make_sort_key(header, sort_by, ascending=True):
+    """
+    根据表头构建行排序键函数
+
+    Args:
+        header: 表头列表
+        sort_by: 排序列名或列名列表
+        ascending: 排序方向，布尔值或与 sort_by 等长的布尔值列表
+
+    空值无论升序还是降序都排在最后，与 pandas 的 sort_values 一致。
+    """
+    if isinstance(sort_by, str):
+        sort_by = [sort_by]
+    if isinstance(ascending, bool):
+        ascending = [ascending] * len(sort_by)
+    if len(ascending) != len(sort_by):
+        raise ValueError("ascending 的长度必须与 sort_by 一致")
+
+    missing = [col for col in sort_by if col not in header]
+    if missing:
+        raise ValueError(f"排序列不存在: {missing}")
+
+    positions = [(header.index(col), asc) for col, asc in zip(sort_by, ascending)]
+
+    def sort_key(row):
+        key = []
+        for position, asc in positions:
+            value = _value_key(row[position] if position < len(row) else '')
+            if value is None:
+                key.append((1, 0))
+            else:
+                key.append((0, value if asc else _Descending(value)))
+        return tuple(key)
+
+    return sort_key
+
+
+def _estimate_row_size(row):
+    return ROW_OVERHEAD + sum(len(field) + FIELD_OVERHEAD for field in row)
+
+
+def _write_run(rows, work_dir, index, delimiter):
+    path = os.path.join(work_dir, f'run_{index}.csv')
+    with open(path, 'w', newline='', encoding='utf-8') as handle:
+        csv.writer(handle, delimiter=delimiter).writerows(rows)
+    return path
+
+
+def _read_run(path, delimiter):
+    with open(path, 'r', newline='', encoding='utf-8') as handle:
+        yield from csv.reader(handle, delimiter=delimiter)
+
+
+def external_sort(rows, sort_key, memory_budget=DEFAULT_SORT_MEMORY_BUDGET, temp_dir=None,
+                  delimiter=',', merge_fanout=DEFAULT_MERGE_FANOUT, logger=None):
+    """
+    对行进行外部排序
+
+    输入行按内存预算切分为有序段写入临时文件，再用堆进行多路归并，逐行生成排序结果。
+    全部数据在预算内时直接在内存中排序，不写临时文件。排序是稳定的。
+
+    Args:
+        rows: 行（字段列表）的可迭代对象
+        sort_key: 行排序键函数，见 make_sort_key
+        memory_budget: 内存预算（字节）
+        temp_dir: 临时有序段文件的存放目录，默认为系统临时目录
+        delimiter: 临时文件使用的分隔符
+        merge_fanout: 单次归并同时打开的有序段数量上限
+        logger: 可选的日志记录器
+
+    Yields:
+        排序后的行
+    """
+    with tempfile.TemporaryDirectory(prefix='csv_sort_', dir=temp_dir) as work_dir:
+        runs = []
+        buffer = []
+        buffer_size = 0
+
+        for row in rows:
+            buffer.append(row)
+            buffer_size += _estimate_row_size(row)
+            if buffer_size >= memory_budget:
+                buffer.sort(key=sort_key)
+                runs.append(_write_run(buffer, work_dir, len(runs), delimiter))
+                if logger is not None:
+                    logger.debug("已写出有序段 {}，行数: {}", len(runs), len(buffer))
+                buffer = []
+                buffer_size = 0
+
+        buffer.sort(key=sort_key)
+        if not runs:
+            yield from buffer
+            return
+
+        if buffer:
+            runs.append(_write_run(buffer, work_dir, len(runs), delimiter))
+        del buffer
+
+        yield from merge_runs(runs, sort_key, work_dir, delimiter, merge_fanout, logger)
+
+
+def merge_runs(runs, sort_key, work_dir, delimiter=',', merge_fanout=DEFAULT_MERGE_FANOUT, logger=None):
+    """
+    多路归并已排序的有序段文件，逐行生成归并结果
+
+    有序段为 utf-8 编码的CSV文件（不含表头）。有序段过多时先分多轮归并到 work_dir 中的
+    中间文件，控制同时打开的文件数；参与中间归并的有序段会被删除。键相同的行按有序段的顺序生成。
+
+    Args:
+        runs: 有序段文件路径列表
+        sort_key: 行排序键函数，见 make_sort_key
+        work_dir: 中间有序段的存放目录
+        delimiter: 有序段文件使用的分隔符
+        merge_fanout: 单次归并同时打开的有序段数量上限
+        logger: 可选的日志记录器
+    """
+    runs = list(runs)
+    next_index = len(runs)
+    while len(runs) > merge_fanout:
+        merged_runs = []
+        for start in range(0, len(runs), merge_fanout):
+            group = runs[start:start + merge_fanout]
+            merged = heapq.merge(*(_read_run(path, delimiter) for path in group), key=sort_key)
+            merged_runs.append(_write_run(merged, work_dir, next_index, delimiter))
+            next_index += 1
+            for path in group:
+                os.remove(path)
+        runs = merged_runs
+
+    if logger is not None:
+        logger.debug("开始多路归并 {} 个有序段", len(runs))
+    yield from heapq.merge(*(_read_run(path, delimiter) for path in runs), key=sort_key)
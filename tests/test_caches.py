@@ -0,0 +1,165 @@
+"""
+解析结果缓存测试：命中时结果与直接解析一致，文件修改后缓存失效
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from simpletoolkit.base.logging_core import set_log_level
+from simpletoolkit.filesystems.csv_tools import CSVTool
+from simpletoolkit.filesystems.excel_tools import ExcelTool
+from simpletoolkit.filesystems.sheet_cache import SheetCache
+
+set_log_level('WARNING')
+
+
+def touch_later(path):
+    """把文件的修改时间推后，保证按修改时间计算的缓存键发生变化"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def write_workbook(path, amounts):
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({'id': range(len(amounts)), 'amount': amounts}).to_excel(writer, sheet_name='s1', index=False)
+    return str(path)
+
+
+def write_csv(path, amounts, reverse=False):
+    df = pd.DataFrame({'id': range(len(amounts)), 'amount': amounts})
+    (df[::-1] if reverse else df).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def csv_pair(tmp_path):
+    # 第二个文件行序相反：按键比较相同，但内容摘要不同
+    return write_csv(tmp_path / 'a.csv', [1, 2, 3]), write_csv(tmp_path / 'b.csv', [1, 2, 3], reverse=True)
+
+
+@pytest.fixture
+def workbook_pair(tmp_path):
+    return write_workbook(tmp_path / 'a.xlsx', [1, 2, 3]), write_workbook(tmp_path / 'b.xlsx', [1, 2, 3])
+
+
+def test_sheet_cache_hit_matches_parse(workbook_pair):
+    tool = ExcelTool()
+    tool.configure(cache_sheets=True)
+    first = tool.compare_excel(*workbook_pair, 's1', 's1', key_columns=['id'])
+    assert tool.sheet_cache.hits == 0 and tool.sheet_cache.misses == 2
+
+    second = tool.compare_excel(*workbook_pair, 's1', 's1', key_columns=['id'])
+    assert tool.sheet_cache.hits == 2
+    assert second['status'] == first['status'] == 'same'
+
+
+def test_sheet_cache_invalidated_after_modification(workbook_pair):
+    tool = ExcelTool()
+    tool.configure(cache_sheets=True)
+    assert tool.compare_excel(*workbook_pair, 's1', 's1', key_columns=['id'])['status'] == 'same'
+
+    write_workbook(workbook_pair[1], [1, 2, 30])
+    touch_later(workbook_pair[1])
+    result = tool.compare_excel(*workbook_pair, 's1', 's1', key_columns=['id'])
+    assert result['status'] == 'different'
+    assert tool.sheet_cache.hits == 1 and tool.sheet_cache.misses == 3
+
+
+def test_sheet_cache_use_cache_false_bypasses_cache(workbook_pair):
+    tool = ExcelTool()
+    tool.configure(cache_sheets=True)
+    tool.compare_excel(*workbook_pair, 's1', 's1', key_columns=['id'], use_cache=False)
+    assert len(tool.sheet_cache) == 0
+
+
+def test_sheet_cache_spill_round_trip(tmp_path, workbook_pair):
+    spill_dir = tmp_path / 'spill'
+    cache = SheetCache(max_bytes=1, spill_dir=str(spill_dir))
+    df = pd.read_excel(workbook_pair[0], sheet_name='s1')
+    cache.put(workbook_pair[0], 's1', df)
+    assert cache.memory_bytes == 0 and cache.disk_bytes > 0
+    assert all(path.suffix == '.feather' for path in spill_dir.iterdir())
+
+    pd.testing.assert_frame_equal(cache.get(workbook_pair[0], 's1'), df)
+    touch_later(workbook_pair[0])
+    assert cache.get(workbook_pair[0], 's1') is None
+
+
+def test_sheet_cache_spill_shared_between_instances(tmp_path, workbook_pair):
+    spill_dir = str(tmp_path / 'spill')
+    df = pd.read_excel(workbook_pair[0], sheet_name='s1')
+    SheetCache(max_bytes=1, spill_dir=spill_dir).put(workbook_pair[0], 's1', df)
+
+    # 另一个进程（新的缓存实例）可以命中之前溢出的条目
+    cache = SheetCache(spill_dir=spill_dir)
+    pd.testing.assert_frame_equal(cache.get(workbook_pair[0], 's1'), df)
+    assert cache.hits == 1
+
+
+def test_sheet_cache_evicts_files_left_by_other_processes(tmp_path, workbook_pair):
+    spill_dir = tmp_path / 'spill'
+    spill_dir.mkdir()
+    # 之前的进程留下的溢出文件，修改时间早于本次溢出
+    for index in range(3):
+        stale = spill_dir / f'stale{index}.feather'
+        stale.write_bytes(b'x' * 1000)
+        os.utime(stale, ns=(0, index * 10 ** 9))
+    (spill_dir / 'notes.txt').write_text('keep')
+
+    cache = SheetCache(max_bytes=1, spill_dir=str(spill_dir), spill_max_bytes=2500)
+    df = pd.read_excel(workbook_pair[0], sheet_name='s1')
+    cache.put(workbook_pair[0], 's1', df)
+
+    remaining = sorted(path.name for path in spill_dir.iterdir())
+    assert 'stale0.feather' not in remaining and 'notes.txt' in remaining
+    assert cache.disk_bytes <= 2500
+    pd.testing.assert_frame_equal(cache.get(workbook_pair[0], 's1'), df)
+
+
+def test_sheet_cache_skips_frames_feather_cannot_store(tmp_path, workbook_pair):
+    spill_dir = tmp_path / 'spill'
+    cache = SheetCache(max_bytes=1, spill_dir=str(spill_dir))
+    cache.put(workbook_pair[0], 's1', pd.DataFrame({0: [1, 2]}))
+    cache.put(workbook_pair[1], 's1', pd.DataFrame({'mixed': [1, 'a']}))
+    assert len(cache) == 0
+    assert not spill_dir.exists() or not list(spill_dir.iterdir())
+
+
+@pytest.mark.parametrize('cache_key', ['stat', 'content'])
+def test_csv_cache_hit_and_invalidation(tmp_path, csv_pair, cache_key):
+    tool = CSVTool()
+    tool.configure(csv_cache=True, csv_cache_dir=str(tmp_path / 'cache'), csv_cache_key=cache_key)
+    assert tool.compare_csv(*csv_pair, key_columns=['id'])['status'] == 'same'
+    assert tool.csv_cache.hits == 0 and tool.csv_cache.misses == 2
+
+    assert tool.compare_csv(*csv_pair, key_columns=['id'])['status'] == 'same'
+    assert tool.csv_cache.hits == 2
+
+    write_csv(csv_pair[1], [1, 2, 30])
+    touch_later(csv_pair[1])
+    result = tool.compare_csv(*csv_pair, key_columns=['id'])
+    assert result['status'] == 'different'
+    assert tool.csv_cache.hits == 3 and tool.csv_cache.misses == 3
+
+
+@pytest.mark.parametrize('parser_engine', ['c', 'pyarrow'])
+@pytest.mark.parametrize('cache_format', ['feather', 'parquet'])
+def test_csv_cache_hit_matches_parse(tmp_path, csv_pair, parser_engine, cache_format):
+    tool = CSVTool()
+    tool.configure(csv_cache_dir=str(tmp_path / 'cache'), csv_cache_format=cache_format)
+    parsed, hit = tool.csv_cache.read_csv(csv_pair[0], engine=parser_engine)
+    assert not hit
+    cached, hit = tool.csv_cache.read_csv(csv_pair[0], engine=parser_engine)
+    assert hit
+    pd.testing.assert_frame_equal(cached, parsed)
+    # 不同解析引擎的结果类型不同，分别缓存
+    other = 'c' if parser_engine == 'pyarrow' else 'pyarrow'
+    assert not tool.csv_cache.read_csv(csv_pair[0], engine=other)[1]
+
+
+def test_csv_cache_disabled_by_default(tmp_path, csv_pair):
+    tool = CSVTool()
+    tool.configure(csv_cache_dir=str(tmp_path / 'cache'))
+    tool.compare_csv(*csv_pair, key_columns=['id'])
+    assert not os.path.exists(tmp_path / 'cache')
@@ -0,0 +1,339 @@
+"""
+CSV比较的差分测试：各比较模式与选项的结果应与整体读入内存（mode='memory'）一致
+"""
+import math
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from simpletoolkit.base.logging_core import set_log_level
+from simpletoolkit.filesystems.csv_tools import CSVTool
+from simpletoolkit.filesystems.fingerprint_utils import load_snapshot, save_snapshot
+from simpletoolkit.filesystems.sample_utils import sample_row_hashes
+
+set_log_level('WARNING')
+
+ROWS = 200
+
+
+def normalize_key(key):
+    """将不同模式返回的键（整数、整数值的浮点数、文本、缺失值）统一为文本"""
+    if isinstance(key, tuple):
+        return tuple(normalize_key(part) for part in key)
+    if key is None or (isinstance(key, float) and math.isnan(key)) or key == '':
+        return ''
+    if isinstance(key, str):
+        try:
+            key = float(key)
+        except ValueError:
+            return key
+    if isinstance(key, float) and key.is_integer():
+        return str(int(key))
+    return str(key)
+
+
+def changed_cells(result):
+    """差异单元格集合 {(键, 列)}"""
+    return {(normalize_key(row['key']), col) for row in result['differences'] for col in row['differences']}
+
+
+def make_frame(seed):
+    rng = np.random.default_rng(seed)
+    amount = rng.integers(0, 100, ROWS).astype(float)
+    amount[rng.random(ROWS) < 0.1] = np.nan
+    return pd.DataFrame({
+        'id': np.arange(ROWS),
+        'city': rng.choice(['北京', '上海', '广州'], ROWS),
+        'amount': pd.array(amount).astype('Int64'),
+        'score': rng.random(ROWS).round(6)
+    })
+
+
+@pytest.fixture
+def csv_pair(tmp_path):
+    df1 = make_frame(0)
+    df2 = df1.copy()
+    df2.loc[[3, 50, 120], 'city'] = '深圳'
+    df2.loc[[7, 50], 'score'] = -1.0
+    df2.loc[11, 'amount'] = pd.NA
+    df2 = df2.drop(index=[20, 21]).sample(frac=1, random_state=1)
+    extra = pd.DataFrame({'id': [ROWS, ROWS + 1], 'city': ['杭州', '杭州'], 'amount': [1, 2], 'score': [0.5, 0.5]})
+    df2 = pd.concat([df2, extra])
+
+    file1 = str(tmp_path / 'a.csv')
+    file2 = str(tmp_path / 'b.csv')
+    df1.to_csv(file1, index=False)
+    df2.to_csv(file2, index=False)
+    # 只在第二个文件中存在键为空的行，分块读取时该块的键列被推断为浮点数
+    with open(file2, 'a', encoding='utf-8') as handle:
+        handle.write(',成都,3,0.1\n')
+    return file1, file2
+
+
+@pytest.fixture
+def tool():
+    return CSVTool()
+
+
+@pytest.mark.parametrize('parser_engine', ['c', 'pyarrow'])
+@pytest.mark.parametrize('num_partitions', [1, 4])
+def test_partitioned_matches_memory(tool, csv_pair, parser_engine, num_partitions):
+    options = {'key_columns': ['id'], 'parser_engine': parser_engine}
+    expected = tool.compare_csv(*csv_pair, **options)
+    actual = tool.compare_csv(*csv_pair, mode='partitioned', num_partitions=num_partitions, chunk_size=37, **options)
+    assert actual['status'] == expected['status'] == 'different'
+    assert actual['message'] == expected['message']
+    assert changed_cells(actual) == changed_cells(expected)
+
+
+def test_partitioned_keys_with_blank_key_row(tool, tmp_path):
+    rows = ''.join(f'{i},v{i}\n' for i in range(20))
+    file1 = tmp_path / 'a.csv'
+    file2 = tmp_path / 'b.csv'
+    file1.write_text('id,val\n' + rows, encoding='utf-8')
+    file2.write_text('id,val\n' + rows + ',blank\n', encoding='utf-8')
+
+    for mode in ('memory', 'partitioned'):
+        result = tool.compare_csv(str(file1), str(file2), key_columns=['id'], mode=mode, num_partitions=4,
+                                  chunk_size=7)
+        assert result['message'] == '找到 1 行差异'
+        assert changed_cells(result) == {('', 'val')}
+
+
+@pytest.mark.parametrize('parser_engine', ['c', 'pyarrow'])
+def test_fingerprint_matches_memory(tool, csv_pair, tmp_path, parser_engine):
+    options = {'key_columns': ['id'], 'parser_engine': parser_engine}
+    expected = tool.compare_csv(*csv_pair, **options)
+    fingerprint_dir = str(tmp_path / 'fp')
+    # 第二次使用已保存的指纹索引
+    for _ in range(2):
+        actual = tool.compare_csv(*csv_pair, fingerprint=True, fingerprint_dir=fingerprint_dir, **options)
+        assert actual['message'] == expected['message']
+        assert changed_cells(actual) == changed_cells(expected)
+
+
+def test_blank_cells_are_equal_in_every_mode(tool, tmp_path):
+    file1 = tmp_path / 'a.csv'
+    file2 = tmp_path / 'b.csv'
+    file1.write_text('id,a,b\n1,,x\n2,,y\n3,,\n', encoding='utf-8')
+    file2.write_text('id,a,b\n1,,x\n2,,z\n4,,\n', encoding='utf-8')
+    expected = {('2', 'b'), ('3', 'a'), ('3', 'b'), ('4', 'a'), ('4', 'b')}
+
+    for options in ({}, {'fingerprint': True, 'fingerprint_dir': str(tmp_path / 'fp')},
+                    {'mode': 'partitioned', 'num_partitions': 2}, {'mode': 'sorted'}):
+        result = tool.compare_csv(str(file1), str(file2), key_columns=['id'], **options)
+        assert result['message'] == '找到 3 行差异', options
+        assert changed_cells(result) == expected, options
+
+
+def test_fingerprint_sidecar_is_not_pickle(tool, csv_pair, tmp_path):
+    import pickle
+
+    fingerprint_dir = tmp_path / 'fp'
+    tool.compare_csv(*csv_pair, key_columns=['id'], fingerprint=True, fingerprint_dir=str(fingerprint_dir))
+    sidecars = list(fingerprint_dir.iterdir())
+    assert len(sidecars) == 2
+    for sidecar in sidecars:
+        with open(sidecar, 'rb') as handle:
+            with pytest.raises(pickle.UnpicklingError):
+                pickle.load(handle)
+        with np.load(sidecar, allow_pickle=False) as arrays:
+            assert 'meta' in arrays
+
+
+def test_snapshot_round_trip(tool, csv_pair, tmp_path):
+    file1, file2 = csv_pair
+    snapshot = str(tmp_path / 'orders.snapshot')
+    baseline = tool.compare_with_snapshot(file1, snapshot, key_columns=['id'])
+    assert baseline['status'] == 'baseline'
+
+    result = tool.compare_with_snapshot(file2, snapshot, key_columns=['id'])
+    assert result['status'] == 'different'
+    assert tool.compare_with_snapshot(file2, snapshot, key_columns=['id'])['status'] == 'same'
+
+
+def test_snapshot_key_storage_is_compact(tmp_path):
+    # 一个很长的键不应让其余短键也按最长长度存储
+    keys = [f'k{i}' for i in range(20000)] + ['x' * 5000, '', '键\ud800']
+    rows = pd.DataFrame({'id': pd.Series(keys, dtype=object)})
+    rows['row_hash'] = np.arange(len(keys), dtype=np.uint64)
+    path = str(tmp_path / 'keys.snapshot')
+    save_snapshot(path, rows, ['id'])
+
+    assert os.path.getsize(path) < 1024 * 1024
+    loaded = load_snapshot(path, ['id'])['rows']
+    assert loaded['id'].tolist() == keys
+    assert loaded['row_hash'].tolist() == rows['row_hash'].tolist()
+
+
+@pytest.mark.parametrize('mode', ['memory', 'partitioned', 'sorted'])
+def test_iter_compare_batches_keep_rows_whole(tool, csv_pair, tmp_path, mode):
+    expected = tool.compare_csv(*csv_pair, key_columns=['id'])
+    file1, file2 = sorted_pair(csv_pair, tmp_path) if mode == 'sorted' else csv_pair
+
+    batches = list(tool.iter_compare_csv(file1, file2, key_columns=['id'], mode=mode, batch_size=3,
+                                         num_partitions=3))
+    assert sum(batch.row_count for batch in batches) == len(expected['differences'])
+    keys = [normalize_key(key) for batch in batches for key in pd.unique(batch.frame['key'])]
+    assert len(keys) == len(set(keys))
+
+
+@pytest.mark.parametrize('extension', ['jsonl', 'csv', 'parquet'])
+@pytest.mark.parametrize('mode', ['memory', 'partitioned'])
+def test_output_file_matches_memory(tool, csv_pair, tmp_path, extension, mode):
+    expected = tool.compare_csv(*csv_pair, key_columns=['id'])
+    output_file = str(tmp_path / f'diff.{extension}')
+    result = tool.compare_csv(*csv_pair, key_columns=['id'], mode=mode, num_partitions=3, output_file=output_file,
+                              batch_size=4)
+    assert result['difference_count'] == len(expected['differences'])
+    assert 'differences' not in result
+
+    if extension == 'jsonl':
+        written = pd.read_json(output_file, lines=True)
+    elif extension == 'csv':
+        written = pd.read_csv(output_file, keep_default_na=False)
+    else:
+        written = pd.read_parquet(output_file)
+    cells = {(normalize_key(key), col) for key, col in zip(written['key'], written['column'])}
+    assert cells == changed_cells(expected)
+
+
+def sorted_pair(csv_pair, tmp_path):
+    """按键列文本排序后的文件对（归并模式要求输入已排序）"""
+    paths = []
+    for index, path in enumerate(csv_pair):
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        sorted_path = str(tmp_path / f'sorted{index}.csv')
+        df.sort_values('id').to_csv(sorted_path, index=False)
+        paths.append(sorted_path)
+    return paths
+
+
+def test_sorted_matches_memory(tool, csv_pair, tmp_path):
+    expected = tool.compare_csv(*csv_pair, key_columns=['id'])
+    actual = tool.compare_csv(*sorted_pair(csv_pair, tmp_path), key_columns=['id'], mode='sorted')
+    assert actual['message'] == expected['message']
+    assert changed_cells(actual) == changed_cells(expected)
+
+
+def test_sorted_rejects_unsorted_input(tool, csv_pair):
+    with pytest.raises(ValueError):
+        tool.compare_csv(*csv_pair, key_columns=['id'], mode='sorted')
+
+
+@pytest.fixture
+def csv_dirs(csv_pair, tmp_path):
+    """两个导出目录：相同文件、不同文件、按日期后缀配对的文件和只在一侧存在的文件"""
+    dir1, dir2 = tmp_path / 'day1', tmp_path / 'day2'
+    dir1.mkdir()
+    dir2.mkdir()
+    shutil.copy(csv_pair[0], dir1 / 'same_20240101.csv')
+    shutil.copy(csv_pair[0], dir2 / 'same_20240102.csv')
+    shutil.copy(csv_pair[0], dir1 / 'orders_20240101.csv')
+    shutil.copy(csv_pair[1], dir2 / 'orders_20240102.csv')
+    shutil.copy(csv_pair[0], dir1 / 'old_20240101.csv')
+    shutil.copy(csv_pair[0], dir2 / 'new_20240102.csv')
+    return str(dir1), str(dir2)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_compare_directories(tool, csv_pair, csv_dirs, workers):
+    expected = tool.compare_csv(*csv_pair, key_columns=['id'])
+    result = tool.compare_directories(*csv_dirs, key_columns=['id'], key_pattern=r'(.*)_\d{8}\.csv',
+                                      workers=workers)
+
+    assert result['status'] == 'different'
+    assert result['summary'] == {'total': 4, 'same': 1, 'different': 1, 'error': 0, 'unmatched': 2, 'skipped': 1}
+    entries = {entry['name']: entry for entry in result['pairs']}
+    assert entries['same']['skipped']
+    assert entries['old']['file2'] is None and entries['new']['file1'] is None
+    assert changed_cells(entries['orders']['result']) == changed_cells(expected)
+    # 跳过相同文件时不在被比较的目录中留下指纹索引
+    for directory in csv_dirs:
+        assert sorted(os.listdir(directory)) == sorted(name for name in os.listdir(directory)
+                                                       if name.endswith('.csv'))
+
+
+def test_compare_directories_without_skip(tool, csv_dirs):
+    result = tool.compare_directories(*csv_dirs, key_columns=['id'], key_pattern=r'(.*)_\d{8}\.csv',
+                                      workers=1, skip_identical=False)
+    entries = {entry['name']: entry for entry in result['pairs']}
+    assert entries['same']['status'] == 'same' and not entries['same']['skipped']
+    assert result['summary']['skipped'] == 0
+
+
+def test_compare_directories_output_dir(tool, csv_pair, csv_dirs, tmp_path):
+    expected = tool.compare_csv(*csv_pair, key_columns=['id'])
+    output_dir = tmp_path / 'diffs'
+    result = tool.compare_directories(*csv_dirs, key_columns=['id'], key_pattern=r'(.*)_\d{8}\.csv',
+                                      workers=1, output_dir=str(output_dir))
+
+    assert sorted(os.listdir(output_dir)) == ['orders.jsonl']
+    entries = {entry['name']: entry for entry in result['pairs']}
+    assert 'differences' not in entries['orders']['result']
+    written = pd.read_json(output_dir / 'orders.jsonl', lines=True)
+    cells = {(normalize_key(key), col) for key, col in zip(written['key'], written['column'])}
+    assert cells == changed_cells(expected)
+
+
+@pytest.fixture
+def large_csv(tmp_path):
+    rows = 20000
+    df = pd.DataFrame({'id': np.arange(rows), 'region': np.arange(rows) % 7, 'value': np.arange(rows) * 3})
+    path = str(tmp_path / 'large.csv')
+    df.to_csv(path, index=False)
+    return path, df
+
+
+def test_approximate_identical_files_are_same(tool, large_csv, tmp_path):
+    copy = str(tmp_path / 'copy.csv')
+    shutil.copy(large_csv[0], copy)
+    result = tool.compare_csv(large_csv[0], copy, key_columns=['id'], mode='approximate', sample_rate=0.1)
+    assert result['status'] == 'same'
+    assert result['different_rows'] == 0
+    assert result['sampled_rows'] > 0
+    assert result['rows_file1'] == result['rows_file2'] == len(large_csv[1])
+
+
+def test_approximate_bounds_contain_injected_rate(tool, large_csv, tmp_path):
+    path, df = large_csv
+    changed = df.copy()
+    # 每10行修改一行，差异率为10%
+    changed.loc[changed['id'] % 10 == 3, 'value'] = -1
+    changed_path = str(tmp_path / 'changed.csv')
+    changed.to_csv(changed_path, index=False)
+
+    result = tool.compare_csv(path, changed_path, key_columns=['id'], mode='approximate', sample_rate=0.2)
+    assert result['status'] == 'different'
+    assert result['updated'] == result['different_rows']
+    assert abs(result['sampled_rows'] / len(df) - 0.2) < 0.02
+    low, high = result['difference_rate_bounds']
+    assert low <= 0.1 <= high
+
+
+def test_approximate_sampling_ignores_row_and_column_order(tool, large_csv, tmp_path):
+    path, df = large_csv
+    reordered_path = str(tmp_path / 'reordered.csv')
+    df[['value', 'id', 'region']].sample(frac=1, random_state=0).to_csv(reordered_path, index=False)
+
+    columns = ['id', 'region', 'value']
+    sample1, _ = sample_row_hashes(path, ['id'], 0.05, columns)
+    sample2, _ = sample_row_hashes(reordered_path, ['id'], 0.05, columns)
+    pd.testing.assert_frame_equal(sample1.sort_values('key_hash').reset_index(drop=True),
+                                  sample2.sort_values('key_hash').reset_index(drop=True))
+    result = tool.compare_csv(path, reordered_path, key_columns=['id'], mode='approximate', sample_rate=0.05)
+    assert result['status'] == 'same'
+
+
+def test_approximate_sample_seed_changes_sampled_keys(large_csv):
+    path, _ = large_csv
+    columns = ['id', 'region', 'value']
+    default, _ = sample_row_hashes(path, ['id'], 0.05, columns)
+    seeded, _ = sample_row_hashes(path, ['id'], 0.05, columns, seed=1)
+    same_seed, _ = sample_row_hashes(path, ['id'], 0.05, columns, seed=1)
+    assert set(seeded['key_hash']) == set(same_seed['key_hash'])
+    # 不同种子下同一行的键哈希不同，抽中的行也不同
+    assert set(seeded['row_hash']) != set(default['row_hash'])
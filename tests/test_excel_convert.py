@@ -0,0 +1,131 @@
+"""
+Excel转换CSV测试
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from simpletoolkit.base.logging_core import set_log_level
+from simpletoolkit.filesystems.excel_tools import ExcelTool
+
+set_log_level('WARNING')
+
+
+def write_workbook(path, sheets):
+    with pd.ExcelWriter(path) as writer:
+        for name, df in sheets.items():
+            df.to_excel(writer, sheet_name=name, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def workbooks(tmp_path):
+    source = tmp_path / 'source'
+    source.mkdir()
+    orders = write_workbook(source / 'orders.xlsx', {
+        'jan': pd.DataFrame({'id': range(5), 'amount': [1.5, 2.0, None, 4.25, 5.0]}),
+        'empty': pd.DataFrame(),
+        # 两个sheet的安全名称相同，输出文件重名
+        'q 1': pd.DataFrame({'id': [1]}),
+        'q1': pd.DataFrame({'id': [2]}),
+    })
+    users = write_workbook(source / 'users.xlsx', {'all': pd.DataFrame({'name': ['a', 'b', 'c']})})
+    broken = source / 'broken.xlsx'
+    broken.write_bytes(b'not a workbook')
+    return [orders, users, str(broken)]
+
+
+@pytest.mark.parametrize('engine', ['stream', 'pandas'])
+@pytest.mark.parametrize('workers', [1, 2])
+def test_convert_workbooks_manifest(tmp_path, workbooks, engine, workers):
+    output_dir = str(tmp_path / 'out')
+    manifest = ExcelTool().convert_workbooks_to_csv(workbooks, output_dir, engine=engine, workers=workers)
+
+    entries = {(os.path.basename(entry['workbook']), entry['sheet']): entry for entry in manifest}
+    # 清单按工作簿和sheet的顺序排列
+    assert list(entries) == [('orders.xlsx', 'jan'), ('orders.xlsx', 'empty'), ('orders.xlsx', 'q 1'),
+                             ('orders.xlsx', 'q1'), ('users.xlsx', 'all'), ('broken.xlsx', None)]
+
+    jan = entries[('orders.xlsx', 'jan')]
+    assert jan['status'] == 'success' and jan['rows'] == 5
+    assert len(pd.read_csv(jan['output_file'])) == 5
+    assert entries[('users.xlsx', 'all')]['rows'] == 3
+
+    empty = entries[('orders.xlsx', 'empty')]
+    assert empty['status'] == 'empty' and empty['rows'] == 0 and empty['output_file'] is None
+
+    assert entries[('orders.xlsx', 'q 1')]['status'] == 'success'
+    duplicate = entries[('orders.xlsx', 'q1')]
+    assert duplicate['status'] == 'error' and '重名' in duplicate['error']
+    assert pd.read_csv(entries[('orders.xlsx', 'q 1')]['output_file'])['id'].tolist() == [1]
+
+    broken = entries[('broken.xlsx', None)]
+    assert broken['status'] == 'error' and broken['error']
+
+    assert sorted(os.listdir(output_dir)) == ['orders__jan.csv', 'orders__q1.csv', 'users__all.csv']
+
+
+def test_convert_workbooks_glob_and_missing_sheet(tmp_path, workbooks):
+    manifest = ExcelTool().convert_workbooks_to_csv(str(tmp_path / 'source' / 'u*.xlsx'), str(tmp_path / 'out'),
+                                                    sheet_names=['all', 'missing'], workers=1)
+    assert [(entry['sheet'], entry['status']) for entry in manifest] == [('all', 'success'), ('missing', 'error')]
+
+
+@pytest.fixture
+def raw_workbook(tmp_path):
+    """用 openpyxl 直接构造的工作簿：包含空行、空表头单元格、重复列名、空sheet和只有表头的sheet"""
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    main = workbook.active
+    main.title = 'main'
+    for row in (['id', 'name', 'amount', 'ratio', None],
+                [1, 'a', 10, 0.5],
+                [2, None, None, 1.25],
+                [None, None, None, None],
+                [3, 'c', 30, 0.1],
+                [None, None],
+                [None]):
+        main.append(row)
+    names = workbook.create_sheet('names')
+    for row in (['key', None, 'key', 'key.1'], ['x', 'y', 'z', 'w'], ['中文', None, '', 'v']):
+        names.append(row)
+    workbook.create_sheet('blank')
+    workbook.create_sheet('header_only').append(['a', 'b'])
+    path = str(tmp_path / 'raw.xlsx')
+    workbook.save(path)
+    return path
+
+
+def test_split_stream_matches_pandas(tmp_path, raw_workbook):
+    tool = ExcelTool()
+    outputs = {}
+    for engine in ('pandas', 'stream'):
+        output_dir = tmp_path / engine
+        output_dir.mkdir()
+        assert tool.split_excel_to_csv(raw_workbook, str(output_dir), engine=engine)
+        outputs[engine] = output_dir
+
+    # 空sheet和只有表头的sheet都不生成文件
+    assert sorted(os.listdir(outputs['stream'])) == sorted(os.listdir(outputs['pandas'])) == [
+        'raw__main.csv', 'raw__names.csv']
+    for name in os.listdir(outputs['pandas']):
+        expected = pd.read_csv(outputs['pandas'] / name)
+        actual = pd.read_csv(outputs['stream'] / name)
+        # stream 引擎按原始值写出（整数写为 1 而不是 1.0），解析后的结果一致
+        pd.testing.assert_frame_equal(actual, expected)
+
+    # 文本sheet没有数值格式差异，输出逐字节一致
+    assert (outputs['stream'] / 'raw__names.csv').read_bytes() == (outputs['pandas'] / 'raw__names.csv').read_bytes()
+    assert (outputs['stream'] / 'raw__main.csv').read_text().splitlines()[:2] == ['id,name,amount,ratio', '1,a,10,0.5']
+
+
+def test_split_stream_na_rep_and_sheet_selection(tmp_path, raw_workbook):
+    output_dir = tmp_path / 'out'
+    output_dir.mkdir()
+    assert ExcelTool().split_excel_to_csv(raw_workbook, str(output_dir), engine='stream', sheet_names=['main'],
+                                          na_rep='', batch_size=2)
+    assert os.listdir(output_dir) == ['raw__main.csv']
+    lines = (output_dir / 'raw__main.csv').read_text().splitlines()
+    assert lines == ['id,name,amount,ratio', '1,a,10,0.5', '2,,,1.25', ',,,', '3,c,30,0.1']
@@ -0,0 +1,77 @@
+"""
+流式Excel读写测试
+"""
+import pandas as pd
+import pytest
+
+from simpletoolkit.base.logging_core import set_log_level
+from simpletoolkit.filesystems.csv_tools import CSVTool
+from simpletoolkit.filesystems.excel_stream import StreamingWorkbookWriter
+from simpletoolkit.filesystems.excel_tools import ExcelTool
+
+set_log_level('WARNING')
+
+
+def read_sheets(path):
+    """读取工作簿中的全部sheet，返回 {sheet名称: DataFrame}（保持sheet顺序）"""
+    return pd.read_excel(path, sheet_name=None)
+
+
+@pytest.mark.parametrize('rows', [0, 1, 4, 5, 13])
+def test_writer_rolls_over_without_losing_rows(tmp_path, rows):
+    path = str(tmp_path / 'out.xlsx')
+    with StreamingWorkbookWriter(path, sheet_name='Data', header=['id', 'name'], max_rows=5) as writer:
+        writer.writerows([index, f'n{index}'] for index in range(rows))
+
+    sheets = read_sheets(path)
+    # 每个sheet含表头最多5行，即4行数据
+    expected_sheets = max(1, -(-rows // 4))
+    assert list(sheets) == ['Data'] + [f'Data_{index}' for index in range(2, expected_sheets + 1)]
+    assert writer.sheet_names == list(sheets)
+    assert writer.row_count == rows
+    for df in sheets.values():
+        assert list(df.columns) == ['id', 'name']
+        assert len(df) <= 4
+    merged = pd.concat(sheets.values(), ignore_index=True)
+    assert merged['id'].tolist() == list(range(rows))
+
+
+def test_writer_truncates_long_sheet_names(tmp_path):
+    path = str(tmp_path / 'out.xlsx')
+    with StreamingWorkbookWriter(path, sheet_name='x' * 40, header=['id'], max_rows=2) as writer:
+        writer.writerows([index] for index in range(3))
+    assert all(len(name) <= 31 for name in writer.sheet_names)
+    assert writer.sheet_names[-1].endswith('_3')
+
+
+def test_writer_rejects_too_small_max_rows(tmp_path):
+    with pytest.raises(ValueError):
+        StreamingWorkbookWriter(str(tmp_path / 'out.xlsx'), max_rows=1)
+
+
+def test_csv_to_excel_stream_rolls_over(tmp_path):
+    csv_file = tmp_path / 'data.csv'
+    pd.DataFrame({'id': range(10), 'name': [f'n{index}' for index in range(10)]}).to_csv(csv_file, index=False)
+    excel_file = str(tmp_path / 'data.xlsx')
+    assert CSVTool().csv_to_excel(str(csv_file), excel_file, engine='stream', chunk_size=3, max_rows=4)
+
+    sheets = read_sheets(excel_file)
+    assert list(sheets) == ['Sheet1', 'Sheet1_2', 'Sheet1_3', 'Sheet1_4']
+    merged = pd.concat(sheets.values(), ignore_index=True)
+    pd.testing.assert_frame_equal(merged, pd.read_csv(csv_file))
+
+
+def test_merge_excel_stream_rolls_over(tmp_path):
+    workbook = str(tmp_path / 'book.xlsx')
+    with pd.ExcelWriter(workbook) as writer:
+        for sheet in ('s1', 's2'):
+            pd.DataFrame({'id': range(5)}).to_excel(writer, sheet_name=sheet, index=False)
+    output = str(tmp_path / 'merged.xlsx')
+    assert ExcelTool().merge_excel_sheets(workbook, output, engine='stream', max_rows=4)
+
+    sheets = read_sheets(output)
+    assert list(sheets) == ['Merged', 'Merged_2', 'Merged_3', 'Merged_4']
+    merged = pd.concat(sheets.values(), ignore_index=True)
+    assert list(merged.columns) == ['id', 'sheet_name']
+    assert merged['id'].tolist() == list(range(5)) * 2
+    assert merged['sheet_name'].tolist() == ['s1'] * 5 + ['s2'] * 5
@@ -0,0 +1,109 @@
+"""
+日志核心测试：sink去重、级别控制、延迟格式化和敏感信息过滤
+"""
+import pytest
+from loguru import logger as loguru_logger
+
+from simpletoolkit.base import logging_core
+from simpletoolkit.base.logging_core import ToolLogger, add_sink, get_logger, remove_sink, set_log_level
+
+TOOL = 'LoggingTestTool'
+
+
+class ListSink:
+    """收集指定工具日志消息的sink"""
+
+    def __init__(self):
+        self.messages = []
+
+    def write(self, message):
+        if message.record['extra'].get('tool') == TOOL:
+            self.messages.append(message.record['message'])
+
+
+class CountingArg:
+    """记录被格式化次数的消息参数"""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __format__(self, spec):
+        self.formatted += 1
+        return 'arg'
+
+
+@pytest.fixture
+def sink():
+    saved = logging_core._default_level_no, dict(logging_core._tool_levels)
+    list_sink = ListSink()
+    add_sink(list_sink, level='TRACE')
+    yield list_sink
+    remove_sink(list_sink)
+    logging_core._default_level_no = saved[0]
+    logging_core._tool_levels.clear()
+    logging_core._tool_levels.update(saved[1])
+
+
+def test_add_sink_registers_once(sink):
+    assert add_sink(sink, level='TRACE') == add_sink(sink, level='TRACE')
+    set_log_level('DEBUG', TOOL)
+    get_logger(TOOL).info('hello')
+    assert sink.messages == ['hello']
+
+
+def test_remove_sink_allows_registering_again(sink):
+    handler_id = add_sink(sink)
+    remove_sink(sink)
+    assert add_sink(sink, level='TRACE') != handler_id
+
+
+def test_global_and_tool_levels(sink):
+    tool_logger = get_logger(TOOL)
+    set_log_level('WARNING')
+    tool_logger.info('global info')
+    tool_logger.warning('global warning')
+
+    # 工具级别优先于全局级别，已创建的日志记录器立即生效
+    set_log_level('DEBUG', TOOL)
+    tool_logger.debug('tool debug')
+    other = get_logger('OtherLoggingTestTool')
+    assert not other.is_enabled_for('DEBUG')
+
+    set_log_level(None, TOOL)
+    tool_logger.info('after reset')
+    assert sink.messages == ['global warning', 'tool debug']
+
+
+def test_instance_level_overrides_tool_level(sink):
+    set_log_level('DEBUG', TOOL)
+    tool_logger = ToolLogger(TOOL)
+    tool_logger.set_level('ERROR')
+    tool_logger.warning('hidden')
+    tool_logger.error('shown')
+    tool_logger.set_level(None)
+    tool_logger.debug('restored')
+    assert sink.messages == ['shown', 'restored']
+
+
+def test_disabled_level_skips_formatting(sink):
+    set_log_level('WARNING', TOOL)
+    tool_logger = get_logger(TOOL)
+    arg = CountingArg()
+    tool_logger.debug('value: {}', arg)
+    tool_logger.info('value: {}', arg)
+    assert arg.formatted == 0
+    assert sink.messages == []
+
+    tool_logger.warning('value: {}', arg)
+    assert arg.formatted == 1
+    assert sink.messages == ['value: arg']
+
+
+def test_sensitive_messages_are_dropped(sink):
+    set_log_level('DEBUG', TOOL)
+    tool_logger = get_logger(TOOL)
+    tool_logger.info('access_key={}', 'AK123')
+    tool_logger.info('ordinary message')
+    # 直接通过 loguru 输出的消息由 sink 的过滤器拦截
+    loguru_logger.bind(tool=TOOL).info('secret_key=SK456')
+    assert sink.messages == ['ordinary message']
@@ -0,0 +1,138 @@
+"""
+CSV和Excel合并测试
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from simpletoolkit.base.logging_core import set_log_level
+from simpletoolkit.filesystems.csv_tools import CSVTool
+from simpletoolkit.filesystems.excel_tools import ExcelTool
+
+set_log_level('WARNING')
+
+
+def write_csv(path, text):
+    path.write_bytes(text.encode('utf-8'))
+    return str(path)
+
+
+@pytest.fixture
+def csv_files(tmp_path):
+    return [write_csv(tmp_path / 'a.csv', 'id,name\n3,c\n1,a\n'),
+            write_csv(tmp_path / 'b.csv', 'id,name\n2,b\n0,z\n')]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_merge_csv_sort_by_with_workers(tmp_path, csv_files, workers):
+    output = str(tmp_path / 'out.csv')
+    assert CSVTool().merge_csv_files(csv_files, output, sort_by=['id'], workers=workers)
+    assert pd.read_csv(output)['id'].tolist() == [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+@pytest.mark.parametrize('sort_by, ascending', [(['group', 'value'], [True, False]), (['group'], [True])])
+def test_merge_csv_external_sort_matches_pandas(tmp_path, workers, sort_by, ascending):
+    rng = np.random.default_rng(0)
+    files = []
+    frames = []
+    for index in range(3):
+        group = rng.integers(0, 10, 300).astype(float)
+        group[rng.random(300) < 0.05] = np.nan
+        df = pd.DataFrame({'group': pd.array(group).astype('Int64'),
+                           'value': rng.permutation(300) + index * 1000,
+                           'name': rng.choice(['a', 'b', 'c'], 300)})
+        path = str(tmp_path / f'part{index}.csv')
+        df.to_csv(path, index=False)
+        files.append(path)
+        frames.append(df)
+
+    output = str(tmp_path / 'sorted.csv')
+    # 很小的内存预算，数据切分为多个有序段后多路归并
+    # 只按 group 排序时键大量重复，结果应保持输入顺序（稳定排序）
+    assert CSVTool().merge_csv_files(files, output, sort_by=sort_by, ascending=ascending,
+                                     memory_budget=4096, temp_dir=str(tmp_path), workers=workers)
+    expected = pd.concat(frames, ignore_index=True).sort_values(
+        sort_by, ascending=ascending, na_position='last', kind='stable')
+    actual = pd.read_csv(output, dtype={'group': 'Int64'})
+    pd.testing.assert_frame_equal(actual, expected.reset_index(drop=True))
+    # 临时有序段已删除
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['part0.csv', 'part1.csv', 'part2.csv', 'sorted.csv']
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_merge_csv_workers_matches_sequential(tmp_path, ordered):
+    files = [write_csv(tmp_path / f'part{index}.csv',
+                       'id,name\n' + ''.join(f'{index * 100 + row},"x, {row}"\n' for row in range(50)))
+             for index in range(4)]
+    sequential = str(tmp_path / 'sequential.csv')
+    parallel = str(tmp_path / 'parallel.csv')
+    tool = CSVTool()
+    assert tool.merge_csv_files(files, sequential)
+    assert tool.merge_csv_files(files, parallel, workers=2, ordered=ordered, temp_dir=str(tmp_path))
+
+    with open(sequential, 'rb') as handle:
+        expected = handle.read()
+    with open(parallel, 'rb') as handle:
+        actual = handle.read()
+    if ordered:
+        assert actual == expected
+    else:
+        assert sorted(actual.splitlines()) == sorted(expected.splitlines())
+    # 临时文件已删除
+    assert not [path for path in tmp_path.iterdir() if path.is_dir()]
+
+
+def test_merge_csv_raw_copy_handles_headers_and_newlines(tmp_path):
+    files = [write_csv(tmp_path / 'a.csv', 'id,name\r\n1,"x\r\ny"\r\n2,b\r\n'),
+             write_csv(tmp_path / 'b.csv', 'id,name\r\n3,c'),
+             write_csv(tmp_path / 'c.csv', 'id,name\r\n'),
+             write_csv(tmp_path / 'd.csv', 'id,name\r\n4,d\r\n')]
+    tool = CSVTool()
+
+    output = tmp_path / 'raw.csv'
+    assert tool.merge_csv_files(files, str(output), raw_copy=True)
+    assert output.read_bytes() == b'id,name\r\n1,"x\r\ny"\r\n2,b\r\n3,c\r\n4,d\r\n'
+
+    output = tmp_path / 'raw_no_header.csv'
+    assert tool.merge_csv_files(files, str(output), raw_copy=True, header=False)
+    assert output.read_bytes() == b'1,"x\r\ny"\r\n2,b\r\n3,c\r\n4,d\r\n'
+
+
+def test_merge_csv_raw_copy_rejects_mismatched_header(tmp_path):
+    files = [write_csv(tmp_path / 'a.csv', 'id,name\n1,a\n'), write_csv(tmp_path / 'b.csv', 'name,id\na,1\n')]
+    with pytest.raises(ValueError):
+        CSVTool().merge_csv_files(files, str(tmp_path / 'out.csv'), raw_copy=True)
+    with pytest.raises(ValueError):
+        CSVTool().merge_csv_files(files[:1], str(tmp_path / 'out.csv'), raw_copy=True, sort_by=['id'])
+
+
+@pytest.fixture
+def workbooks(tmp_path):
+    paths = []
+    for index in range(3):
+        path = str(tmp_path / f'book{index}.xlsx')
+        with pd.ExcelWriter(path) as writer:
+            for sheet in ('s1', 's2'):
+                pd.DataFrame({'id': [index * 10 + len(sheet), index * 10 + 5], 'sheet': [sheet, sheet]}).to_excel(
+                    writer, sheet_name=sheet, index=False)
+        paths.append(path)
+    return paths
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_merge_excel_workers_matches_sequential(tmp_path, workbooks, ordered):
+    tool = ExcelTool()
+    sequential = str(tmp_path / 'sequential.csv')
+    parallel = str(tmp_path / 'parallel.csv')
+    assert tool.merge_excel_sheets(workbooks, sequential, use_cache=False)
+    assert tool.merge_excel_sheets(workbooks, parallel, workers=2, ordered=ordered, use_cache=False)
+
+    expected = pd.read_csv(sequential)
+    actual = pd.read_csv(parallel)
+    if ordered:
+        pd.testing.assert_frame_equal(actual, expected)
+    else:
+        columns = list(expected.columns)
+        pd.testing.assert_frame_equal(actual.sort_values(columns).reset_index(drop=True),
+                                      expected.sort_values(columns).reset_index(drop=True))
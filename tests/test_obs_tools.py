@@ -0,0 +1,507 @@
+"""
+HuaweiOBSTool 分段上传、分段下载、对象列举、目录同步和客户端池测试
+
+使用内存中的 FakeObsClient 代替OBS服务端，不访问网络。
+"""
+import hashlib
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from simpletoolkit.apis.huawei.obs_pool import ObsClientPool
+from simpletoolkit.apis.huawei.obs_tools import HuaweiOBSTool
+from simpletoolkit.apis.huawei.obs_transfer import (DOWNLOAD_CHECKPOINT_SUFFIX, DOWNLOAD_TEMP_SUFFIX, MIN_PART_SIZE,
+                                                    UPLOAD_CHECKPOINT_SUFFIX, parse_last_modified, plan_parts)
+
+PART_SIZE = MIN_PART_SIZE
+
+
+def response(status=200, **body):
+    return SimpleNamespace(status=status, body=SimpleNamespace(**body))
+
+
+class FakeObsClient:
+    """
+    OBS服务端的本地替身：分段保存在内存中，完成时按段号拼接为对象
+
+    fail_parts 中的段号上传失败；下载时按 PART_SIZE 换算出的段号失败。
+    """
+
+    def __init__(self, fail_parts=()):
+        self.objects = {}
+        self.etags = {}
+        self.modified = {}
+        self.uploads = {}
+        self.part_calls = []
+        self.range_calls = []
+        self.list_calls = 0
+        self.metadata_calls = 0
+        self.fail_parts = set(fail_parts)
+        self._lock = threading.Lock()
+
+    def put(self, bucket, key, data, etag=None):
+        self.objects[(bucket, key)] = data
+        self.etags[(bucket, key)] = etag or f'"{hashlib.md5(data).hexdigest()}"'
+        self.modified[(bucket, key)] = time.strftime('%Y/%m/%d %H:%M:%S', time.localtime())
+
+    def putFile(self, bucket, key, file_path):
+        with open(file_path, 'rb') as handle:
+            self.put(bucket, key, handle.read())
+        return response()
+
+    def getObjectMetadata(self, bucket, key):
+        self.metadata_calls += 1
+        if (bucket, key) not in self.objects:
+            return response(404)
+        return response(contentLength=len(self.objects[(bucket, key)]), etag=self.etags[(bucket, key)])
+
+    def getObject(self, bucket, key, downloadPath=None, headers=None, loadStreamInMemory=False):
+        if (bucket, key) not in self.objects:
+            return response(404)
+        data = self.objects[(bucket, key)]
+        if downloadPath is not None:
+            with open(downloadPath, 'wb') as handle:
+                handle.write(data)
+            return response()
+
+        if headers.if_match is not None and headers.if_match != self.etags[(bucket, key)]:
+            return response(412)
+        start, end = (int(value) for value in headers.range.split('-'))
+        number = start // PART_SIZE + 1
+        with self._lock:
+            self.range_calls.append(number)
+            if number in self.fail_parts:
+                return response(500)
+        return response(buffer=data[start:end + 1])
+
+    def listObjects(self, bucket, prefix=None, marker=None, max_keys=None):
+        with self._lock:
+            self.list_calls += 1
+        keys = sorted(key for name, key in self.objects
+                      if name == bucket and key.startswith(prefix or '') and key > (marker or ''))
+        page = keys[:max_keys or 1000]
+        contents = [SimpleNamespace(key=key, size=len(self.objects[(bucket, key)]), etag=self.etags[(bucket, key)],
+                                    lastModified=self.modified[(bucket, key)]) for key in page]
+        # 与未指定分隔符时的OBS一致，不返回 next_marker
+        return response(contents=contents, is_truncated=len(keys) > len(page), next_marker=None)
+
+    def initiateMultipartUpload(self, bucket, key):
+        with self._lock:
+            upload_id = f'upload-{len(self.uploads) + 1}'
+            self.uploads[upload_id] = {}
+        return response(uploadId=upload_id)
+
+    def uploadPart(self, bucket, key, partNumber, uploadId, object=None, isFile=False, partSize=None, offset=0):
+        with self._lock:
+            self.part_calls.append(partNumber)
+            if partNumber in self.fail_parts:
+                return response(500)
+        with open(object, 'rb') as handle:
+            handle.seek(offset)
+            data = handle.read(partSize)
+        etag = hashlib.md5(data).hexdigest()
+        with self._lock:
+            self.uploads[uploadId][partNumber] = (etag, data)
+        return response(etag=etag)
+
+    def listParts(self, bucket, key, uploadId, maxParts=None, partNumberMarker=None):
+        if uploadId not in self.uploads:
+            return response(404)
+        marker = partNumberMarker or 0
+        numbers = sorted(number for number in self.uploads[uploadId] if number > marker)
+        page = numbers[:2]
+        parts = [SimpleNamespace(partNumber=number, etag=self.uploads[uploadId][number][0]) for number in page]
+        truncated = len(numbers) > len(page)
+        return response(parts=parts, isTruncated=truncated, nextPartNumberMarker=page[-1] if page else None)
+
+    def completeMultipartUpload(self, bucket, key, uploadId, request):
+        stored = self.uploads.pop(uploadId)
+        data = b''
+        for part in request.parts:
+            etag, chunk = stored[part.partNum]
+            assert etag == part.etag
+            data += chunk
+        self.put(bucket, key, data, f'"{hashlib.md5(data).hexdigest()}-{len(request.parts)}"')
+        return response()
+
+    def abortMultipartUpload(self, bucket, key, uploadId):
+        self.uploads.pop(uploadId, None)
+        return response()
+
+
+def use_client(tool, client):
+    """让工具的客户端池只提供给定的替身客户端"""
+    tool._client_pool.reset(lambda: client)
+    return client
+
+
+@pytest.fixture
+def tool():
+    tool = HuaweiOBSTool(access_key='ak', secret_key='sk', region='cn-test-1')
+    yield tool
+    # 恢复按认证信息创建客户端
+    tool._client_settings = None
+    tool.configure()
+
+
+@pytest.fixture
+def local_file(tmp_path):
+    path = tmp_path / 'export.bin'
+    path.write_bytes(os.urandom(PART_SIZE * 5 + 123))
+    return str(path)
+
+
+def test_plan_parts_covers_file():
+    part_size, parts = plan_parts(PART_SIZE * 3 + 1, PART_SIZE)
+    assert part_size == PART_SIZE
+    assert [number for number, _, _ in parts] == [1, 2, 3, 4]
+    assert sum(length for _, _, length in parts) == PART_SIZE * 3 + 1
+    assert plan_parts(0)[1] == [(1, 0, 0)]
+
+
+def test_small_file_uses_put_file(tool, local_file):
+    client = use_client(tool, FakeObsClient())
+    assert tool.upload_file(local_file, 'bucket', 'small.bin')
+    assert not client.part_calls
+    assert client.objects[('bucket', 'small.bin')] == open(local_file, 'rb').read()
+
+
+def test_multipart_upload(tool, local_file):
+    client = use_client(tool, FakeObsClient())
+    assert tool.upload_file(local_file, 'bucket', 'big.bin', multipart=True, part_size=PART_SIZE, workers=3)
+    assert sorted(client.part_calls) == [1, 2, 3, 4, 5, 6]
+    assert client.objects[('bucket', 'big.bin')] == open(local_file, 'rb').read()
+    assert not os.path.exists(local_file + UPLOAD_CHECKPOINT_SUFFIX)
+
+
+def test_multipart_upload_resumes_from_checkpoint(tool, local_file):
+    client = use_client(tool, FakeObsClient(fail_parts={4}))
+    with pytest.raises(RuntimeError):
+        tool.upload_file(local_file, 'bucket', 'big.bin', multipart=True, part_size=PART_SIZE, workers=1,
+                         part_retries=1)
+    assert os.path.exists(local_file + UPLOAD_CHECKPOINT_SUFFIX)
+    assert ('bucket', 'big.bin') not in client.objects
+
+    client.fail_parts.clear()
+    client.part_calls.clear()
+    assert tool.upload_file(local_file, 'bucket', 'big.bin', multipart=True, part_size=PART_SIZE, workers=2)
+    assert sorted(client.part_calls) == [4, 5, 6]
+    assert client.objects[('bucket', 'big.bin')] == open(local_file, 'rb').read()
+    assert not os.path.exists(local_file + UPLOAD_CHECKPOINT_SUFFIX)
+
+
+def test_stale_upload_id_starts_over(tool, local_file):
+    client = use_client(tool, FakeObsClient(fail_parts={2}))
+    with pytest.raises(RuntimeError):
+        tool.upload_file(local_file, 'bucket', 'big.bin', multipart=True, part_size=PART_SIZE, workers=1,
+                         part_retries=0)
+
+    client.uploads.clear()
+    client.fail_parts.clear()
+    client.part_calls.clear()
+    assert tool.upload_file(local_file, 'bucket', 'big.bin', multipart=True, part_size=PART_SIZE)
+    assert sorted(client.part_calls) == [1, 2, 3, 4, 5, 6]
+    assert client.objects[('bucket', 'big.bin')] == open(local_file, 'rb').read()
+
+
+def test_ranged_download(tool, tmp_path):
+    client = use_client(tool, FakeObsClient())
+    data = os.urandom(PART_SIZE * 4 + 7)
+    client.put('bucket', 'big.bin', data)
+    target = str(tmp_path / 'out' / 'big.bin')
+    assert tool.download_file('bucket', 'big.bin', target, ranged=True, part_size=PART_SIZE, workers=3)
+    assert sorted(client.range_calls) == [1, 2, 3, 4, 5]
+    assert open(target, 'rb').read() == data
+    assert not os.path.exists(target + DOWNLOAD_TEMP_SUFFIX)
+    assert not os.path.exists(target + DOWNLOAD_CHECKPOINT_SUFFIX)
+
+
+def test_ranged_download_resumes_from_checkpoint(tool, tmp_path):
+    client = use_client(tool, FakeObsClient(fail_parts={3}))
+    data = os.urandom(PART_SIZE * 4 + 7)
+    client.put('bucket', 'big.bin', data)
+    target = str(tmp_path / 'big.bin')
+    with pytest.raises(RuntimeError):
+        tool.download_file('bucket', 'big.bin', target, ranged=True, part_size=PART_SIZE, workers=1,
+                           part_retries=0)
+    assert not os.path.exists(target)
+    assert os.path.exists(target + DOWNLOAD_CHECKPOINT_SUFFIX)
+
+    client.fail_parts.clear()
+    client.range_calls.clear()
+    assert tool.download_file('bucket', 'big.bin', target, ranged=True, part_size=PART_SIZE)
+    assert sorted(client.range_calls) == [3, 4, 5]
+    assert open(target, 'rb').read() == data
+
+
+def test_ranged_download_restarts_when_object_changes(tool, tmp_path):
+    client = use_client(tool, FakeObsClient(fail_parts={2}))
+    client.put('bucket', 'big.bin', os.urandom(PART_SIZE * 3))
+    target = str(tmp_path / 'big.bin')
+    with pytest.raises(RuntimeError):
+        tool.download_file('bucket', 'big.bin', target, ranged=True, part_size=PART_SIZE, workers=1,
+                           part_retries=0)
+
+    data = os.urandom(PART_SIZE * 3)
+    client.put('bucket', 'big.bin', data)
+    client.fail_parts.clear()
+    client.range_calls.clear()
+    assert tool.download_file('bucket', 'big.bin', target, ranged=True, part_size=PART_SIZE)
+    assert sorted(client.range_calls) == [1, 2, 3]
+    assert open(target, 'rb').read() == data
+
+
+def test_ranged_download_of_multipart_object(tool, local_file, tmp_path):
+    use_client(tool, FakeObsClient())
+    assert tool.upload_file(local_file, 'bucket', 'big.bin', multipart=True, part_size=PART_SIZE)
+    target = str(tmp_path / 'copy.bin')
+    assert tool.download_file('bucket', 'big.bin', target, ranged=True, part_size=PART_SIZE * 2)
+    assert open(target, 'rb').read() == open(local_file, 'rb').read()
+
+
+def test_download_with_known_size_skips_metadata(tool, tmp_path):
+    client = use_client(tool, FakeObsClient())
+    data = os.urandom(PART_SIZE * 2 + 3)
+    client.put('bucket', 'big.bin', data)
+    target = str(tmp_path / 'big.bin')
+    assert tool.download_file('bucket', 'big.bin', target, size=len(data), etag=client.etags[('bucket', 'big.bin')],
+                              multipart_threshold=PART_SIZE, part_size=PART_SIZE)
+    assert client.metadata_calls == 0
+    assert sorted(client.range_calls) == [1, 2, 3]
+    assert open(target, 'rb').read() == data
+
+
+def test_download_with_stale_etag_fails(tool, tmp_path):
+    client = use_client(tool, FakeObsClient())
+    data = os.urandom(PART_SIZE * 2)
+    client.put('bucket', 'big.bin', data)
+    etag = client.etags[('bucket', 'big.bin')]
+    client.put('bucket', 'big.bin', os.urandom(PART_SIZE * 2))
+    target = str(tmp_path / 'big.bin')
+    with pytest.raises(RuntimeError):
+        tool.download_file('bucket', 'big.bin', target, size=len(data), etag=etag, ranged=True,
+                           part_size=PART_SIZE, part_retries=0)
+    assert not os.path.exists(target)
+
+
+def test_small_object_uses_single_get(tool, tmp_path):
+    client = use_client(tool, FakeObsClient())
+    client.put('bucket', 'small.bin', b'hello')
+    target = str(tmp_path / 'small.bin')
+    assert tool.download_file('bucket', 'small.bin', target)
+    assert not client.range_calls
+    assert open(target, 'rb').read() == b'hello'
+
+
+@pytest.mark.parametrize('prefetch', [True, False])
+def test_iter_objects_follows_pages(tool, prefetch):
+    client = use_client(tool, FakeObsClient())
+    for index in range(25):
+        client.put('bucket', f'data/{index:03d}.csv', b'x' * index)
+    client.put('bucket', 'other/readme.txt', b'')
+
+    objects = list(tool.iter_objects('bucket', 'data/', page_size=10, prefetch=prefetch))
+    assert [obj['key'] for obj in objects] == [f'data/{index:03d}.csv' for index in range(25)]
+    assert [obj['size'] for obj in objects] == list(range(25))
+    assert objects[3]['etag'] == client.etags[('bucket', 'data/003.csv')]
+    assert objects[0]['last_modified']
+    assert client.list_calls == 3
+
+    assert len(tool.list_objects('bucket', page_size=7)) == 26
+    assert tool.list_objects('bucket', 'data/', marker='data/020.csv') == [f'data/{i:03d}.csv' for i in range(21, 25)]
+
+
+def test_iter_objects_raises_on_failed_page(tool):
+    client = use_client(tool, FakeObsClient())
+    client.listObjects = lambda *args, **kwargs: response(403)
+    with pytest.raises(RuntimeError):
+        tool.list_objects('bucket')
+
+
+def write_tree(root, files):
+    for name, data in files.items():
+        path = os.path.join(root, *name.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as handle:
+            handle.write(data)
+
+
+def test_sync_up_transfers_only_changes(tool, tmp_path):
+    client = use_client(tool, FakeObsClient())
+    local_dir = str(tmp_path / 'local')
+    write_tree(local_dir, {'a.csv': b'aaaa', 'b.csv': b'bbbbbb', 'sub/c.csv': b'cc', 'sub/d.csv': b'dddd'})
+
+    result = tool.sync_up(local_dir, 'bucket', 'exports', workers=2)
+    assert result['status'] == 'success'
+    assert result['summary']['transferred'] == 4
+    assert result['summary']['bytes_transferred'] == 16
+    assert client.objects[('bucket', 'exports/sub/c.csv')] == b'cc'
+
+    result = tool.sync_up(local_dir, 'bucket', 'exports/')
+    assert result['summary']['skipped'] == 4
+    assert result['summary']['bytes_skipped'] == 16
+
+    write_tree(local_dir, {'a.csv': b'AAAA', 'e.csv': b'e'})
+    result = tool.sync_up(local_dir, 'bucket', 'exports')
+    transferred = [entry['name'] for entry in result['files'] if entry['action'] == 'transferred']
+    assert transferred == ['a.csv', 'e.csv']
+    assert result['summary']['bytes_transferred'] == 5
+    assert result['summary']['bytes_skipped'] == 12
+    assert client.objects[('bucket', 'exports/a.csv')] == b'AAAA'
+
+
+def test_sync_up_uses_mtime_for_multipart_objects(tool, tmp_path):
+    client = use_client(tool, FakeObsClient())
+    local_dir = str(tmp_path / 'local')
+    write_tree(local_dir, {'big.bin': os.urandom(PART_SIZE * 2)})
+    options = {'transfer_options': {'multipart': True, 'part_size': PART_SIZE}}
+    assert tool.sync_up(local_dir, 'bucket', '', **options)['summary']['transferred'] == 1
+    assert '-' in client.etags[('bucket', 'big.bin')]
+    assert tool.sync_up(local_dir, 'bucket', '', **options)['summary']['skipped'] == 1
+
+    path = os.path.join(local_dir, 'big.bin')
+    os.utime(path, (time.time() + 60, time.time() + 60))
+    assert tool.sync_up(local_dir, 'bucket', '', **options)['summary']['transferred'] == 1
+
+
+def test_sync_down_transfers_only_changes(tool, tmp_path):
+    client = use_client(tool, FakeObsClient())
+    client.put('bucket', 'exports/a.csv', b'aaaa')
+    client.put('bucket', 'exports/sub/b.csv', b'bb')
+    client.put('bucket', 'exports/sub/', b'')
+    client.put('bucket', 'other/c.csv', b'c')
+    local_dir = str(tmp_path / 'local')
+
+    result = tool.sync_down('bucket', 'exports', local_dir)
+    assert result['summary']['transferred'] == 2
+    assert result['summary']['bytes_transferred'] == 6
+    assert open(os.path.join(local_dir, 'sub', 'b.csv'), 'rb').read() == b'bb'
+
+    assert tool.sync_down('bucket', 'exports', local_dir, check='mtime')['summary']['skipped'] == 2
+
+    client.put('bucket', 'exports/a.csv', b'AAAA')
+    result = tool.sync_down('bucket', 'exports', local_dir)
+    assert [entry['name'] for entry in result['files'] if entry['action'] == 'transferred'] == ['a.csv']
+    assert open(os.path.join(local_dir, 'a.csv'), 'rb').read() == b'AAAA'
+
+
+def test_sync_down_uses_listed_size_and_etag(tool, tmp_path):
+    client = use_client(tool, FakeObsClient())
+    data = os.urandom(PART_SIZE * 2 + 1)
+    client.put('bucket', 'exports/big.bin', data)
+    client.put('bucket', 'exports/small.csv', b'small')
+    local_dir = str(tmp_path / 'local')
+
+    options = {'transfer_options': {'multipart_threshold': PART_SIZE, 'part_size': PART_SIZE}}
+    assert tool.sync_down('bucket', 'exports', local_dir, **options)['summary']['transferred'] == 2
+    assert client.metadata_calls == 0
+    assert sorted(client.range_calls) == [1, 2, 3]
+    assert open(os.path.join(local_dir, 'big.bin'), 'rb').read() == data
+
+
+def test_sync_reports_failed_files(tool, tmp_path):
+    client = use_client(tool, FakeObsClient())
+    local_dir = str(tmp_path / 'local')
+    write_tree(local_dir, {'a.csv': b'a', 'b.csv': b'b'})
+    put_file = client.putFile
+    client.putFile = lambda bucket, key, path: response(500) if key == 'b.csv' else put_file(bucket, key, path)
+
+    result = tool.sync_up(local_dir, 'bucket')
+    assert result['status'] == 'error'
+    assert result['summary']['transferred'] == 1
+    assert result['summary']['failed'] == 1
+
+
+class CountingClient:
+    """记录并发调用数的客户端替身"""
+
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    def headObject(self, bucket, key):
+        with CountingClient.lock:
+            CountingClient.active += 1
+            CountingClient.peak = max(CountingClient.peak, CountingClient.active)
+        time.sleep(0.01)
+        with CountingClient.lock:
+            CountingClient.active -= 1
+        return self.name
+
+    def close(self):
+        self.closed = True
+
+
+def test_client_pool_is_bounded_and_reuses_clients():
+    created = []
+
+    def factory():
+        created.append(CountingClient(f'client-{len(created)}'))
+        return created[-1]
+
+    pool = ObsClientPool(factory, size=3)
+    CountingClient.peak = 0
+
+    def call(_):
+        with pool.client() as client:
+            return client.headObject('bucket', 'key')
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        names = list(executor.map(call, range(40)))
+    assert len(created) == 3
+    assert CountingClient.peak <= 3
+    assert set(names) == {client.name for client in created}
+
+
+def test_client_pool_reset_replaces_clients():
+    pool = ObsClientPool(lambda: CountingClient('old'), size=2)
+    with pool.client() as in_use:
+        with pool.client() as idle:
+            pass
+        pool.reset(lambda: CountingClient('new'))
+        assert idle.closed
+        assert not in_use.closed
+        with pool.client() as client:
+            assert client.name == 'new'
+    assert in_use.closed
+    assert pool.created == 1
+
+
+def test_configure_rebuilds_pool_only_when_settings_change(tool):
+    client = use_client(tool, FakeObsClient())
+    tool.configure(access_key='ak', secret_key='sk', region='cn-test-1')
+    with tool._client_pool.client() as current:
+        assert current is client
+
+    tool.configure(region='cn-test-2', pool_size=4)
+    assert tool._client_pool.size == 4
+    with tool._client_pool.client() as current:
+        assert current is not client
+        assert 'cn-test-2' in current.server
+
+
+@pytest.fixture
+def daylight_saving_tz(monkeypatch):
+    if not hasattr(time, 'tzset'):
+        pytest.skip('需要 time.tzset')
+    monkeypatch.setenv('TZ', 'America/New_York')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_parse_last_modified_utc_ignores_daylight_saving(daylight_saving_tz):
+    assert parse_last_modified('2024-07-01T12:00:00.000Z') == 1719835200
+    assert parse_last_modified('2024-01-01T12:00:00.000Z') == 1704110400
+    # 本地时间格式按本地时区解析
+    assert parse_last_modified('2024/07/01 08:00:00') == 1719835200
+    assert parse_last_modified('not a date') is None
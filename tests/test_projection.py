@@ -0,0 +1,152 @@
+"""
+列选择与类型映射测试：被排除的列不传给解析器，dtype 映射不改变比较和合并的结果
+"""
+import pandas as pd
+import pytest
+
+from simpletoolkit.base.logging_core import set_log_level
+from simpletoolkit.filesystems.csv_tools import CSVTool
+from simpletoolkit.filesystems.excel_tools import ExcelTool
+
+set_log_level('WARNING')
+
+DTYPE_MAP = {'id': 'int32', 'city': 'category', 'name': 'string[pyarrow]'}
+
+
+def make_frames():
+    ids = list(range(1, 41))
+    base = pd.DataFrame({
+        'id': ids,
+        'name': [f'name{i}' if i % 7 else None for i in ids],
+        'city': [['bj', 'sh', 'gz'][i % 3] for i in ids],
+        'secret': [f'token{i}' for i in ids],
+    })
+    other = base.copy()
+    other.loc[other['id'] == 3, 'name'] = 'renamed'
+    other.loc[other['id'] == 5, 'city'] = 'sz'
+    other.loc[other['id'] == 7, 'name'] = 'filled'
+    other['secret'] = 'changed'
+    return base, other
+
+
+def changed_cells(result):
+    return {(int(row['key']), col) for row in result['differences'] for col in row['differences']}
+
+
+@pytest.fixture
+def csv_pair(tmp_path):
+    base, other = make_frames()
+    paths = (str(tmp_path / 'a.csv'), str(tmp_path / 'b.csv'))
+    base.to_csv(paths[0], index=False)
+    other.to_csv(paths[1], index=False)
+    return paths
+
+
+@pytest.fixture
+def excel_pair(tmp_path):
+    base, other = make_frames()
+    paths = (str(tmp_path / 'a.xlsx'), str(tmp_path / 'b.xlsx'))
+    base.to_excel(paths[0], sheet_name='data', index=False)
+    other.to_excel(paths[1], sheet_name='data', index=False)
+    return paths
+
+
+@pytest.fixture
+def read_csv_spy(monkeypatch):
+    calls = []
+    original = pd.read_csv
+
+    def spy(*args, **kwargs):
+        calls.append(kwargs.get('usecols'))
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(pd, 'read_csv', spy)
+    return calls
+
+
+@pytest.fixture
+def parse_spy(monkeypatch):
+    calls = []
+    original = pd.ExcelFile.parse
+
+    def spy(self, *args, **kwargs):
+        calls.append(kwargs.get('usecols'))
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(pd.ExcelFile, 'parse', spy)
+    return calls
+
+
+def assert_excluded(usecols, excluded, included):
+    """usecols 为列名列表或判断函数，被排除的列不应被选中"""
+    assert usecols is not None
+    selected = usecols if callable(usecols) else usecols.__contains__
+    for col in excluded:
+        assert not selected(col)
+    for col in included:
+        assert selected(col)
+
+
+@pytest.mark.parametrize('mode', ['memory', 'partitioned'])
+@pytest.mark.parametrize('options', [{'ignore_columns': ['secret']}, {'compare_columns': ['name', 'city']}])
+def test_compare_csv_does_not_read_excluded_columns(csv_pair, read_csv_spy, mode, options):
+    result = CSVTool().compare_csv(*csv_pair, key_columns=['id'], mode=mode, use_cache=False, **options)
+
+    assert changed_cells(result) == {(3, 'name'), (5, 'city'), (7, 'name')}
+    data_reads = [usecols for usecols in read_csv_spy if usecols is not None]
+    assert data_reads
+    for usecols in data_reads:
+        assert_excluded(usecols, ['secret'], ['id'])
+
+
+@pytest.mark.parametrize('options', [{'ignore_columns': ['secret']}, {'compare_columns': ['name', 'city']}])
+def test_compare_excel_does_not_parse_excluded_columns(excel_pair, parse_spy, options):
+    result = ExcelTool().compare_excel(*excel_pair, 'data', 'data', key_columns=['id'], use_cache=False, **options)
+
+    assert changed_cells(result) == {(3, 'name'), (5, 'city'), (7, 'name')}
+    assert len(parse_spy) == 2
+    for usecols in parse_spy:
+        assert_excluded(usecols, ['secret'], ['id', 'name', 'city'])
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_merge_excel_does_not_parse_ignored_columns(tmp_path, excel_pair, parse_spy, workers):
+    output = str(tmp_path / 'merged.csv')
+    assert ExcelTool().merge_excel_sheets(list(excel_pair), output, ignore_columns=['secret'], workers=workers,
+                                          use_cache=False)
+
+    assert 'secret' not in pd.read_csv(output).columns
+    # 多进程时解析在工作进程中执行，主进程中的替身记录不到调用
+    assert len(parse_spy) == (2 if workers == 1 else 0)
+    for usecols in parse_spy:
+        assert_excluded(usecols, ['secret'], ['id', 'name', 'city'])
+
+
+@pytest.mark.parametrize('mode', ['memory', 'partitioned'])
+def test_compare_csv_dtype_map_matches_default(csv_pair, mode):
+    tool = CSVTool()
+    default = tool.compare_csv(*csv_pair, key_columns=['id'], mode=mode, use_cache=False)
+    typed = tool.compare_csv(*csv_pair, key_columns=['id'], mode=mode, use_cache=False, dtype=DTYPE_MAP)
+
+    assert changed_cells(typed) == changed_cells(default)
+    assert typed['status'] == default['status'] == 'different'
+
+
+def test_compare_excel_dtype_map_matches_default(excel_pair):
+    tool = ExcelTool()
+    default = tool.compare_excel(*excel_pair, 'data', 'data', key_columns=['id'], use_cache=False)
+    typed = tool.compare_excel(*excel_pair, 'data', 'data', key_columns=['id'], use_cache=False, dtype=DTYPE_MAP)
+
+    assert changed_cells(typed) == changed_cells(default)
+    assert typed['status'] == default['status'] == 'different'
+
+
+def test_merge_excel_dtype_map_matches_default(tmp_path, excel_pair):
+    tool = ExcelTool()
+    default = str(tmp_path / 'default.csv')
+    typed = str(tmp_path / 'typed.csv')
+    assert tool.merge_excel_sheets(list(excel_pair), default, use_cache=False)
+    assert tool.merge_excel_sheets(list(excel_pair), typed, use_cache=False, dtype=DTYPE_MAP)
+
+    with open(default, 'rb') as f1, open(typed, 'rb') as f2:
+        assert f1.read() == f2.read()
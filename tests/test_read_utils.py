@@ -0,0 +1,40 @@
+"""
+read_utils 解析引擎测试
+"""
+import pandas as pd
+import pytest
+
+from simpletoolkit.filesystems.read_utils import read_csv_frame
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.warnings = []
+
+    def warning(self, message, *args):
+        self.warnings.append(message)
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_text('id,day,name\n1,2024-01-01,a\n2,2024-01-02,\n', encoding='utf-8')
+    return str(path)
+
+
+def test_pyarrow_engine_matches_c_engine(csv_file):
+    logger = RecordingLogger()
+    expected = read_csv_frame(csv_file, 'c')
+    actual = read_csv_frame(csv_file, 'pyarrow', logger=logger)
+    assert actual['day'].tolist() == expected['day'].tolist()
+    assert actual['id'].tolist() == expected['id'].tolist()
+    assert not logger.warnings
+
+
+def test_pyarrow_fallback_is_logged(csv_file):
+    logger = RecordingLogger()
+    # pyarrow 引擎不支持可调用的 usecols，回退到 c 引擎
+    df = read_csv_frame(csv_file, 'pyarrow', logger=logger, usecols=lambda col: col != 'name')
+    assert list(df.columns) == ['id', 'day']
+    assert isinstance(df['id'].dtype, pd.ArrowDtype)
+    assert len(logger.warnings) == 1
@@ -0,0 +1,61 @@
+"""
+工具包入口测试：延迟导入和全局配置
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+import simpletoolkit
+from simpletoolkit.base import logging_core
+
+# 包导入和创建工具包时不应加载的模块
+HEAVY_MODULES = ('pandas', 'numpy', 'obs', 'loguru')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def loaded_modules(code):
+    """在新解释器中执行 code，返回其中已加载的重量级模块"""
+    check = f"{code}\nimport sys\nprint(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+    output = subprocess.run([sys.executable, '-c', check], cwd=ROOT, check=True, capture_output=True, text=True)
+    return [name for name in output.stdout.strip().split(',') if name]
+
+
+def test_create_toolkit_does_not_import_heavy_modules():
+    assert loaded_modules("import simpletoolkit; simpletoolkit.create_toolkit()") == []
+
+
+def test_tool_access_imports_only_what_it_needs():
+    loaded = loaded_modules("import simpletoolkit; simpletoolkit.create_toolkit().data_processing.date_generator")
+    assert 'pandas' not in loaded and 'obs' not in loaded
+
+
+@pytest.fixture
+def toolkit():
+    saved = logging_core._default_level_no
+    yield simpletoolkit.create_toolkit()
+    logging_core._default_level_no = saved
+
+
+def test_configure_global_reaches_lazily_created_tools(toolkit):
+    assert 'csv' not in vars(toolkit.filesystem)
+    toolkit.configure_global(parser_engine='pyarrow', log_level='ERROR')
+
+    csv_tool = toolkit.filesystem.csv
+    assert csv_tool._config['parser_engine'] == 'pyarrow'
+    assert not csv_tool._logger.is_enabled_for('WARNING')
+    assert toolkit.filesystem.excel._config['parser_engine'] == 'pyarrow'
+    # 之后再访问返回同一实例
+    assert toolkit.filesystem.csv is csv_tool
+
+
+def test_configure_global_updates_existing_tools(toolkit):
+    csv_tool = toolkit.filesystem.csv
+    toolkit.configure_global(parser_engine='pyarrow')
+    assert csv_tool._config['parser_engine'] == 'pyarrow'
+
+
+def test_unknown_attribute_raises():
+    with pytest.raises(AttributeError):
+        simpletoolkit.NoSuchTool